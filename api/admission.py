@@ -0,0 +1,264 @@
+"""
+Admission control for the scoring routes.
+
+At most max_in_flight scoring requests run at once. Further requests wait
+in a bounded queue per priority lane and are admitted strictly by lane
+priority (high, then normal, then bulk) as slots free up. A request that
+finds its lane full, or waits longer than queue_timeout_ms, gets an
+immediate 429 with a Retry-After estimate instead of piling more work on
+an overloaded process.
+"""
+
+import asyncio
+import ipaddress
+import json
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from src.config_store import get_config_store
+from src.metrics import MetricsRegistry, get_metrics
+
+LANES = ("high", "normal", "bulk")
+
+
+def load_admission_settings() -> Dict:
+    """Admission settings from configs/config.yaml (api.admission)."""
+    settings = {
+        "enabled": True,
+        "max_in_flight": 64,
+        "queue_timeout_ms": 1000,
+        "lanes": {"high": 256, "normal": 512, "bulk": 32},
+        "paths": ["/predict"],
+        "bulk_paths": ["/predict/batch", "/predict/stream", "/predict/arrow"],
+        "high_priority_sources": [],
+    }
+    configured = get_config_store().value("config", "api", "admission", default=None) or {}
+    settings.update({k: v for k, v in configured.items() if k != "lanes"})
+    settings["lanes"] = {**settings["lanes"], **(configured.get("lanes") or {})}
+    return settings
+
+
+class AdmissionController:
+    """
+    Slots for in-flight requests plus one bounded wait queue per lane.
+
+    All methods run on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_in_flight: int = 64, lane_limits: Optional[Dict[str, int]] = None,
+                 queue_timeout_ms: float = 1000.0, metrics: Optional[MetricsRegistry] = None):
+        """
+        Initialize controller.
+
+        Args:
+            max_in_flight: Requests allowed to run concurrently
+            lane_limits: Waiting requests allowed per lane (0 = reject at once)
+            queue_timeout_ms: Longest a request waits for a slot
+            metrics: Registry to report to (default: a private one)
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.lane_limits = {lane: 0 for lane in LANES}
+        self.lane_limits.update({k: int(v) for k, v in (lane_limits or {}).items() if k in LANES})
+        self.queue_timeout = max(0.0, float(queue_timeout_ms)) / 1000.0
+        self.in_flight = 0
+        self._queues = {lane: deque() for lane in LANES}
+        self._service_seconds = 0.05  # running average, seeds Retry-After
+
+        metrics = metrics or MetricsRegistry()
+        self._admitted = {
+            lane: metrics.counter("admission_admitted_total", "Requests admitted", labels={"lane": lane})
+            for lane in LANES
+        }
+        self._rejected = {
+            lane: metrics.counter("admission_rejected_total", "Requests rejected with 429", labels={"lane": lane})
+            for lane in LANES
+        }
+        self._wait = metrics.histogram("admission_wait_seconds", "Time spent queued before admission")
+        metrics.gauge("admission_in_flight", "Scoring requests running", lambda: self.in_flight)
+        for lane in LANES:
+            metrics.gauge("admission_queue_depth", "Requests waiting for a slot",
+                          lambda lane=lane: len(self._queues[lane]), labels={"lane": lane})
+
+    def queue_depth(self, lane: Optional[str] = None) -> int:
+        if lane is not None:
+            return len(self._queues[lane])
+        return sum(len(q) for q in self._queues.values())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained (at least 1)."""
+        backlog = self.queue_depth() + self.in_flight
+        return max(1, math.ceil(backlog * self._service_seconds / self.max_in_flight))
+
+    async def acquire(self, lane: str) -> bool:
+        """Take a slot, waiting in `lane` if needed. False means reject."""
+        if self.in_flight < self.max_in_flight and not self.queue_depth():
+            self.in_flight += 1
+            self._admitted[lane].inc()
+            return True
+
+        queue = self._queues[lane]
+        if len(queue) >= self.lane_limits[lane] or self.queue_timeout == 0:
+            self._rejected[lane].inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed this waiter a slot just as the
+            # timeout fired; the slot is ours then, so take it
+            if not (waiter.done() and not waiter.cancelled()):
+                self._rejected[lane].inc()
+                return False
+        except BaseException:
+            # Client went away; hand back a slot granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+        self._wait.observe(time.perf_counter() - started)
+        self._admitted[lane].inc()
+        return True
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """Free a slot, handing it straight to the next waiter by lane priority."""
+        if service_seconds is not None:
+            self._service_seconds += 0.1 * (service_seconds - self._service_seconds)
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": True,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": {lane: len(q) for lane, q in self._queues.items()},
+            "queue_limits": dict(self.lane_limits),
+            "admitted": {lane: int(c.value) for lane, c in self._admitted.items()},
+            "rejected": {lane: int(c.value) for lane, c in self._rejected.items()},
+            "queue_wait": self._wait.summary(),
+            "avg_service_ms": round(self._service_seconds * 1000, 3),
+            "retry_after_seconds": self.retry_after(),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Applies an AdmissionController to requests under the configured paths.
+
+    Lanes: clients whose address is in high_priority_sources (IPs or
+    CIDR networks) use 'high'; bulk_paths default to 'bulk'; everything
+    else to 'normal'. Only the connection's address counts, never a
+    header a client could set itself. Clients may lower their own
+    priority with `X-Priority: bulk`. Other routes (health, monitoring,
+    push) are never queued.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None,
+                 settings: Optional[Dict] = None):
+        """
+        Args:
+            app: Wrapped ASGI app
+            controller: Controller to use (default: built from settings;
+                None with admission disabled means pass-through)
+            settings: As returned by load_admission_settings()
+        """
+        self.app = app
+        self.settings = settings or load_admission_settings()
+        if controller is None and self.settings.get("enabled", True):
+            controller = _build_controller(self.settings)
+        self.controller = controller
+        self.paths = tuple(self.settings["paths"])
+        self.bulk_paths = tuple(self.settings["bulk_paths"])
+        self.high_sources = [
+            ipaddress.ip_network(str(source), strict=False)
+            for source in self.settings["high_priority_sources"] or []
+        ]
+
+    def _is_high_priority(self, host: Optional[str]) -> bool:
+        if not host or not self.high_sources:
+            return False
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.high_sources)
+
+    def lane_for(self, scope) -> str:
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", ())}
+        client = scope.get("client") or (None, None)
+        if self._is_high_priority(client[0]):
+            return "high"
+        if headers.get("x-priority", "").lower() == "bulk":
+            return "bulk"
+        if scope["path"].startswith(self.bulk_paths):
+            return "bulk"
+        return "normal"
+
+    async def __call__(self, scope, receive, send):
+        if (self.controller is None or scope["type"] != "http"
+                or not scope["path"].startswith(self.paths)):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire(self.lane_for(scope)):
+            await self._reject(send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.perf_counter() - started)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server busy, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _build_controller(settings: Dict, metrics: Optional[MetricsRegistry] = None) -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=settings["max_in_flight"],
+        lane_limits=settings["lanes"],
+        queue_timeout_ms=settings["queue_timeout_ms"],
+        metrics=metrics,
+    )
+
+
+_controller: Optional[AdmissionController] = None
+_controller_loaded = False
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Process-wide controller configured by api.admission in
+    configs/config.yaml and reporting to get_metrics(), or None when disabled.
+    """
+    global _controller, _controller_loaded
+    if not _controller_loaded:
+        settings = load_admission_settings()
+        if settings.get("enabled", True):
+            _controller = _build_controller(settings, metrics=get_metrics())
+        _controller_loaded = True
+    return _controller
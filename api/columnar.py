@@ -0,0 +1,181 @@
+"""
+Arrow IPC / Parquet input and output for bulk scoring.
+
+Events arrive as whole columns, so validation is a handful of Arrow
+casts and null counts per column instead of one pydantic model per row.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from api.schemas import EventIn
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+PARQUET = "application/vnd.apache.parquet"
+PARQUET_TYPES = (PARQUET, "application/x-parquet", "application/parquet")
+
+# EventIn fields as Arrow columns: (type, nullable)
+EVENT_COLUMNS = {
+    "timestamp": (pa.string(), True),
+    "user_id": (pa.string(), True),
+    "ip_address": (pa.string(), True),
+    "action": (pa.string(), False),
+    "status": (pa.string(), False),
+    "bytes_transferred": (pa.int64(), True),
+    "duration_ms": (pa.int64(), True),
+    "user_agent": (pa.string(), True),
+}
+
+
+class ColumnarError(ValueError):
+    """Payload can't be read or fails column validation."""
+
+    def __init__(self, message: str, errors: Optional[List[Dict]] = None,
+                 status_code: int = 422):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status_code = status_code
+
+
+# pydantic 2 (model_fields); __fields__ is deprecated there but all 1.x has
+_EVENT_FIELDS = getattr(EventIn, "model_fields", None) or EventIn.__fields__
+
+
+def _field_default(name: str):
+    return _EVENT_FIELDS[name].default
+
+
+def read_table(body: bytes, content_type: str) -> pa.Table:
+    """Parse an Arrow IPC stream/file or Parquet body into a Table."""
+    media = (content_type or "").split(";")[0].strip().lower()
+    buffer = pa.py_buffer(body)
+    try:
+        if media in PARQUET_TYPES:
+            return pq.read_table(pa.BufferReader(buffer))
+        if media == ARROW_FILE:
+            return ipc.open_file(buffer).read_all()
+        if media == ARROW_STREAM:
+            return ipc.open_stream(buffer).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ColumnarError(f"Unreadable {media} payload: {e}", status_code=400)
+    raise ColumnarError(
+        f"Unsupported content type '{media}'; use {ARROW_STREAM}, {ARROW_FILE} or {PARQUET}",
+        status_code=415,
+    )
+
+
+def validate_events(table: pa.Table) -> pa.Table:
+    """
+    Check and normalise EventIn columns, one column at a time.
+
+    Missing columns get the EventIn default, values are cast to the
+    declared types, and non-nullable columns must not contain nulls.
+    A timestamp column may also be an Arrow timestamp. Extra columns
+    are dropped. Raises ColumnarError listing every failing column.
+    """
+    n = table.num_rows
+    names = set(table.column_names)
+    columns = {}
+    errors = []
+
+    for name, (arrow_type, nullable) in EVENT_COLUMNS.items():
+        if name not in names:
+            default = _field_default(name)
+            columns[name] = pa.array([default] * n, arrow_type)
+            continue
+
+        column = table.column(name)
+        if pa.types.is_dictionary(column.type):
+            column = pc.cast(column, column.type.value_type)
+        if not (name == "timestamp" and pa.types.is_timestamp(column.type)):
+            if pa.types.is_string(arrow_type) and not (
+                pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+                or pa.types.is_null(column.type)
+            ):
+                errors.append({"column": name, "error": f"expected string, got {column.type}"})
+                continue
+            try:
+                column = pc.cast(column, arrow_type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                errors.append({"column": name, "error": str(e)})
+                continue
+
+        if not nullable and column.null_count:
+            first = pc.indices_nonzero(pc.is_null(column)).to_pylist()[:5]
+            errors.append({
+                "column": name,
+                "error": f"{column.null_count} null value(s), first at rows {first}",
+            })
+            continue
+        columns[name] = column
+
+    if errors:
+        raise ColumnarError("Invalid event columns", errors)
+    return pa.table(columns)
+
+
+def results_table(anomaly_scores, intent_probs, risk_scores, threshold) -> pa.Table:
+    """
+    Scores as an Arrow table, one row per input event. `threshold` is the
+    risk threshold, or an array with one per event.
+    """
+    risk_scores = np.asarray(risk_scores, dtype=np.float64)
+    blocked = pa.array(risk_scores >= threshold)
+    actions = pa.DictionaryArray.from_arrays(
+        pc.cast(pc.invert(blocked), pa.int8()), pa.array(["block", "monitor"])
+    )
+    return pa.table({
+        "anomaly_score": pa.array(np.asarray(anomaly_scores, dtype=np.float64)),
+        "intent_probability": pa.array(np.asarray(intent_probs, dtype=np.float64)),
+        "risk_score": pa.array(risk_scores),
+        "recommended_action": actions,
+    })
+
+
+def write_table(table: pa.Table, media_type: str = ARROW_STREAM) -> Tuple[bytes, str]:
+    """Serialize a result table as an Arrow IPC stream or Parquet."""
+    sink = pa.BufferOutputStream()
+    if media_type in PARQUET_TYPES:
+        pq.write_table(table, sink)
+        media_type = PARQUET
+    else:
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        media_type = ARROW_STREAM
+    return sink.getvalue().to_pybytes(), media_type
+
+
+class TableRows:
+    """
+    Read-only row view of a Table for the event bus and alerting.
+
+    Rows are only materialised as dicts when they are accessed, so bulk
+    scoring doesn't pay for to_pylist() on rows nobody looks at.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("TableRows only supports contiguous slices")
+            return TableRows(self.table.slice(start, max(0, stop - start)))
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        return self.table.slice(index, 1).to_pylist()[0]
+
+    def __iter__(self):
+        for batch in self.table.to_batches(max_chunksize=1024):
+            yield from batch.to_pylist()
@@ -0,0 +1,95 @@
+"""ASGI middleware recording request metrics and per-stage traces."""
+
+import time
+
+from src.metrics import get_metrics
+from src.tracing import activate, deactivate, finish_trace, start_trace
+
+TRACE_HEADER = b"x-trace"
+
+
+class RequestMetricsMiddleware:
+    """
+    Records http_request_seconds and http_requests_total labelled by
+    method, route template and status.
+
+    Plain ASGI (not BaseHTTPMiddleware) so streaming responses and
+    /predict/stream's full-duplex body reading pass through untouched.
+    Latency runs until the last body chunk has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.metrics = get_metrics()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Route template keeps label cardinality bounded; unmatched paths share one label
+            path = getattr(route, "path", None) or "unmatched"
+            labels = {"method": scope["method"], "route": path, "status": str(status["code"])}
+            self.metrics.histogram(
+                "http_request_seconds", "HTTP request latency", labels=labels
+            ).observe(time.perf_counter() - started)
+            self.metrics.counter(
+                "http_requests_total", "HTTP requests", labels=labels
+            ).inc()
+
+
+class TracingMiddleware:
+    """
+    Starts a trace for requests that opt in with an `X-Trace: 1` header or
+    are picked by api.tracing.sample_rate, while api.tracing.enabled is on.
+
+    Opted-in requests get a Server-Timing response header with the stage
+    durations recorded before the response started; sampled ones are
+    appended to the trace file once the response body is complete.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = any(
+            k == TRACE_HEADER and v.strip() in (b"1", b"true")
+            for k, v in scope.get("headers", ())
+        )
+        trace = start_trace(f"{scope['method']} {scope['path']}", requested=requested)
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and requested:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = activate(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            deactivate(token)
+            route = scope.get("route")
+            if route is not None:
+                trace.name = f"{scope['method']} {route.path}"
+            finish_trace(trace)
@@ -1,13 +1,41 @@
+from contextlib import asynccontextmanager
+import logging
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from api.admission import AdmissionMiddleware, get_admission_controller
+from api.instrumentation import RequestMetricsMiddleware, TracingMiddleware
 
+from api.routes import prediction
+from api.routes.models import router as models_router
+from api.routes.monitoring import router as monitoring_router
 from api.routes.prediction import router as prediction_router
+from api.routes.push import router as push_router
+from models.registry import get_registry
+from src.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Preload + warm up so the first request doesn't pay for it
+    try:
+        await run_in_threadpool(get_registry().load)
+    except FileNotFoundError as e:
+        logger.warning(f"Starting without models: {e}")
+    yield
+    await prediction.shutdown_executor()
 
 
 app = FastAPI(
     title="CyberIntent-AI API",
     description="API for predictive cybersecurity risk scoring",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,6 +45,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
+# Inside the metrics middleware so 429s show up in http_requests_total
+app.add_middleware(AdmissionMiddleware, controller=get_admission_controller())
+app.add_middleware(RequestMetricsMiddleware)
 
 
 @app.get("/health")
@@ -24,4 +56,16 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(
+        get_metrics().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 app.include_router(prediction_router)
+app.include_router(models_router)
+app.include_router(push_router)
+app.include_router(monitoring_router, prefix="/api/monitor", tags=["monitoring"])
@@ -0,0 +1,37 @@
+"""Model registry endpoints."""
+
+from typing import Dict
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from models.registry import get_registry
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+@router.get("/info")
+async def get_model_info() -> Dict:
+    """
+    Get the loaded model version.
+
+    Returns:
+        Version, load time, inference engine and memory footprint
+    """
+    return get_registry().info()
+
+
+@router.post("/reload")
+async def reload_models() -> Dict:
+    """
+    Load the published model version and swap it in.
+
+    Returns:
+        Info for the newly loaded version
+    """
+    registry = get_registry()
+    try:
+        await run_in_threadpool(registry.load)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return registry.info()
@@ -2,10 +2,23 @@
 
 from fastapi import APIRouter
 from datetime import datetime
+import time
 from typing import Dict, List
 
+from api.admission import get_admission_controller
+from api.routes.prediction import get_alert_system
+from models.registry import get_registry
+from models.streaming_anomaly import get_online_updater
+from src.event_bus import get_event_bus
+from src.metrics import ProcessStats, get_metrics
+from src.prediction_cache import get_prediction_cache
+from src.session_features import get_session_tracker
+from src.window_features import get_window_engine
+
 router = APIRouter()
 
+_process = ProcessStats()
+
 
 @router.get("/status")
 async def get_status() -> Dict:
@@ -20,27 +33,32 @@ async def get_status() -> Dict:
         "service": "CyberIntent-AI",
         "version": "0.1.0",
         "timestamp": datetime.now().isoformat(),
-        "uptime_seconds": 3600
+        "uptime_seconds": round(time.time() - get_metrics().started_at, 1)
     }
 
 
 @router.get("/metrics")
-async def get_metrics() -> Dict:
+async def get_metrics_summary() -> Dict:
     """
     Get real-time metrics.
     
     Returns:
-        Current system metrics
+        Counters since process start and prediction latency percentiles
     """
+    metrics = get_metrics()
+    scoring = metrics.histogram("scoring_seconds").summary()
+    alerts = get_alert_system().alerts
     return {
-        "total_events_processed": 10234,
-        "anomalies_detected": 87,
-        "threats_identified": 34,
-        "high_risk_count": 12,
-        "alerts_total": 28,
-        "alerts_unacknowledged": 5,
-        "responses_executed": 8,
-        "average_prediction_time_ms": 45.2,
+        "total_events_processed": int(metrics.total("events_scored_total")),
+        "anomalies_detected": int(metrics.total("anomalies_detected_total")),
+        "threats_identified": int(metrics.total("threats_identified_total")),
+        "high_risk_count": int(metrics.total("high_risk_events_total")),
+        "alerts_total": int(metrics.total("alerts_total")),
+        "alerts_unacknowledged": sum(1 for a in alerts if not a.acknowledged),
+        "responses_executed": int(metrics.total("responses_executed_total")),
+        "stream_events_processed": int(metrics.total("stream_events_total")),
+        "average_prediction_time_ms": scoring["mean_ms"],
+        "prediction_latency": scoring,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -48,46 +66,137 @@ async def get_metrics() -> Dict:
 @router.get("/events")
 async def stream_events(limit: int = 100) -> Dict:
     """
-    Get recent detected events.
+    Get recent scored events.
     
     Args:
         limit: Maximum events to return
         
     Returns:
-        Recent events
+        Recent events, newest last
     """
+    events = get_event_bus().recent("event", limit)
     return {
         "status": "success",
-        "events": [
-            {
-                "event_id": str(i),
-                "timestamp": datetime.now().isoformat(),
-                "type": "ANOMALY",
-                "severity": "MEDIUM"
-            }
-            for i in range(min(limit, 10))
-        ],
-        "count": min(limit, 10)
+        "events": events,
+        "count": len(events)
     }
 
 
 @router.get("/alerts")
 async def get_alerts(limit: int = 50) -> Dict:
     """Get recent alerts."""
+    alerts = get_event_bus().recent("alert", limit)
     return {
         "status": "success",
-        "alerts": [],
-        "count": 0
+        "alerts": alerts,
+        "count": len(alerts)
     }
 
 
 @router.get("/performance")
 async def get_performance() -> Dict:
-    """Get performance metrics."""
+    """
+    Get performance metrics.
+
+    Throughput is measured between successive calls (up to one minute
+    apart); CPU is the process's usage since the previous call.
+    """
+    metrics = get_metrics()
+    scoring = metrics.histogram("scoring_seconds").summary()
+    routes = {}
+    for hist in metrics.collect("http_request_seconds"):
+        labels = dict(hist.labels)
+        routes[f"{labels['method']} {labels['route']} {labels['status']}"] = hist.summary()
     return {
-        "cpu_usage_percent": 35.2,
-        "memory_usage_percent": 42.1,
-        "prediction_latency_ms": 45.2,
-        "throughput_events_per_second": 156.3,
+        "cpu_usage_percent": round(_process.cpu_percent(), 2),
+        "memory_usage_percent": _process.memory_percent(),
+        "resident_memory_bytes": _process.resident_bytes(),
+        "prediction_latency_ms": scoring["mean_ms"],
+        "prediction_latency_p50_ms": scoring["p50_ms"],
+        "prediction_latency_p95_ms": scoring["p95_ms"],
+        "prediction_latency_p99_ms": scoring["p99_ms"],
+        "throughput_events_per_second": round(metrics.counter("events_scored_total").rate(), 2),
+        "stream_event_latency": metrics.histogram("stream_event_seconds").summary(),
+        "routes": routes,
+        "admission": _admission_stats(),
         "timestamp": datetime.now().isoformat()
     }
+
+
+def _admission_stats() -> Dict:
+    controller = get_admission_controller()
+    if controller is None:
+        return {"enabled": False}
+    return controller.stats()
+
+
+@router.get("/admission")
+async def get_admission_stats() -> Dict:
+    """
+    Get admission control state.
+
+    Returns:
+        In-flight requests, queue depth and admitted/rejected counts per lane
+    """
+    return _admission_stats()
+
+
+@router.get("/cache")
+async def get_cache_stats() -> Dict:
+    """
+    Get prediction cache statistics.
+
+    Returns:
+        Size, hit/miss/eviction counters and the cached model generation
+    """
+    cache = get_prediction_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+
+@router.get("/window-features")
+async def get_window_feature_stats() -> Dict:
+    """
+    Get sliding-window feature engine state.
+
+    Returns:
+        Tracked user/IP keys, key limit, evictions and window lengths
+    """
+    engine = get_window_engine()
+    if engine is None:
+        return {"enabled": False}
+    return {"enabled": True, **engine.stats()}
+
+
+@router.get("/sessions")
+async def get_sessions(limit: int = 50) -> Dict:
+    """
+    Get session tracker state and recently closed sessions.
+
+    Args:
+        limit: Maximum closed sessions to return
+
+    Returns:
+        Open/closed session counts and the newest closed sessions
+    """
+    tracker = get_session_tracker()
+    if tracker is None:
+        return {"enabled": False}
+    return {"enabled": True, **tracker.stats(), "recent": tracker.recent_sessions(limit)}
+
+
+@router.get("/anomaly-updates")
+async def get_anomaly_update_stats() -> Dict:
+    """
+    Get online anomaly detector update state.
+
+    Returns:
+        Pending/applied/dropped updates and the serving detector's window state
+    """
+    updater = get_online_updater()
+    if updater is None:
+        return {"enabled": False}
+    model = get_registry().current().anomaly_model
+    detector = model.stats() if hasattr(model, "update") else None
+    return {"enabled": True, **updater.stats(), "detector": detector}
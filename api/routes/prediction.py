@@ -1,67 +1,476 @@
 from pathlib import Path
+import json
 import sys
+import time
 
-from fastapi import APIRouter
-import joblib
-import pandas as pd
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+import numpy as np
+from pydantic import ValidationError
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from api.schemas import EventIn, PredictionOut
-from src.feature_engineering import build_features
+from api.columnar import (
+    ColumnarError,
+    TableRows,
+    read_table,
+    results_table,
+    validate_events,
+    write_table,
+)
+from api.schemas import (
+    BatchIn,
+    BatchItemOut,
+    BatchOut,
+    EventIn,
+    PredictionOut,
+)
+from api.scoring_executor import MicroBatchExecutor, load_executor_settings
 from models.risk_scorer import compute_risk_score
-from src.response_engine import load_risk_threshold
+from models.registry import get_registry
+from models.streaming_anomaly import get_online_updater
+from src.alert_system import AlertSystem
+from src.config_store import get_config_store
+from src.event_bus import get_event_bus
+from src.metrics import get_metrics
+from src.prediction_cache import get_prediction_cache
+from src.response_engine import (
+    SEGMENT_COLUMNS,
+    load_risk_threshold,
+    load_segment_thresholds,
+    segment_thresholds,
+)
+from src.tracing import Trace, activate, current_trace, deactivate, mark, span, tracing_settings
+from src.session_features import get_session_tracker
+from src.window_features import get_window_engine
 
 
 router = APIRouter(prefix="/predict", tags=["prediction"])
 
-_anomaly_model = None
-_intent_model = None
+MAX_BATCH_SIZE = 10000
+STREAM_BATCH_SIZE = 512
+MAX_LINE_BYTES = 1 << 20
+MAX_COLUMNAR_ROWS = 1_000_000
 
 
-def _load_models():
-    global _anomaly_model, _intent_model
-    if _anomaly_model is None or _intent_model is None:
-        anomaly_path = ROOT / "models" / "saved" / "anomaly_model.pkl"
-        intent_path = ROOT / "models" / "saved" / "intent_model.pkl"
-        if not anomaly_path.exists() or not intent_path.exists():
-            raise FileNotFoundError(
-                "Models not found. Run 'python scripts/train_models.py' first."
-            )
-        _anomaly_model = joblib.load(anomaly_path)
-        _intent_model = joblib.load(intent_path)
-    return _anomaly_model, _intent_model
+_alert_system = AlertSystem(max_alerts=1000)
+_alert_system.set_threshold(
+    "risk_score",
+    get_config_store().value("config", "thresholds", "risk_score", default=70),
+)
+_alert_system.set_threshold(
+    "failed_logins",
+    get_config_store().value("config", "thresholds", "failed_logins", default=5),
+)
+_alert_system.register_handler(lambda alert: get_event_bus().publish_alert(alert))
+
+_metrics = get_metrics()
+SCORING_SECONDS = _metrics.histogram(
+    "scoring_seconds", "Time to encode and score one call to the models")
+EVENTS_SCORED = _metrics.counter("events_scored_total", "Events scored")
+ANOMALIES = _metrics.counter(
+    "anomalies_detected_total", "Scored events at or above the anomaly alert threshold")
+THREATS = _metrics.counter(
+    "threats_identified_total", "Scored events with intent probability >= 0.5")
+HIGH_RISK = _metrics.counter(
+    "high_risk_events_total", "Scored events at or above the risk threshold")
+
+
+def get_alert_system() -> AlertSystem:
+    """Alert system fed by the prediction routes."""
+    return _alert_system
+
+
+def _risk_thresholds(records):
+    """
+    Global risk threshold, or one threshold per record when per-segment
+    thresholds are configured.
+    """
+    threshold = load_risk_threshold(default=0.7)
+    config = load_segment_thresholds()
+    if config is None:
+        return threshold
+    name = SEGMENT_COLUMNS[config["segment_by"]]
+    if isinstance(records, TableRows):
+        values = records.table.column(name).to_pylist()
+    else:
+        values = [r.get(name) for r in records]
+    return segment_thresholds(values, config, threshold)
+
+
+def _record_metrics(started, anomaly_scores, intent_probs, risk_scores, records):
+    SCORING_SECONDS.observe(time.perf_counter() - started)
+    EVENTS_SCORED.inc(len(risk_scores))
+    ANOMALIES.inc(int(np.count_nonzero(
+        np.asarray(anomaly_scores) >= _alert_system.thresholds["anomaly_score"])))
+    THREATS.inc(int(np.count_nonzero(np.asarray(intent_probs) >= 0.5)))
+    HIGH_RISK.inc(int(np.count_nonzero(
+        np.asarray(risk_scores) >= _risk_thresholds(records))))
+
+
+def _publish(records, anomaly_scores, intent_probs, risk_scores):
+    """Push scored events and any raised alerts to /push subscribers."""
+    get_event_bus().publish_scored_events(records, anomaly_scores, intent_probs, risk_scores)
+
+    # AlertSystem works on a 0-100 risk scale
+    risk_pct = np.asarray(risk_scores) * 100
+    for n in np.flatnonzero(risk_pct >= _alert_system.thresholds["risk_score"]):
+        record = records[n]
+        _alert_system.check_risk_score(float(risk_pct[n]), context={
+            "user_id": record.get("user_id"),
+            "ip_address": record.get("ip_address"),
+            "action": record.get("action"),
+        })
+
+    engine = get_window_engine()
+    if engine is not None:
+        _check_failed_logins(records, engine.shortest_window)
+
+
+def _check_failed_logins(records, period):
+    """Brute-force alerts from the window features on enriched records."""
+    crossing = int(_alert_system.thresholds["failed_logins"]) + 1
+    for prefix, entity in (("user", "user_id"), ("ip", "ip_address")):
+        name = f"{prefix}_failed_logins_{period}"
+        if isinstance(records, TableRows):
+            counts = records.table.column(name).to_numpy()
+        else:
+            counts = np.fromiter((r.get(name) or 0 for r in records), float, len(records))
+        for n in np.flatnonzero(counts == crossing):
+            record = records[int(n)]
+            _alert_system.check_failed_logins(counts[n], period, context={
+                entity: record.get(entity), "action": record.get("action"),
+            })
+
+
+def _score_events(records, bundle=None, features=None):
+    """
+    Score a list of event dicts with one call per model.
+
+    Rows found in the prediction cache (if enabled) skip the models; the
+    cache is bypassed while the anomaly detector learns online, since
+    its scores change with every completed window.
+    With window features or sessions enabled, events are enriched with
+    their per-user/IP window aggregates and session-to-date features
+    before encoding and publishing. With online updates enabled, a
+    streaming anomaly detector learns from the encoded events on a
+    background thread after scoring.
+    `features` is what gets encoded when it differs from `records`
+    (e.g. an Arrow table with `records` as its row view).
+    Returns (anomaly_scores, intent_probs, risk_scores) arrays in input order.
+    """
+    started = time.perf_counter()
+
+    # One bundle per call: a concurrent hot swap doesn't mix versions
+    bundle = bundle or get_registry().current()
+
+    # Every event updates the per-user/IP windows and sessions, cached or not
+    for stage, engine in (("window_features", get_window_engine()), ("sessions", get_session_tracker())):
+        if engine is None:
+            continue
+        with span(stage):
+            if features is None:
+                records = engine.enrich(records)
+            else:
+                features = engine.enrich(features)
+                records = TableRows(features)
+
+    # Fitted pipeline: same columns as training, no pandas per request
+    with span("encode"):
+        X = bundle.pipeline.transform(records if features is None else features)
+
+    updater = get_online_updater()
+    learning = updater is not None and hasattr(bundle.anomaly_model, "update")
+    cache = None if learning else get_prediction_cache()
+    if cache is None:
+        anomaly_scores, intent_probs, risk_scores = _score_matrix(X, bundle)
+    else:
+        anomaly_scores, intent_probs, risk_scores = _score_cached(X, bundle, cache)
+
+    if learning:
+        updater.submit(bundle.anomaly_model, X)
+
+    _record_metrics(started, anomaly_scores, intent_probs, risk_scores, records)
+    with span("publish"):
+        _publish(records, anomaly_scores, intent_probs, risk_scores)
+    return anomaly_scores, intent_probs, risk_scores
+
+
+def _score_cached(X, bundle, cache):
+    """Score only the rows the cache doesn't already hold."""
+    with span("cache_lookup"):
+        generation = f"{bundle.version}@{bundle.loaded_at.isoformat()}"
+        cache.bind_generation(generation)
+        keys = [cache.key(row, generation) for row in X]
+        results = np.empty((len(X), 3))
+        missing = []
+        for n, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is None:
+                missing.append(n)
+            else:
+                results[n] = cached
+
+    if missing:
+        scored = np.column_stack(_score_matrix(X[missing], bundle))
+        results[missing] = scored
+        for n, row in zip(missing, scored):
+            cache.put(keys[n], row.copy())
+
+    return results[:, 0], results[:, 1], results[:, 2]
+
+
+def _score_matrix(X, bundle):
+    with span("anomaly_score"):
+        anomaly_scores = bundle.anomaly_model.anomaly_score(X)
+    with span("predict_proba"):
+        intent_probs = bundle.intent_model.predict_proba(X)
+    with span("compute_risk_score"):
+        risk_scores = compute_risk_score(
+            anomaly_scores, intent_probs, calibrator=bundle.calibrator
+        )
+    return anomaly_scores, intent_probs, risk_scores
+
+
+def _score_records(records):
+    """
+    Executor entry point: one (anomaly, intent, risk, batch_trace) tuple per
+    record. batch_trace holds the shared batch's stage timings when tracing
+    is enabled, else None.
+    """
+    batch_trace = Trace("batch") if tracing_settings()["enabled"] else None
+    token = activate(batch_trace)
+    try:
+        anomaly_scores, intent_probs, risk_scores = _score_events(records)
+    finally:
+        deactivate(token)
+    return [(a, i, r, batch_trace) for a, i, r in zip(anomaly_scores, intent_probs, risk_scores)]
+
+
+_executor = None
+
+
+def get_executor() -> MicroBatchExecutor:
+    global _executor
+    if _executor is None:
+        _executor = MicroBatchExecutor(_score_records, **load_executor_settings())
+    return _executor
+
+
+async def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        await _executor.stop()
+        _executor = None
+
+
+def _to_predictions(anomaly_scores, intent_probs, risk_scores, threshold):
+    actions = np.where(np.asarray(risk_scores) >= threshold, "block", "monitor")
+    return [
+        PredictionOut(
+            anomaly_score=float(a),
+            intent_probability=float(i),
+            risk_score=float(r),
+            recommended_action=str(act),
+        )
+        for a, i, r, act in zip(anomaly_scores, intent_probs, risk_scores, actions)
+    ]
 
 
 @router.post("/event", response_model=PredictionOut)
 async def predict_event(event: EventIn):
-    anomaly_model, intent_model = _load_models()
+    mark("parse")
 
-    data = event.dict()
-    df = pd.DataFrame([data])
+    # Scored off the event loop, merged with concurrent requests
+    with span("executor"):
+        record = event.dict()
+        anomaly_score, intent_prob, risk, batch_trace = await get_executor().submit(record)
+    trace = current_trace()
+    if trace is not None and batch_trace is not None:
+        trace.merge(batch_trace, prefix="batch.")
 
-    # build_features expects a 'risk_label' column; use dummy 0
-    if "risk_label" not in df.columns:
-        df["risk_label"] = 0
+    with span("threshold"):
+        threshold = _risk_thresholds([record])
+        return _to_predictions([anomaly_score], [intent_prob], [risk], threshold)[0]
 
-    X, _ = build_features(df)
 
-    anomaly_scores = anomaly_model.anomaly_score(X)
-    intent_probs = intent_model.predict_proba(X)
-    risk_scores = compute_risk_score(anomaly_scores, intent_probs)
+@router.post("/batch", response_model=BatchOut)
+async def predict_batch(batch: BatchIn):
+    """
+    Score many events with a single feature matrix and one call per model.
 
-    anomaly_score = float(anomaly_scores[0])
-    intent_prob = float(intent_probs[0])
-    risk = float(risk_scores[0])
+    Each item is validated on its own; invalid items are reported in
+    place and the rest of the batch is still scored.
+    """
+    mark("parse")
+    if len(batch.events) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.events)} > {MAX_BATCH_SIZE} events",
+        )
 
-    threshold = load_risk_threshold(default=0.7)
-    recommended_action = "block" if risk >= threshold else "monitor"
+    results = [BatchItemOut(index=i) for i in range(len(batch.events))]
+    valid_idx = []
+    records = []
+    with span("validate"):
+        for i, raw in enumerate(batch.events):
+            try:
+                records.append(EventIn.parse_obj(raw).dict())
+                valid_idx.append(i)
+            except ValidationError as e:
+                results[i].error = str(e)
 
-    return PredictionOut(
-        anomaly_score=anomaly_score,
-        intent_probability=intent_prob,
-        risk_score=risk,
-        recommended_action=recommended_action,
+    if records:
+        anomaly_scores, intent_probs, risk_scores = await run_in_threadpool(
+            _score_events, records
+        )
+        with span("threshold"):
+            threshold = _risk_thresholds(records)
+            predictions = _to_predictions(
+                anomaly_scores, intent_probs, risk_scores, threshold
+            )
+        for i, prediction in zip(valid_idx, predictions):
+            results[i].prediction = prediction
+
+    return BatchOut(
+        results=results,
+        count=len(results),
+        errors=len(results) - len(records),
     )
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself.
+
+    Starlette's default disconnect listener would consume the request
+    body messages, so only stream here; a disconnect still surfaces
+    through request.stream() or the failed send.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+async def _iter_ndjson_lines(request: Request):
+    """Yield raw lines of the request body as they arrive."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            # Hand the oversized line over so it is reported, not buffered
+            yield buffer
+            buffer = b""
+    if buffer:
+        yield buffer
+
+
+async def _score_stream(request: Request):
+    pending = []  # (line number, record or None, error or None)
+
+    async def flush():
+        records = [record for _, record, _ in pending if record is not None]
+        scored = iter(())
+        if records:
+            anomaly_scores, intent_probs, risk_scores = await run_in_threadpool(
+                _score_events, records
+            )
+            threshold = _risk_thresholds(records)
+            scored = iter(_to_predictions(
+                anomaly_scores, intent_probs, risk_scores, threshold
+            ))
+        out = []
+        for line_no, record, error in pending:
+            if record is None:
+                out.append({"line": line_no, "error": error})
+            else:
+                out.append({"line": line_no, **next(scored).dict()})
+        pending.clear()
+        return "".join(json.dumps(item) + "\n" for item in out)
+
+    line_no = 0
+    async for line in _iter_ndjson_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        if len(line) > MAX_LINE_BYTES:
+            pending.append((line_no, None, f"Line exceeds {MAX_LINE_BYTES} bytes"))
+        else:
+            try:
+                pending.append((line_no, EventIn.parse_obj(json.loads(line)).dict(), None))
+            except (ValueError, ValidationError) as e:
+                pending.append((line_no, None, str(e)))
+        if len(pending) >= STREAM_BATCH_SIZE:
+            yield await flush()
+
+    if pending:
+        yield await flush()
+
+
+@router.post("/stream")
+async def predict_stream(request: Request):
+    """
+    Score an NDJSON body (one EventIn object per line) incrementally.
+
+    Lines are scored in fixed-size batches as the upload arrives and one
+    NDJSON result per non-empty input line is streamed back in order, so
+    memory stays bounded whatever the upload size. Each result carries
+    its 1-based input line number and either the PredictionOut fields
+    or an error.
+    """
+    return _DuplexStreamingResponse(
+        _score_stream(request), media_type="application/x-ndjson"
+    )
+
+
+def _score_columnar(body: bytes, content_type: str, accept: str):
+    with span("decode"):
+        table = read_table(body, content_type)
+    if table.num_rows > MAX_COLUMNAR_ROWS:
+        raise ColumnarError(
+            f"Too many rows: {table.num_rows} > {MAX_COLUMNAR_ROWS}", status_code=413
+        )
+    with span("validate"):
+        table = validate_events(table)
+
+    anomaly_scores, intent_probs, risk_scores = _score_events(TableRows(table), features=table)
+
+    with span("threshold"):
+        threshold = _risk_thresholds(TableRows(table))
+        result = results_table(anomaly_scores, intent_probs, risk_scores, threshold)
+    with span("encode_response"):
+        return write_table(result, accept.split(",")[0].split(";")[0].strip().lower())
+
+
+@router.post("/arrow")
+async def predict_arrow(request: Request):
+    """
+    Score a columnar payload of EventIn columns.
+
+    The body is an Arrow IPC stream (application/vnd.apache.arrow.stream),
+    an Arrow IPC file (application/vnd.apache.arrow.file) or Parquet
+    (application/vnd.apache.parquet). Columns are validated as a whole
+    and encoded straight from the Arrow buffers. The response is an
+    Arrow IPC stream with anomaly_score, intent_probability, risk_score
+    and recommended_action per input row, or Parquet when the Accept
+    header asks for it.
+    """
+    body = await request.body()
+    try:
+        payload, media_type = await run_in_threadpool(
+            _score_columnar,
+            body,
+            request.headers.get("content-type", ""),
+            request.headers.get("accept", ""),
+        )
+    except ColumnarError as e:
+        raise HTTPException(
+            status_code=e.status_code, detail={"message": str(e), "errors": e.errors}
+        )
+    return Response(content=payload, media_type=media_type)
@@ -0,0 +1,110 @@
+"""Server-push endpoints for scored events and alerts."""
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from src.alert_system import AlertSeverity
+from src.event_bus import get_event_bus
+
+router = APIRouter(prefix="/push", tags=["push"])
+
+KEEPALIVE_SECONDS = 15.0
+MAX_CLIENT_BUFFER = 10000
+
+
+def _subscription_args(min_severity, user_id, ip_address, types, buffer):
+    if min_severity and min_severity.upper() not in AlertSeverity.__members__:
+        raise ValueError(f"Unknown severity '{min_severity}'")
+    return {
+        "min_severity": min_severity,
+        "user_id": user_id,
+        "ip_address": ip_address,
+        "types": types.split(",") if types else None,
+        "max_buffer": min(max(1, buffer), MAX_CLIENT_BUFFER),
+    }
+
+
+@router.get("/sse")
+async def stream_sse(min_severity: Optional[str] = None,
+                     user_id: Optional[str] = None,
+                     ip_address: Optional[str] = None,
+                     types: Optional[str] = None,
+                     buffer: int = 1000):
+    """
+    Server-Sent Events stream of scored events and alerts.
+
+    Args:
+        min_severity: Lowest severity delivered (LOW, MEDIUM, HIGH, CRITICAL)
+        user_id: Only messages for this user
+        ip_address: Only messages for this IP
+        types: Comma-separated message types ('event', 'alert')
+        buffer: Per-client buffer size; the oldest messages are dropped beyond it
+    """
+    try:
+        args = _subscription_args(min_severity, user_id, ip_address, types, buffer)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    bus = get_event_bus()
+    subscription = bus.subscribe(**args)
+
+    async def messages():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+        finally:
+            bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket,
+                           min_severity: Optional[str] = None,
+                           user_id: Optional[str] = None,
+                           ip_address: Optional[str] = None,
+                           types: Optional[str] = None,
+                           buffer: int = 1000):
+    """WebSocket stream of scored events and alerts (same filters as /push/sse)."""
+    try:
+        args = _subscription_args(min_severity, user_id, ip_address, types, buffer)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    bus = get_event_bus()
+    subscription = bus.subscribe(**args)
+    # Also wait on the client, so a disconnect is noticed even when no
+    # message matches its filters
+    received = asyncio.ensure_future(websocket.receive())
+    pending = asyncio.ensure_future(subscription.get())
+    try:
+        while True:
+            await asyncio.wait({received, pending}, return_when=asyncio.FIRST_COMPLETED)
+            if received.done():
+                if received.result()["type"] == "websocket.disconnect":
+                    break
+                received = asyncio.ensure_future(websocket.receive())  # client messages are ignored
+            if pending.done():
+                await websocket.send_text(json.dumps(pending.result(), default=str))
+                pending = asyncio.ensure_future(subscription.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        received.cancel()
+        pending.cancel()
+        bus.unsubscribe(subscription)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -25,3 +25,20 @@ class PredictionOut(BaseModel):
     intent_probability: float
     risk_score: float
     recommended_action: str
+
+
+class BatchIn(BaseModel):
+    # Items are validated one by one so a bad event doesn't fail the batch
+    events: List[Dict[str, Any]]
+
+
+class BatchItemOut(BaseModel):
+    index: int
+    prediction: Optional[PredictionOut] = None
+    error: Optional[str] = None
+
+
+class BatchOut(BaseModel):
+    results: List[BatchItemOut]
+    count: int
+    errors: int
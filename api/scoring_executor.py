@@ -0,0 +1,163 @@
+"""
+Dynamic micro-batching for model scoring.
+
+Requests submitted within a short window are merged into one vectorized
+model call that runs in a worker thread, so CPU-bound inference never
+blocks the event loop and concurrent callers share one sklearn/NumPy call.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+import logging
+
+from src.config_store import get_config_store
+
+logger = logging.getLogger(__name__)
+
+
+def load_executor_settings() -> Dict[str, Any]:
+    """
+    Micro-batching settings from configs/config.yaml (api.micro_batching).
+    """
+    settings = {"max_batch_size": 64, "max_wait_ms": 2.0, "workers": 2}
+    settings.update(
+        get_config_store().value("config", "api", "micro_batching", default=None) or {}
+    )
+    return settings
+
+
+class MicroBatchExecutor:
+    """
+    Collects submitted items into batches and scores them off the event loop.
+
+    A batch is dispatched as soon as it holds max_batch_size items, or
+    max_wait_ms after its first item arrived. Up to `workers` batches run
+    concurrently; while they are busy new requests queue up and form the
+    next batch, so batching grows with load instead of adding fixed delay.
+    """
+
+    def __init__(self,
+                 score_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0,
+                 workers: int = 2):
+        """
+        Initialize executor.
+
+        Args:
+            score_fn: Scores a list of items, returns one result per item
+            max_batch_size: Most items merged into one call (1 disables merging)
+            max_wait_ms: Longest a batch waits for more items
+            workers: Worker threads (= batches scored concurrently)
+        """
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.workers = max(1, int(workers))
+
+        self.batches_processed = 0
+        self.items_processed = 0
+
+        self._pool = None
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._collector is not None and self._loop is loop and not self._collector.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="scoring"
+            )
+        self._collector = loop.create_task(self._collect())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                getter = loop.create_task(self._queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=remaining)
+                if getter not in done:
+                    getter.cancel()
+                    await asyncio.wait({getter})
+                if not getter.cancelled():
+                    batch.append(getter.result())
+                else:
+                    break
+
+            await self._slots.acquire()
+            task = loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch) -> None:
+        try:
+            items = [item for item, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._pool, self.score_fn, items
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(f"score_fn returned {len(results)} results for {len(batch)} items")
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.batches_processed += 1
+            self.items_processed += len(batch)
+        except Exception as e:
+            logger.error(f"Scoring batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled mid-run: nobody else will answer these callers
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Scoring executor stopped"))
+            self._slots.release()
+
+    async def stop(self) -> None:
+        """Stop collecting, finish running batches and fail anything still queued."""
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.wait({self._collector})
+            self._collector = None
+        if self._tasks:
+            await asyncio.wait(set(self._tasks))
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Scoring executor stopped"))
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -4,31 +4,25 @@ from pathlib import Path
 
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
-import pandas as pd
-import joblib
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from src.feature_engineering import load_logs, build_features
+import numpy as np
+
+from src.feature_cache import get_feature_cache
+from src.feature_engineering import add_time_features, concat_chunks, iter_raw_logs
+from models.registry import get_registry
 from models.risk_scorer import compute_risk_score
 from src.response_engine import load_risk_threshold, simulate_auto_defense
+from src.tracing import span, traced
 
 
-@st.cache_resource
 def load_models():
-    anomaly_path = ROOT / "models" / "saved" / "anomaly_model.pkl"
-    intent_path = ROOT / "models" / "saved" / "intent_model.pkl"
-
-    if not anomaly_path.exists() or not intent_path.exists():
-        raise FileNotFoundError(
-            "Trained models not found. Run 'python scripts/train_models.py' first."
-        )
-
-    anomaly_model = joblib.load(anomaly_path)
-    intent_model = joblib.load(intent_path)
-    return anomaly_model, intent_model
+    # The registry keeps the loaded version in memory and picks up retrains
+    bundle = get_registry().current()
+    return bundle.anomaly_model, bundle.intent_model, bundle.pipeline, bundle.calibrator
 
 
 @st.cache_data(ttl=5)
@@ -40,30 +34,73 @@ def load_data_with_scores(data_path_str: str):
       - risk_score
       - ground_truth
 
-    ttl=5 means cache is refreshed at most every 5 seconds.
+    ttl=5 means cache is refreshed at most every 5 seconds. The encoded
+    matrix is reused from the on-disk feature cache while the file and
+    pipeline are unchanged. Stage timings are written to the trace file when api.tracing samples this load.
     """
     data_path = Path(data_path_str)
     if not data_path.exists():
         raise FileNotFoundError(f"{data_path} not found")
 
-    raw = pd.read_csv(data_path)
-
-    processed = load_logs(str(data_path))
-    X, y = build_features(processed)
-
-    if "timestamp" in raw.columns:
-        raw["timestamp"] = pd.to_datetime(raw["timestamp"], errors="coerce")
-
-    anomaly_model, intent_model = load_models()
-
-    anomaly_scores = anomaly_model.anomaly_score(X)
-    intent_probs = intent_model.predict_proba(X)
-    risk_scores = compute_risk_score(anomaly_scores, intent_probs)
-
-    raw["ground_truth"] = y
-    raw["anomaly_score"] = anomaly_scores
-    raw["intent_probability"] = intent_probs
-    raw["risk_score"] = risk_scores
+    with traced("dashboard.load_data_with_scores") as trace:
+        with span("load_models"):
+            anomaly_model, intent_model, pipeline, calibrator = load_models()
+
+        # Encoded matrix from an earlier load of the same file and pipeline,
+        # memory-mapped; None on a miss
+        cache = get_feature_cache()
+        entry = cached = None
+        if cache is not None:
+            with span("feature_cache"):
+                entry = cache.entry(data_path, pipeline=pipeline)
+                cached = cache.load(entry)
+
+        # One pass over the file in chunks: each chunk is encoded and
+        # scored while it is in memory, nothing is read twice
+        scored = []
+        encoded, labels = [], []
+        offset = 0
+        for raw in iter_raw_logs(str(data_path)):
+            rows = slice(offset, offset + len(raw))
+            offset += len(raw)
+            if cached is not None and rows.stop <= len(cached):
+                X = cached.X[rows]
+                ground_truth = cached.y[rows]
+            else:
+                with span("load_logs"):
+                    processed = add_time_features(raw.copy())
+
+                # Same fitted encoding as training, so live rows map to the same columns
+                with span("encode"):
+                    X = pipeline.transform(processed)
+                ground_truth = processed["risk_label"].values
+                encoded.append(X)
+                labels.append(ground_truth)
+
+            with span("anomaly_score"):
+                anomaly_scores = anomaly_model.anomaly_score(X)
+            with span("predict_proba"):
+                intent_probs = intent_model.predict_proba(X)
+            with span("compute_risk_score"):
+                risk_scores = compute_risk_score(
+                    anomaly_scores, intent_probs, calibrator=calibrator
+                )
+
+            raw["ground_truth"] = np.asarray(ground_truth)
+            raw["anomaly_score"] = anomaly_scores
+            raw["intent_probability"] = intent_probs
+            raw["risk_score"] = risk_scores
+            scored.append(raw)
+
+        if cache is not None and cached is None and encoded:
+            with span("feature_cache_store"):
+                cache.store(entry, np.concatenate(encoded), np.concatenate(labels))
+
+        with span("concat"):
+            raw = concat_chunks(scored)
+
+        if trace is not None:
+            trace.attributes["rows"] = len(raw)
 
     return raw
 
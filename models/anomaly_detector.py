@@ -1,25 +1,55 @@
+from typing import Optional
+
 from sklearn.ensemble import IsolationForest
 import numpy as np
 
+from models.compiled_forest import ENGINES, CompiledIsolationForest
+
 
 class AnomalyDetector:
     """
     Unsupervised anomaly detector using IsolationForest.
     Trained only on normal (non-attack) traffic.
+
+    engine="compiled" scores through a flat-array copy of the forest
+    (models/compiled_forest.py) instead of sklearn; results are the same.
     """
 
     def __init__(self,
                  n_estimators: int = 200,
                  contamination: float = 0.05,
-                 random_state: int = 42):
+                 random_state: int = 42,
+                 engine: str = "sklearn",
+                 max_samples="auto",
+                 n_jobs: Optional[int] = None):
         self.model = IsolationForest(
             n_estimators=n_estimators,
             contamination=contamination,
+            max_samples=max_samples,
             random_state=random_state,
+            n_jobs=n_jobs,
         )
+        self.engine = engine
+        self.compiled_ = None
 
     def fit(self, X):
         self.model.fit(X)
+        self.compiled_ = None
+        if self.engine == "compiled":
+            self.compile()
+        return self
+
+    def compile(self):
+        """Export the fitted forest into contiguous arrays."""
+        self.compiled_ = CompiledIsolationForest.from_sklearn(self.model)
+        return self
+
+    def set_engine(self, engine: str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {ENGINES}")
+        if engine == "compiled" and getattr(self, "compiled_", None) is None:
+            self.compile()
+        self.engine = engine
         return self
 
     def anomaly_score(self, X):
@@ -28,7 +58,10 @@ class AnomalyDetector:
         IsolationForest.decision_function: higher = more NORMAL.
         We invert it so higher means more abnormal.
         """
-        raw = self.model.decision_function(X)
+        if getattr(self, "engine", "sklearn") == "compiled":
+            raw = self.compiled_.decision_function(X)
+        else:
+            raw = self.model.decision_function(X)
         return -raw
 
     def predict(self, X, threshold: float = None):
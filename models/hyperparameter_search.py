@@ -0,0 +1,325 @@
+"""
+Hyperparameter search for the anomaly detector and intent predictor.
+
+The search space lives in configs/model_config.yaml (search section):
+each parameter is a list of values or a range
+({low, high, num[, log]}). Candidates are evaluated in a process pool
+against feature matrices written once to .npy files, which every
+worker memory-maps read-only instead of receiving a pickled copy.
+
+Early stopping is successive halving: every candidate is first fitted
+on a small random share of the training rows, only the best 1/eta move
+on to a share eta times larger, and so on until the survivors see all
+rows. Clearly worse candidates therefore cost a fraction of a full fit.
+A time budget stops the search after the current round.
+
+Candidates are scored by ROC AUC on a held-out validation split: intent
+probabilities for the intent predictor, anomaly scores for the anomaly
+detector (fitted on normal rows only, as in training).
+"""
+
+import itertools
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+import yaml
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from models.anomaly_detector import AnomalyDetector
+from models.intent_predictor import IntentPredictor, load_intent_backend
+from src.config_store import OVERLAY_FILES, get_config_store, merge_config, write_config
+
+# Config section -> constructor arguments read from it
+MODEL_PARAMS = {
+    "anomaly_detector": ("n_estimators", "contamination", "max_samples", "random_state"),
+    "intent_predictor": ("n_estimators", "max_depth", "min_samples_leaf", "learning_rate",
+                         "subsample", "random_state"),
+    "half_space_trees": ("n_trees", "max_depth", "window_size", "size_limit", "random_state"),
+}
+
+
+def load_model_params(name: str) -> Dict:
+    """
+    Constructor arguments for `name` from configs/model_config.yaml, plus
+    the intent backend from configs/config.yaml.
+    """
+    section = get_config_store().value("model", name, default=None) or {}
+    params = {k: v for k, v in section.items() if k in MODEL_PARAMS[name]}
+    if name == "intent_predictor":
+        params["backend"] = load_intent_backend()
+    return params
+
+
+def load_search_settings() -> Dict:
+    """Search settings from configs/model_config.yaml (search)."""
+    settings = {
+        "n_jobs": -1,
+        "max_candidates": 30,
+        "eta": 3,
+        "min_rows": 2000,
+        "validation_size": 0.2,
+        "max_seconds": None,
+        "random_state": 42,
+        "spaces": {},
+    }
+    settings.update(get_config_store().value("model", "search", default=None) or {})
+    return settings
+
+
+def expand_values(spec) -> List:
+    """
+    Values of one parameter: a list is used as is, a range
+    {low, high, num, log} becomes num evenly (or log-) spaced values,
+    integers when low and high are integers.
+    """
+    if isinstance(spec, dict):
+        low, high = spec["low"], spec["high"]
+        num = int(spec.get("num", 3))
+        space = np.geomspace if spec.get("log") else np.linspace
+        values = space(low, high, num)
+        if isinstance(low, int) and isinstance(high, int):
+            return sorted({int(round(v)) for v in values})
+        return [float(v) for v in values]
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def candidate_grid(space: Dict, base: Optional[Dict] = None, max_candidates: Optional[int] = None,
+                   random_state: int = 42) -> List[Dict]:
+    """
+    Every combination of the space's values, on top of `base`. Grids
+    larger than max_candidates are sampled at random.
+    """
+    base = dict(base or {})
+    names = sorted(space)
+    grid = [
+        {**base, **dict(zip(names, values))}
+        for values in itertools.product(*(expand_values(space[n]) for n in names))
+    ]
+    if max_candidates and len(grid) > max_candidates:
+        rng = np.random.default_rng(random_state)
+        keep = sorted(rng.choice(len(grid), size=max_candidates, replace=False))
+        grid = [grid[i] for i in keep]
+    return grid
+
+
+def successive_halving(candidates: List[Dict], evaluate: Callable, n_rows: int,
+                       min_rows: int = 2000, eta: int = 3,
+                       max_seconds: Optional[float] = None) -> List[Dict]:
+    """
+    Early-stopping search over `candidates`.
+
+    evaluate(candidates, rows) returns one score per candidate when
+    fitted on the first `rows` training rows. Returns one trial dict
+    (params, rows, round, score, fit_seconds) per evaluation; the best
+    candidate is the top-scoring trial of the last round.
+    """
+    eta = max(2, int(eta))
+    rounds = 0
+    if len(candidates) > 1 and n_rows > min_rows:
+        rounds = min(
+            math.ceil(math.log(len(candidates), eta)),
+            int(math.log(n_rows / min_rows, eta)),
+        )
+
+    trials: List[Dict] = []
+    alive = list(candidates)
+    started = time.perf_counter()
+    for round_ in range(rounds + 1):
+        rows = n_rows if round_ == rounds else int(n_rows / eta ** (rounds - round_))
+        results = evaluate(alive, rows)
+        scored = []
+        for params, result in zip(alive, results):
+            trial = {"params": params, "rows": rows, "round": round_, **result}
+            trials.append(trial)
+            scored.append(trial)
+        if round_ == rounds:
+            break
+        if max_seconds is not None and time.perf_counter() - started > max_seconds:
+            break
+        scored.sort(key=lambda t: t["score"], reverse=True)
+        alive = [t["params"] for t in scored[:max(1, math.ceil(len(alive) / eta))]]
+    return trials
+
+
+def best_trial(trials: List[Dict]) -> Dict:
+    """Top-scoring trial of the last round evaluated."""
+    last = max(t["round"] for t in trials)
+    return max((t for t in trials if t["round"] == last), key=lambda t: t["score"])
+
+
+def _save_matrix(path: Path, X) -> str:
+    if X.ndim == 1:
+        np.save(path.with_suffix(".npy"), np.asarray(X, dtype=np.int8))
+        return str(path.with_suffix(".npy"))
+    if sp.issparse(X):
+        sp.save_npz(path.with_suffix(".npz"), sp.csr_matrix(X))
+        return str(path.with_suffix(".npz"))
+    np.save(path.with_suffix(".npy"), np.ascontiguousarray(X, dtype=np.float32))
+    return str(path.with_suffix(".npy"))
+
+
+def _load_matrix(path: str):
+    if path.endswith(".npz"):
+        return sp.load_npz(path)
+    return np.load(path, mmap_mode="r")
+
+
+# Per-process view of the shared matrices (set by _init_worker)
+_data: Dict = {}
+
+
+def _init_worker(paths: Dict[str, str]) -> None:
+    _data.clear()
+    _data.update({name: _load_matrix(path) for name, path in paths.items()})
+
+
+def _evaluate(task) -> Dict:
+    """Fit one candidate on the first `rows` training rows and score it."""
+    model, params, rows = task
+    X, y = _data["X_train"][:rows], np.asarray(_data["y_train"][:rows])
+    X_val, y_val = _data["X_val"], np.asarray(_data["y_val"])
+
+    started = time.perf_counter()
+    if model == "anomaly_detector":
+        detector = AnomalyDetector(**params, n_jobs=1)
+        detector.fit(X[np.flatnonzero(y == 0)])
+        fit_seconds = time.perf_counter() - started
+        scores = detector.anomaly_score(X_val)
+    else:
+        predictor = IntentPredictor(**params, n_jobs=1)
+        predictor.fit(X, y)
+        fit_seconds = time.perf_counter() - started
+        scores = predictor.predict_proba(X_val)
+    try:
+        score = float(roc_auc_score(y_val, scores))
+    except ValueError:
+        score = float("-inf")
+    return {"score": score, "fit_seconds": round(fit_seconds, 4)}
+
+
+def search_hyperparameters(X, y, models=("anomaly_detector", "intent_predictor"),
+                           settings: Optional[Dict] = None, log: Callable = print) -> Dict:
+    """
+    Search each model's space from the search settings.
+
+    Args:
+        X: Training feature matrix (dense or scipy.sparse)
+        y: Training labels
+        models: Which model sections to search
+        settings: Search settings (default: load_search_settings())
+        log: Progress output
+
+    Returns:
+        {model: {"params", "score", "candidates", "trials", "seconds"}}
+        for every model with a non-empty space
+    """
+    settings = {**load_search_settings(), **(settings or {})}
+    seed = int(settings["random_state"])
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=settings["validation_size"], stratify=y, random_state=seed
+    )
+    # Shuffled once, so the first n rows are a random subset for every round
+    order = np.random.default_rng(seed).permutation(len(y_train))
+    X_train, y_train = X_train[order], np.asarray(y_train)[order]
+
+    n_jobs = int(settings["n_jobs"])
+    if n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    workdir = Path(tempfile.mkdtemp(prefix="cyberintent-search-"))
+    results = {}
+    try:
+        paths = {
+            "X_train": _save_matrix(workdir / "X_train", X_train),
+            "y_train": _save_matrix(workdir / "y_train", y_train),
+            "X_val": _save_matrix(workdir / "X_val", X_val),
+            "y_val": _save_matrix(workdir / "y_val", y_val),
+        }
+        del X_train, X_val
+        if n_jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(paths,))
+            run = pool.map
+        else:
+            pool = None
+            _init_worker(paths)
+            run = map
+        try:
+            for model in models:
+                space = (settings.get("spaces") or {}).get(model) or {}
+                if not space:
+                    continue
+                candidates = candidate_grid(
+                    space, base=load_model_params(model),
+                    max_candidates=settings["max_candidates"], random_state=seed,
+                )
+                log(f"Searching {model}: {len(candidates)} candidates on {n_jobs} worker(s)")
+                started = time.perf_counter()
+
+                def evaluate(alive, rows, model=model):
+                    log(f"  {len(alive)} candidate(s) on {rows} rows")
+                    return list(run(_evaluate, [(model, params, rows) for params in alive]))
+
+                trials = successive_halving(
+                    candidates, evaluate, n_rows=len(y_train),
+                    min_rows=int(settings["min_rows"]), eta=int(settings["eta"]),
+                    max_seconds=settings["max_seconds"],
+                )
+                best = best_trial(trials)
+                results[model] = {
+                    "params": best["params"],
+                    "score": best["score"],
+                    "candidates": len(candidates),
+                    "trials": trials,
+                    "seconds": round(time.perf_counter() - started, 2),
+                }
+                log(f"  best ROC AUC {best['score']:.4f} with {best['params']}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            _data.clear()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def update_model_config(updates: Dict, path: Optional[Path] = None) -> Path:
+    """
+    Merge `updates` (one level deep) into configs/model_config.tuned.yaml,
+    keeping every other key. The config store layers that file over
+    model_config.yaml, so the hand-edited file and its comments are never
+    rewritten. The write is atomic.
+    """
+    path = Path(path) if path else get_config_store().config_dir / OVERLAY_FILES["model"]
+    config = {}
+    if path.exists():
+        config = yaml.safe_load(path.read_text()) or {}
+    return write_config(path, merge_config(config, updates))
+
+
+def save_search_results(results: Dict, path: Optional[Path] = None) -> Path:
+    """Write the best parameters and their metrics to model_config.tuned.yaml."""
+    searched_at = datetime.now().isoformat(timespec="seconds")
+    updates = {name: result["params"] for name, result in results.items()}
+    updates["search_results"] = {
+        name: {
+            "roc_auc": round(result["score"], 6),
+            "candidates": result["candidates"],
+            "evaluations": len(result["trials"]),
+            "seconds": result["seconds"],
+            "searched_at": searched_at,
+        }
+        for name, result in results.items()
+    }
+    return update_model_config(updates, path)
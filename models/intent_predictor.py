@@ -1,30 +1,183 @@
-from sklearn.ensemble import RandomForestClassifier
+import logging
+from typing import Optional
+
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 import numpy as np
 
+try:
+    import lightgbm
+except ImportError:  # optional backend
+    lightgbm = None
+
+try:
+    import xgboost
+except ImportError:  # optional backend
+    xgboost = None
+
+from models.compiled_forest import ENGINES, CompiledGradientBoosting, CompiledRandomForest
+from src.config_store import get_config_store
+
+logger = logging.getLogger(__name__)
+
+# random_forest           sklearn RandomForestClassifier (compiled engine available)
+# hist_gradient_boosting  sklearn HistGradientBoostingClassifier (compiled engine available)
+# lightgbm                lightgbm.LGBMClassifier
+# xgboost                 xgboost.XGBClassifier (hist tree method)
+BACKENDS = ("random_forest", "hist_gradient_boosting", "lightgbm", "xgboost")
+BACKEND_ALIASES = {"gradient_boosting": "hist_gradient_boosting", "rf": "random_forest"}
+
+
+def load_intent_backend(default: str = "random_forest") -> str:
+    """
+    Intent predictor backend from configs/config.yaml
+    (model.intent_predictor.algorithm).
+    """
+    name = get_config_store().value("config", "model", "intent_predictor", "algorithm", default=default)
+    return BACKEND_ALIASES.get(str(name), str(name))
+
+
+def available_backends():
+    """Backends whose libraries are installed."""
+    missing = {"lightgbm": lightgbm is None, "xgboost": xgboost is None}
+    return [b for b in BACKENDS if not missing.get(b)]
+
 
 class IntentPredictor:
     """
     Supervised classifier predicting malicious intent (0/1).
+
+    backend picks the estimator (see BACKENDS); all of them are fitted
+    with balanced class weights and expose the same fit / predict_proba /
+    predict API. n_estimators is the number of trees or boosting
+    iterations; learning_rate only applies to boosting, subsample only
+    to lightgbm and xgboost (HistGradientBoosting has no row
+    subsampling). min_samples_leaf=None keeps each backend's own
+    default (1 for random_forest, 20 for the boosting backends).
+
+    engine="compiled" scores the sklearn backends through a flat-array
+    copy (models/compiled_forest.py); results are the same. LightGBM and
+    XGBoost always use their own predict_proba.
     """
 
     def __init__(self,
                  n_estimators: int = 200,
-                 random_state: int = 42):
-        self.model = RandomForestClassifier(
-            n_estimators=n_estimators,
-            random_state=random_state,
-            n_jobs=-1,
-            class_weight="balanced",
+                 random_state: int = 42,
+                 engine: str = "sklearn",
+                 max_depth: Optional[int] = None,
+                 min_samples_leaf: Optional[int] = None,
+                 n_jobs: int = -1,
+                 backend: str = "random_forest",
+                 learning_rate: float = 0.1,
+                 subsample: float = 1.0):
+        backend = BACKEND_ALIASES.get(backend, backend)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown intent backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.model = _build_model(
+            backend, n_estimators=n_estimators, random_state=random_state, max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf, n_jobs=n_jobs, learning_rate=learning_rate,
+            subsample=subsample,
         )
+        self.engine = engine
+        self.compiled_ = None
 
     def fit(self, X, y):
+        if self.backend == "xgboost":
+            # XGBoost has no class_weight; weight positives by the class ratio
+            y = np.asarray(y)
+            positives = max(int((y == 1).sum()), 1)
+            self.model.set_params(scale_pos_weight=(len(y) - positives) / positives)
         self.model.fit(X, y)
+        self.compiled_ = None
+        if self.engine == "compiled":
+            self.compile()
+        return self
+
+    @property
+    def compilable(self) -> bool:
+        return getattr(self, "backend", "random_forest") in ("random_forest", "hist_gradient_boosting")
+
+    def compile(self):
+        """Export the fitted trees into contiguous arrays (sklearn backends only)."""
+        backend = getattr(self, "backend", "random_forest")
+        if backend == "random_forest":
+            self.compiled_ = CompiledRandomForest.from_sklearn(self.model, class_index=1)
+        elif backend == "hist_gradient_boosting":
+            self.compiled_ = CompiledGradientBoosting.from_sklearn(self.model)
+        return self
+
+    def set_engine(self, engine: str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {ENGINES}")
+        if engine == "compiled" and not self.compilable:
+            logger.info(f"No compiled engine for the {self.backend} backend; using its own predict_proba")
+            engine = "sklearn"
+        if engine == "compiled" and getattr(self, "compiled_", None) is None:
+            self.compile()
+        self.engine = engine
         return self
 
     def predict_proba(self, X):
         """Return probability of class 1 (attack)."""
+        if getattr(self, "engine", "sklearn") == "compiled":
+            return self.compiled_.predict_proba(X)
         return self.model.predict_proba(X)[:, 1]
 
     def predict(self, X, threshold: float = 0.5):
         proba = self.predict_proba(X)
         return (proba >= threshold).astype(int)
+
+
+def _build_model(backend: str, n_estimators, random_state, max_depth, min_samples_leaf, n_jobs,
+                 learning_rate, subsample):
+    # None leaves the backend's own minimum leaf size in place
+    leaf = {} if min_samples_leaf is None else {"min_samples_leaf": min_samples_leaf}
+    if backend == "random_forest":
+        return RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            random_state=random_state,
+            n_jobs=n_jobs,
+            class_weight="balanced",
+            **leaf,
+        )
+    if backend == "hist_gradient_boosting":
+        if subsample < 1:
+            logger.warning(f"subsample={subsample} is ignored by the hist_gradient_boosting backend")
+        return HistGradientBoostingClassifier(
+            max_iter=n_estimators,
+            learning_rate=learning_rate,
+            max_depth=max_depth,
+            random_state=random_state,
+            class_weight="balanced",
+            **leaf,
+        )
+    if backend == "lightgbm":
+        if lightgbm is None:
+            raise ImportError("The lightgbm intent backend needs the lightgbm package (pip install lightgbm)")
+        return lightgbm.LGBMClassifier(
+            n_estimators=n_estimators,
+            learning_rate=learning_rate,
+            max_depth=-1 if max_depth is None else max_depth,
+            subsample=subsample,
+            subsample_freq=1 if subsample < 1 else 0,
+            random_state=random_state,
+            n_jobs=n_jobs,
+            class_weight="balanced",
+            verbose=-1,
+            **({} if min_samples_leaf is None else {"min_child_samples": min_samples_leaf}),
+        )
+    if xgboost is None:
+        raise ImportError("The xgboost intent backend needs the xgboost package (pip install xgboost)")
+    # max_depth=0 only means "no limit" when trees grow leaf-wise
+    depth = {"max_depth": 0, "grow_policy": "lossguide"} if max_depth is None else {"max_depth": max_depth}
+    return xgboost.XGBClassifier(
+        n_estimators=n_estimators,
+        learning_rate=learning_rate,
+        subsample=subsample,
+        tree_method="hist",
+        random_state=random_state,
+        n_jobs=n_jobs,
+        eval_metric="logloss",
+        **depth,
+    )
@@ -1,51 +1,207 @@
 import os
-from pathlib import Path
+import pickle
+import time
+from typing import Dict
 
-import joblib
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     classification_report,
     roc_auc_score,
     confusion_matrix,
-    f1_score,
 )
-import yaml
 
-from src.feature_engineering import load_logs, build_features
+from src.config_store import get_config_store
+from src.feature_cache import get_feature_cache
+from src.feature_engineering import iter_logs, load_log_column
+from src.feature_pipeline import FeaturePipeline, load_encoding_settings
+from src.response_engine import SEGMENT_COLUMNS, segment_labels
 from models.anomaly_detector import AnomalyDetector
-from models.intent_predictor import IntentPredictor
-from models.risk_scorer import compute_risk_score
+from models.compiled_forest import load_inference_engine
+from models.hyperparameter_search import (
+    load_model_params,
+    save_search_results,
+    search_hyperparameters,
+    update_model_config,
+)
+from models.intent_predictor import IntentPredictor, available_backends
+from models.streaming_anomaly import HalfSpaceTrees, load_anomaly_algorithm
+from models.threshold_optimizer import load_threshold_settings, optimize_thresholds, threshold_config
+from models.risk_scorer import ScoreCalibrator, compute_risk_score
+from models.registry import save_model_version
+
+
+def load_training_features(data_path: str, use_cache: bool = True):
+    """
+    Fitted pipeline, feature matrix and labels for a training log.
+
+    Encodings come from feature_engineering.encoding in
+    configs/config.yaml; with sparse: true X is a scipy.sparse matrix.
+    Reuses the on-disk feature cache (src/feature_cache.py) when the log
+    and pipeline settings are unchanged; the matrix is then memory-mapped
+    instead of re-encoded. Sparse matrices are not cached.
+
+    The log is streamed twice, one chunk at a time (iter_logs): once to
+    fit the pipeline and collect labels, once to encode into the
+    preallocated matrix. The whole log is never held as a DataFrame.
+
+    Returns:
+        (pipeline, X, y)
+    """
+    settings = load_encoding_settings()
+    sparse = bool(settings.get("sparse"))
+    pipeline = FeaturePipeline.from_config()
+
+    cache = get_feature_cache() if use_cache and not sparse else None
+    entry = cache.entry(data_path, pipeline=pipeline) if cache is not None else None
+    cached = cache.load(entry) if cache is not None else None
+    if cached is not None and cached.pipeline is not None and cached.y is not None:
+        print(f"Loaded cached features ({entry.key})")
+        return cached.pipeline, cached.X, cached.y
+
+    labels = []
+
+    def labelled_chunks():
+        for chunk in iter_logs(data_path):
+            labels.append(chunk["risk_label"].to_numpy())
+            yield chunk
+
+    # Fit the feature pipeline once; inference reuses it so columns match
+    pipeline.fit_chunks(labelled_chunks())
+    y = np.concatenate(labels)
+    X = pipeline.transform_chunks(iter_logs(data_path), n_rows=len(y), sparse=sparse)
+    if cache is not None:
+        cache.store(entry, X, y, pipeline=pipeline)
+    return pipeline, X, y
+
+
+def profile_intent_model(model: IntentPredictor, X_train, y_train, X_test, y_test,
+                         latency_rows: int = 200) -> Dict:
+    """
+    Fit `model` and measure it: fit time, single-row scoring latency
+    (p50/p99, with the configured inference engine), batch throughput,
+    pickled size and test ROC AUC.
+    """
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    model.set_engine(load_inference_engine(default="sklearn"))
+
+    latencies = []
+    for n in range(min(latency_rows, X_test.shape[0])):
+        row = X_test[n:n + 1]
+        t0 = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - t0)
+    latencies = np.array(latencies) * 1000
+
+    started = time.perf_counter()
+    probs = model.predict_proba(X_test)
+    batch_seconds = time.perf_counter() - started
+    try:
+        auc = float(roc_auc_score(y_test, probs))
+    except ValueError:
+        auc = float("nan")
+    return {
+        "backend": model.backend,
+        "fit_seconds": fit_seconds,
+        "row_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+        "row_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else float("nan"),
+        "rows_per_second": X_test.shape[0] / batch_seconds if batch_seconds else float("inf"),
+        "model_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "roc_auc": auc,
+    }
+
+
+def print_backend_profiles(profiles) -> None:
+    header = (f"{'backend':<24} {'fit s':>8} {'row p50 ms':>11} {'row p99 ms':>11} "
+              f"{'rows/s':>11} {'size MB':>8} {'AUC':>7}")
+    print(header)
+    print("-" * len(header))
+    for p in profiles:
+        print(f"{p['backend']:<24} {p['fit_seconds']:>8.2f} {p['row_p50_ms']:>11.3f} {p['row_p99_ms']:>11.3f} "
+              f"{p['rows_per_second']:>11,.0f} {p['model_bytes'] / 1e6:>8.2f} {p['roc_auc']:>7.4f}")
 
 
 def train_models(
     data_path: str = "data/sample_logs.csv",
     models_dir: str = "models/saved",
+    use_feature_cache: bool = True,
+    search: bool = False,
+    compare_backends: bool = False,
 ):
+    """
+    Train, evaluate and publish a new model version.
+
+    Model hyperparameters come from configs/model_config.yaml. With
+    search=True they are first searched on the training split (search
+    section, see models/hyperparameter_search.py) and the best ones are
+    written to configs/model_config.tuned.yaml before the final fit.
+
+    model.anomaly_detector.algorithm in configs/config.yaml picks the
+    anomaly detector: isolation_forest, or half_space_trees for a detector
+    the prediction path can keep updating (models/streaming_anomaly.py).
+    The hyperparameter search only covers the isolation forest.
+
+    The intent backend comes from model.intent_predictor.algorithm in
+    configs/config.yaml; its fit time, per-row latency and size are
+    reported. compare_backends=True also fits and reports every other
+    installed backend on the same split (the configured one is saved).
+    """
     print("Loading data...")
-    df = load_logs(data_path)
-    X, y = build_features(df)
+    pipeline, X, y = load_training_features(data_path, use_cache=use_feature_cache)
 
     print(f"Data shape: X={X.shape}, y={y.shape}, positives={y.sum()}")
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, stratify=y, random_state=42
+    test_size = float(get_config_store().value("model", "training", "test_size", default=0.2))
+    X_train, X_test, y_train, y_test, _, test_rows = train_test_split(
+        X, y, np.arange(len(y)), test_size=test_size, stratify=y, random_state=42
     )
 
+    anomaly_params = load_model_params("anomaly_detector")
+    intent_params = load_model_params("intent_predictor")
+    if search:
+        print("\nSearching hyperparameters...")
+        results = search_hyperparameters(X_train, y_train)
+        if results:
+            print(f"Saved best parameters to: {save_search_results(results)}")
+        anomaly_params.update(results.get("anomaly_detector", {}).get("params", {}))
+        intent_params.update(results.get("intent_predictor", {}).get("params", {}))
+
     # 1) Anomaly detector on normal traffic only
-    print("\nTraining AnomalyDetector (IsolationForest) on normal traffic...")
     normal_mask = y_train == 0
     if normal_mask.sum() == 0:
         raise ValueError("No normal samples in training data to train anomaly detector.")
-    anomaly_detector = AnomalyDetector(contamination=0.05)
+    if load_anomaly_algorithm() == "half_space_trees":
+        print("\nTraining HalfSpaceTrees on normal traffic...")
+        anomaly_params = load_model_params("half_space_trees")
+        print(f"Parameters: {anomaly_params}")
+        anomaly_detector = HalfSpaceTrees(**anomaly_params)
+    else:
+        print("\nTraining AnomalyDetector (IsolationForest) on normal traffic...")
+        print(f"Parameters: {anomaly_params}")
+        anomaly_detector = AnomalyDetector(**anomaly_params)
     anomaly_detector.fit(X_train[normal_mask])
     print(f"Trained on {normal_mask.sum()} normal samples")
 
+    # Calibrate anomaly scores on the training distribution so risk scores
+    # don't depend on which events are scored together
+    calibrator = ScoreCalibrator().fit(anomaly_detector.anomaly_score(X_train))
+
     # 2) Intent predictor (supervised)
-    print("\nTraining IntentPredictor (RandomForestClassifier)...")
-    intent_model = IntentPredictor()
-    intent_model.fit(X_train, y_train)
+    print(f"\nTraining IntentPredictor ({intent_params['backend']})...")
+    print(f"Parameters: {intent_params}")
+    intent_model = IntentPredictor(**intent_params)
+    profiles = [profile_intent_model(intent_model, X_train, y_train, X_test, y_test)]
     print("Intent model trained")
+    if compare_backends:
+        for backend in available_backends():
+            if backend != intent_model.backend:
+                print(f"Training {backend} for comparison...")
+                candidate = IntentPredictor(**{**intent_params, "backend": backend})
+                profiles.append(profile_intent_model(candidate, X_train, y_train, X_test, y_test))
+    print()
+    print_backend_profiles(profiles)
 
     # 3) Evaluate
     print("\nEvaluating on test set...")
@@ -67,47 +223,51 @@ def train_models(
     # 4) Combined risk scores + threshold search
     print("\nComputing combined risk scores for test set...")
     anomaly_scores_test = anomaly_detector.anomaly_score(X_test)
-    risk_scores = compute_risk_score(anomaly_scores_test, intent_probs)
+    risk_scores = compute_risk_score(
+        anomaly_scores_test, intent_probs, calibrator=calibrator
+    )
     print(f"Risk score range: {risk_scores.min():.3f} - {risk_scores.max():.3f}")
 
-    print("\nSearching best risk threshold by F1 score...")
-    thresholds = np.linspace(0.1, 0.9, 17)
-    best_t = 0.5
-    best_f1 = 0.0
-
-    for t in thresholds:
-        preds = (risk_scores >= t).astype(int)
-        f1 = f1_score(y_test, preds)
-        print(f"  threshold={t:.2f} -> F1={f1:.4f}")
-        if f1 > best_f1:
-            best_f1 = f1
-            best_t = t
-
-    print(f"\nBest risk threshold: {best_t:.2f} (F1={best_f1:.4f})")
-
-    # 5) Save threshold config
-    cfg_dir = Path("configs")
-    cfg_dir.mkdir(exist_ok=True)
-    cfg_path = cfg_dir / "model_config.yaml"
-    config = {
-        "intent_threshold": 0.5,
-        "risk_threshold": float(best_t),
-        "f1_at_risk_threshold": float(best_f1),
-    }
-    with cfg_path.open("w") as f:
-        yaml.safe_dump(config, f)
+    # Every distinct cut point, per segment if configured (thresholds
+    # section, see models/threshold_optimizer.py)
+    settings = load_threshold_settings()
+    segments = None
+    if settings["segment_by"]:
+        column = SEGMENT_COLUMNS[settings["segment_by"]]
+        values = load_log_column(data_path, column)[test_rows]
+        segments = segment_labels(values, settings["segment_by"], settings["subnet_prefix"])
+    print(f"\nSearching best risk threshold by {settings['objective']} over every cut point...")
+    result = optimize_thresholds(
+        risk_scores, y_test, segments,
+        objective=settings["objective"],
+        fp_cost=settings["fp_cost"],
+        fn_cost=settings["fn_cost"],
+        min_support=settings["min_support"],
+    )
+    best = result["global"]
+    print(f"\nBest risk threshold: {best['threshold']:.4f} (F1={best['f1']:.4f}, "
+          f"precision={best['precision']:.4f}, recall={best['recall']:.4f}, cost={best['cost']:.1f})")
+    for label, m in result["segments"].items():
+        print(f"  {settings['segment_by']}={label}: threshold={m['threshold']:.4f} "
+              f"F1={m['f1']:.4f} cost={m['cost']:.1f} ({m['support']} events)")
+
+    # 5) Save threshold config (keeping the model sections)
+    cfg_path = update_model_config({"intent_threshold": 0.5, **threshold_config(result, settings)})
     print(f"Saved threshold config to: {cfg_path}")
 
-    # 6) Save models
+    # 6) Save models as a new published version
     os.makedirs(models_dir, exist_ok=True)
-    anomaly_path = os.path.join(models_dir, "anomaly_model.pkl")
-    intent_path = os.path.join(models_dir, "intent_model.pkl")
 
-    joblib.dump(anomaly_detector, anomaly_path)
-    joblib.dump(intent_model, intent_path)
+    # Ship the flat-array copies so either inference engine can be used
+    anomaly_detector.compile()
+    intent_model.compile()
+    version_dir = save_model_version(
+        anomaly_detector, intent_model, pipeline, calibrator, models_dir=models_dir
+    )
 
-    print(f"\nSaved anomaly model to: {anomaly_path}")
-    print(f"Saved intent model to:  {intent_path}")
+    print(f"\nSaved anomaly model, intent model, feature pipeline and risk "
+          f"calibrator to: {version_dir}")
+    print(f"Published as current version: {version_dir.name}")
     print("Training complete.")
 
 
@@ -0,0 +1,286 @@
+"""
+Versioned model storage and the in-process model registry.
+
+A trained version is written to models/saved/<version>/ and published by
+atomically replacing models/saved/CURRENT. The registry loads the
+published version, warms it up with one prediction and then swaps it in
+with a single reference assignment. Requests hold on to the bundle they
+started with, so a swap never disturbs in-flight scoring.
+
+Only plain NumPy arrays can be memory-mapped: sklearn copies its tree
+node arrays into private buffers when unpickling. So a model with a
+compiled copy is saved without its sklearn estimator, which goes to a
+separate <artifact>.sklearn.pkl. With inference_engine: compiled the
+registry never loads those files, and every API worker serves from the
+same page-cache copy of the compiled arrays. With the sklearn engine the
+estimators are loaded, privately, in each worker.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from src.metrics import ProcessStats
+from models.compiled_forest import load_inference_engine
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODELS_DIR = ROOT / "models" / "saved"
+CURRENT_FILE = "CURRENT"
+
+ARTIFACTS = {
+    "anomaly_model": "anomaly_model.pkl",
+    "intent_model": "intent_model.pkl",
+    "pipeline": "feature_pipeline.pkl",
+    "calibrator": "risk_calibrator.pkl",
+}
+# Sidecar holding the sklearn estimator of a model saved with a compiled copy
+ESTIMATOR_SUFFIX = ".sklearn.pkl"
+
+
+def _dump_model(model, path: Path) -> None:
+    """
+    Write a model, splitting off its sklearn estimator when a compiled
+    copy can score without it.
+    """
+    estimator = getattr(model, "model", None)
+    if estimator is None or getattr(model, "compiled_", None) is None:
+        joblib.dump(model, path)
+        return
+    model.model = None
+    try:
+        joblib.dump(model, path)
+    finally:
+        model.model = estimator
+    joblib.dump(estimator, path.with_suffix(ESTIMATOR_SUFFIX))
+
+
+def _attach_estimator(model, path: Path, engine: str) -> None:
+    """Load the split-off sklearn estimator, unless the compiled engine is enough."""
+    if getattr(model, "model", True) is not None:
+        return
+    if engine == "compiled":
+        return
+    model.model = joblib.load(path.with_suffix(ESTIMATOR_SUFFIX))
+
+
+class ModelBundle:
+    """One loaded model version and its load metadata."""
+
+    def __init__(self, anomaly_model, intent_model, pipeline, calibrator,
+                 version: str = "unversioned", path: Optional[Path] = None,
+                 loaded_at: Optional[datetime] = None, load_seconds: float = 0.0):
+        self.anomaly_model = anomaly_model
+        self.intent_model = intent_model
+        self.pipeline = pipeline
+        self.calibrator = calibrator
+        self.version = version
+        self.path = path
+        self.loaded_at = loaded_at or datetime.now()
+        self.load_seconds = load_seconds
+
+    def warm_up(self) -> None:
+        """Run one prediction so first-request costs are paid up front."""
+        X = self.pipeline.transform({})
+        self.anomaly_model.anomaly_score(X)
+        self.intent_model.predict_proba(X)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held in memory-mapped vs. private arrays."""
+        mapped = private = 0
+        for model in (self.anomaly_model, self.intent_model):
+            # Models without a compiled copy (half-space trees) hold their arrays directly
+            compiled = getattr(model, "compiled_", model)
+            if compiled is not None:
+                for arr in vars(compiled).values():
+                    if isinstance(arr, np.memmap):
+                        mapped += arr.nbytes
+                    elif isinstance(arr, np.ndarray):
+                        private += arr.nbytes
+            for est in getattr(getattr(model, "model", None), "estimators_", []):
+                state = est.tree_.__getstate__()
+                private += state["nodes"].nbytes + state["values"].nbytes
+        return {"mapped_array_bytes": mapped, "private_array_bytes": private}
+
+
+def save_model_version(anomaly_model, intent_model, pipeline, calibrator,
+                       models_dir=DEFAULT_MODELS_DIR, keep: int = 3) -> Path:
+    """
+    Write a new model version and publish it.
+
+    Artifacts go to <models_dir>/<version>/, then CURRENT is replaced
+    atomically, so readers never see a half-written version. Only the
+    newest `keep` versions are kept on disk.
+    """
+    models_dir = Path(models_dir)
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    version_dir = models_dir / version
+    version_dir.mkdir(parents=True, exist_ok=False)
+
+    objects = {
+        "anomaly_model": anomaly_model,
+        "intent_model": intent_model,
+        "pipeline": pipeline,
+        "calibrator": calibrator,
+    }
+    for key, filename in ARTIFACTS.items():
+        # Uncompressed so arrays can be memory-mapped at load time
+        if key in ("anomaly_model", "intent_model"):
+            _dump_model(objects[key], version_dir / filename)
+        else:
+            joblib.dump(objects[key], version_dir / filename)
+
+    tmp = models_dir / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, models_dir / CURRENT_FILE)
+
+    versions = sorted(p for p in models_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep > 0 else []:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    return version_dir
+
+
+class ModelRegistry:
+    """
+    Holds the current ModelBundle and replaces it when a new version is
+    published.
+
+    current() checks CURRENT at most once per check_interval seconds; a
+    changed version is loaded and warmed up in a background thread while
+    requests keep using the previous bundle.
+    """
+
+    def __init__(self, models_dir=DEFAULT_MODELS_DIR, mmap: bool = True,
+                 check_interval: float = 5.0):
+        """
+        Initialize registry.
+
+        Args:
+            models_dir: Directory holding CURRENT and version folders
+            mmap: Memory-map the compiled NumPy arrays instead of copying them
+            check_interval: Seconds between checks for a new version
+        """
+        self.models_dir = Path(models_dir)
+        self.mmap = mmap
+        self.check_interval = check_interval
+        self._bundle: Optional[ModelBundle] = None
+        self._last_check = float("-inf")
+        self._load_lock = threading.Lock()
+        self._reloading = False
+        self._listeners: List[Callable[[ModelBundle], None]] = []
+
+    def add_listener(self, callback: Callable[[ModelBundle], None]) -> None:
+        """Call `callback(new_bundle)` after every swap."""
+        self._listeners.append(callback)
+
+    def _published(self):
+        """(version, directory) of the published version."""
+        current = self.models_dir / CURRENT_FILE
+        if current.exists():
+            version = current.read_text().strip()
+            return version, self.models_dir / version
+        # Flat layout from older trainers
+        return "unversioned", self.models_dir
+
+    def load(self) -> ModelBundle:
+        """Load, warm up and swap in the published version."""
+        with self._load_lock:
+            version, path = self._published()
+            paths = {key: path / filename for key, filename in ARTIFACTS.items()}
+            if not all(p.exists() for p in paths.values()):
+                raise FileNotFoundError(
+                    "Models not found. Run 'python scripts/train_models.py' first."
+                )
+
+            start = time.perf_counter()
+            mmap_mode = "r" if self.mmap else None
+            objects = {key: joblib.load(p, mmap_mode=mmap_mode) for key, p in paths.items()}
+
+            engine = load_inference_engine(default="sklearn")
+            for key in ("anomaly_model", "intent_model"):
+                _attach_estimator(objects[key], paths[key], engine)
+                objects[key].set_engine(engine)
+
+            bundle = ModelBundle(
+                version=version, path=path, loaded_at=datetime.now(), **objects
+            )
+            bundle.warm_up()
+            bundle.load_seconds = time.perf_counter() - start
+
+            self.swap(bundle)
+            logger.info(f"Loaded model version {version} in {bundle.load_seconds:.2f}s")
+            return bundle
+
+    def swap(self, bundle: ModelBundle) -> None:
+        """Make `bundle` the current version."""
+        self._bundle = bundle
+        self._last_check = time.monotonic()
+        for callback in self._listeners:
+            try:
+                callback(bundle)
+            except Exception as e:
+                logger.error(f"Error in model swap listener: {e}")
+
+    def current(self) -> ModelBundle:
+        """The bundle to score with; loads synchronously only the first time."""
+        bundle = self._bundle
+        if bundle is None:
+            return self.load()
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._last_check = time.monotonic()
+            if self._published()[0] != bundle.version and bundle.path is not None:
+                self._reload_in_background()
+        return bundle
+
+    def _reload_in_background(self) -> None:
+        if self._reloading:
+            return
+        self._reloading = True
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Model reload failed, keeping current version: {e}")
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+
+    def info(self) -> Dict:
+        """Loaded version, load time and memory footprint."""
+        bundle = self._bundle
+        if bundle is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": bundle.version,
+            "path": str(bundle.path) if bundle.path else None,
+            "loaded_at": bundle.loaded_at.isoformat(),
+            "load_time_ms": round(bundle.load_seconds * 1000, 2),
+            "engine": getattr(bundle.anomaly_model, "engine", "sklearn"),
+            "n_features": bundle.pipeline.n_features,
+            "resident_bytes": ProcessStats.resident_bytes(),
+            **bundle.memory_usage(),
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """Process-wide model registry."""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -1,7 +1,46 @@
 import numpy as np
 
 
+class ScoreCalibrator:
+    """
+    Maps raw anomaly scores to [0, 1] with quantile breakpoints fitted at
+    training time (an empirical CDF).
+
+    Unlike normalize_scores, the result for a row does not depend on the
+    other rows it is scored with, so single events, micro-batches and
+    cached results all agree.
+    """
+
+    def __init__(self, n_quantiles: int = 101):
+        self.n_quantiles = n_quantiles
+        self.levels_ = np.linspace(0.0, 1.0, n_quantiles)
+        self.breakpoints_ = None
+
+    def fit(self, scores):
+        scores = np.asarray(scores, dtype=float)
+        if scores.size == 0:
+            raise ValueError("Cannot calibrate on an empty score array.")
+        self.breakpoints_ = np.quantile(scores, self.levels_)
+        return self
+
+    def transform(self, scores):
+        """Per-row lookup; scores outside the fitted range clip to 0 or 1."""
+        if self.breakpoints_ is None:
+            raise ValueError("ScoreCalibrator is not fitted.")
+        scores = np.asarray(scores, dtype=float)
+        lo, hi = self.breakpoints_[0], self.breakpoints_[-1]
+        if hi - lo < 1e-9:
+            return np.where(scores > hi, 1.0, 0.0)
+        return np.interp(scores, self.breakpoints_, self.levels_)
+
+
 def normalize_scores(scores):
+    """
+    Min-max scale scores within the given batch.
+
+    Kept for callers without a fitted ScoreCalibrator; results depend on
+    the batch composition.
+    """
     scores = np.asarray(scores, dtype=float)
     if scores.size == 0:
         return scores
@@ -14,11 +53,18 @@ def normalize_scores(scores):
 
 def compute_risk_score(anomaly_scores, intent_probs,
                        w_anomaly: float = 0.4,
-                       w_intent: float = 0.6):
+                       w_intent: float = 0.6,
+                       calibrator: ScoreCalibrator = None):
     """
     Combine anomaly score and intent probability into a 0–1 risk score.
+
+    With a fitted calibrator this is a pure per-row function; without one
+    anomaly scores fall back to batch min-max normalization.
     """
-    a = normalize_scores(anomaly_scores)
+    if calibrator is not None:
+        a = calibrator.transform(anomaly_scores)
+    else:
+        a = normalize_scores(anomaly_scores)
     i = np.clip(np.asarray(intent_probs, dtype=float), 0.0, 1.0)
     risk = w_anomaly * a + w_intent * i
     return np.clip(risk, 0.0, 1.0)
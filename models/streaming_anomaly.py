@@ -0,0 +1,304 @@
+"""
+Streaming anomaly detection with half-space trees.
+
+Half-space trees (Tan, Ting & Liu, 2011) are full binary trees of fixed
+depth whose split points are drawn at random inside the feature ranges
+seen at fit time, so the structure never changes. Each node holds two
+masses: `reference` (events that reached it during the last complete
+window) and `latest` (the window being filled). An event scores by the
+reference mass of the deepest node it reaches before the mass drops to
+size_limit, scaled by 2^depth: normal traffic lands in well populated
+regions, anomalies in sparse ones.
+
+Updating costs n_trees * max_depth per event and memory is fixed at
+2 * n_trees * 2^(max_depth + 1) masses, however long the stream runs.
+When the latest window fills it becomes the reference, so the model
+follows drift one window at a time. Scoring only reads the reference
+arrays, which are swapped with a single assignment, so updates never
+block scoring. OnlineUpdater applies updates on a background thread for
+the prediction path.
+
+Settings come from configs/config.yaml (model.anomaly_detector) and
+configs/model_config.yaml (half_space_trees).
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from models.compiled_forest import ENGINES
+from src.config_store import get_config_store
+
+logger = logging.getLogger(__name__)
+
+def load_anomaly_algorithm(default: str = "isolation_forest") -> str:
+    """
+    Anomaly detector algorithm ('isolation_forest' or 'half_space_trees')
+    from configs/config.yaml (model.anomaly_detector.algorithm).
+    """
+    return str(get_config_store().value("config", "model", "anomaly_detector", "algorithm", default=default))
+
+
+def load_online_settings() -> Dict:
+    """Online update settings from configs/config.yaml (model.anomaly_detector.online_updates)."""
+    settings = {"enabled": False, "max_pending": 64}
+    settings.update(
+        get_config_store().value("config", "model", "anomaly_detector", "online_updates", default=None) or {}
+    )
+    return settings
+
+
+def _dense(X) -> np.ndarray:
+    if hasattr(X, "toarray"):
+        X = X.toarray()
+    return np.asarray(X, dtype=np.float64)
+
+
+class HalfSpaceTrees:
+    """
+    Streaming anomaly detector with the AnomalyDetector interface
+    (fit / anomaly_score / predict) plus update() for live traffic.
+
+    fit() draws the tree structure from the training ranges and uses the
+    whole training set, scaled to one window, as the first reference
+    profile. Afterwards update() counts events into the latest window.
+    """
+
+    def __init__(self,
+                 n_trees: int = 25,
+                 max_depth: int = 10,
+                 window_size: int = 2048,
+                 size_limit: Optional[float] = None,
+                 random_state: int = 42):
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.window_size = window_size
+        self.size_limit = 0.1 * window_size if size_limit is None else size_limit
+        self.random_state = random_state
+        self.engine = "sklearn"
+        # Completed windows; changes whenever the reference profile does
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def n_nodes(self) -> int:
+        return 2 ** (self.max_depth + 1) - 1
+
+    def fit(self, X):
+        X = _dense(X)
+        rng = np.random.default_rng(self.random_state)
+        n_features = X.shape[1]
+        low, high = X.min(axis=0), X.max(axis=0)
+
+        # Work space per tree and feature: a random centre inside the
+        # training range, widened so it covers the range on both sides
+        centre = low + rng.random((self.n_trees, n_features)) * (high - low)
+        radius = 2 * np.maximum(centre - low, high - centre)
+        lo = (centre - radius)[:, None, :]
+        hi = (centre + radius)[:, None, :]
+
+        # Internal nodes in heap order (children of i are 2i+1 and 2i+2),
+        # built one level at a time by halving the range of a random feature
+        n_internal = 2 ** self.max_depth - 1
+        self.feature_ = np.empty((self.n_trees, n_internal), dtype=np.intp)
+        self.threshold_ = np.empty((self.n_trees, n_internal))
+        trees = np.arange(self.n_trees)[:, None]
+        for depth in range(self.max_depth):
+            width = 2 ** depth
+            nodes = slice(width - 1, 2 * width - 1)
+            feature = rng.integers(n_features, size=(self.n_trees, width))
+            level = np.arange(width)[None, :]
+            split = (lo[trees, level, feature] + hi[trees, level, feature]) / 2
+            self.feature_[:, nodes] = feature
+            self.threshold_[:, nodes] = split
+
+            left_hi, right_lo = hi.copy(), lo.copy()
+            left_hi[trees, level, feature] = split
+            right_lo[trees, level, feature] = split
+            lo = np.stack([lo, right_lo], axis=2).reshape(self.n_trees, 2 * width, n_features)
+            hi = np.stack([left_hi, hi], axis=2).reshape(self.n_trees, 2 * width, n_features)
+
+        counts = self._counts(self._paths(X))
+        self.reference_ = counts * (self.window_size / max(len(X), 1))
+        self.latest_ = np.zeros_like(self.reference_)
+        self.window_count_ = 0
+        self.generation = 0
+        return self
+
+    def _paths(self, X: np.ndarray) -> np.ndarray:
+        """Node index per (depth, row, tree) along each row's path."""
+        n = X.shape[0]
+        rows = np.arange(n)[:, None]
+        trees = np.arange(self.n_trees)[None, :]
+        node = np.zeros((n, self.n_trees), dtype=np.intp)
+        paths = np.empty((self.max_depth + 1, n, self.n_trees), dtype=np.intp)
+        paths[0] = node
+        for depth in range(self.max_depth):
+            feature = self.feature_[trees, node]
+            go_right = X[rows, feature] >= self.threshold_[trees, node]
+            node = 2 * node + 1 + go_right
+            paths[depth + 1] = node
+        return paths
+
+    def _counts(self, paths: np.ndarray) -> np.ndarray:
+        """Per-node visit counts for a block of paths, shape (n_trees, n_nodes)."""
+        flat = paths + (np.arange(self.n_trees) * self.n_nodes)[None, None, :]
+        counts = np.bincount(flat.ravel(), minlength=self.n_trees * self.n_nodes)
+        return counts.reshape(self.n_trees, self.n_nodes).astype(np.float64)
+
+    def update(self, X):
+        """
+        Count events into the latest window, promoting it to the
+        reference profile each time window_size events have been seen.
+        """
+        X = _dense(X)
+        with self._lock:
+            if not self.latest_.flags.writeable:
+                # Loaded memory-mapped (read only); updates need a private copy
+                self.latest_ = np.array(self.latest_)
+            start = 0
+            while start < len(X):
+                take = min(self.window_size - self.window_count_, len(X) - start)
+                self.latest_ += self._counts(self._paths(X[start:start + take]))
+                self.window_count_ += take
+                start += take
+                if self.window_count_ >= self.window_size:
+                    self.reference_ = self.latest_
+                    self.latest_ = np.zeros_like(self.reference_)
+                    self.window_count_ = 0
+                    self.generation += 1
+        return self
+
+    def compile(self):
+        """Already flat arrays; kept for the AnomalyDetector interface."""
+        return self
+
+    def set_engine(self, engine: str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+        return self
+
+    def anomaly_score(self, X):
+        """
+        Higher score = more anomalous: minus the mean over trees of
+        mass * 2^depth at the node where each event stops, relative to
+        window_size.
+        """
+        X = _dense(X)
+        reference = self.reference_  # one profile per call, even across a swap
+        paths = self._paths(X)
+        mass = reference[np.arange(self.n_trees)[None, None, :], paths]
+        stop = mass <= self.size_limit
+        stop[-1] = True
+        depth = stop.argmax(axis=0)
+        stopped = np.take_along_axis(mass, depth[None], axis=0)[0]
+        return -(stopped * 2.0 ** depth).mean(axis=1) / self.window_size
+
+    def predict(self, X, threshold: float = None):
+        """
+        Returns binary anomaly labels:
+        1 = anomaly, 0 = normal
+        """
+        scores = self.anomaly_score(X)
+        if threshold is None:
+            threshold = np.quantile(scores, 0.95)
+        return (scores >= threshold).astype(int)
+
+    def stats(self) -> Dict:
+        return {
+            "n_trees": self.n_trees,
+            "max_depth": self.max_depth,
+            "window_size": self.window_size,
+            "window_count": int(self.window_count_),
+            "windows_completed": self.generation,
+            "mass_bytes": int(self.reference_.nbytes + self.latest_.nbytes),
+        }
+
+
+class OnlineUpdater:
+    """
+    Applies model.update(X) on a background thread so scoring returns
+    without waiting for it. At most max_pending batches wait; further
+    batches are dropped (and counted) rather than queued without bound.
+    """
+
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.updated_rows = 0
+        self.dropped_batches = 0
+
+    def submit(self, model, X) -> bool:
+        """Queue an update; False if it was dropped."""
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped_batches += 1
+                return False
+            self._pending.append((model, X))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="anomaly-online-updates", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                model, X = self._pending.popleft()
+                self._busy = True
+            try:
+                model.update(X)
+                self.updated_rows += X.shape[0]
+            except Exception as e:
+                logger.error(f"Online anomaly update failed: {e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued update has been applied."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout=timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "updated_rows": self.updated_rows,
+            "dropped_batches": self.dropped_batches,
+        }
+
+
+_updater: Optional[OnlineUpdater] = None
+_updater_loaded = False
+
+
+def get_online_updater() -> Optional[OnlineUpdater]:
+    """
+    Process-wide updater configured by model.anomaly_detector.online_updates
+    in configs/config.yaml, or None when disabled.
+    """
+    global _updater, _updater_loaded
+    if not _updater_loaded:
+        settings = load_online_settings()
+        if settings.get("enabled"):
+            _updater = OnlineUpdater(max_pending=settings["max_pending"])
+        _updater_loaded = True
+    return _updater
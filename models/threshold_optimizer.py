@@ -0,0 +1,184 @@
+"""
+Exact risk-threshold optimization.
+
+Risk scores are sorted once, by segment and then by descending score.
+Cumulative sums of positives and negatives then give the confusion
+matrix for "alert when risk >= t" at every distinct score in every
+segment, so precision, recall, F1 and cost are known at every cut point
+for O(n log n) in total, with no per-threshold pass over the data.
+
+Segments give separate thresholds per action or per IPv4 subnet. Small
+segments, or segments without attacks, fall back to the global
+threshold. The objective is either F1 or a cost, fp_cost * FP +
+fn_cost * FN, which is minimized.
+
+Settings come from configs/model_config.yaml (thresholds); results are
+written to configs/model_config.tuned.yaml as risk_threshold and
+risk_thresholds.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.config_store import get_config_store
+from src.response_engine import segment_labels
+
+OBJECTIVES = ("f1", "cost")
+
+
+def load_threshold_settings() -> Dict:
+    """Threshold optimization settings from configs/model_config.yaml (thresholds)."""
+    settings = {
+        "objective": "f1",
+        "fp_cost": 1.0,
+        "fn_cost": 1.0,
+        "segment_by": None,
+        "subnet_prefix": 24,
+        "min_support": 50,
+    }
+    settings.update(get_config_store().value("model", "thresholds", default=None) or {})
+    return settings
+
+
+def _curve(scores, y, segments=None, fp_cost: float = 1.0, fn_cost: float = 1.0) -> Dict[str, np.ndarray]:
+    """Cut points as arrays, ordered by segment code and descending threshold."""
+    scores = np.asarray(scores, dtype=np.float64)
+    is_attack = np.asarray(y).astype(bool).astype(np.int64)
+    if not len(scores):
+        raise ValueError("No scores to choose a threshold from")
+    if segments is None:
+        names, codes = np.array(["all"], dtype=object), np.zeros(len(scores), dtype=np.intp)
+    else:
+        names, codes = np.unique(np.asarray(segments).astype(str), return_inverse=True)
+
+    order = np.lexsort((-scores, codes))
+    scores, is_attack, codes = scores[order], is_attack[order], codes[order]
+    tp = np.cumsum(is_attack)
+    fp = np.cumsum(1 - is_attack)
+
+    # Restart the running counts at each segment
+    new_segment = np.r_[True, codes[1:] != codes[:-1]]
+    starts = np.flatnonzero(new_segment)
+    sizes = np.diff(np.r_[starts, len(scores)])
+    tp = tp - np.repeat((tp - is_attack)[starts], sizes)
+    fp = fp - np.repeat((fp - 1 + is_attack)[starts], sizes)
+    positives = np.repeat(np.add.reduceat(is_attack, starts), sizes)
+    negatives = sizes.repeat(sizes) - positives
+
+    # One cut after the last row of every distinct (segment, score) group,
+    # halfway down to the next lower score
+    last = np.r_[new_segment[1:] | (scores[1:] != scores[:-1]), True]
+    next_lower = np.r_[scores[1:], -np.inf]
+    same_segment = np.r_[~new_segment[1:], False]
+    midpoint = (scores + next_lower) / 2
+    cut = np.where(same_segment & (midpoint > next_lower), midpoint, scores)
+
+    # Plus one "alert on nothing" cut in front of each segment
+    rows = np.sort(np.r_[starts, np.flatnonzero(last)], kind="stable")
+    nothing = np.r_[True, rows[1:] != rows[:-1]] & new_segment[rows]
+    curve = {
+        "segment": codes[rows],
+        "threshold": np.where(nothing, np.nextafter(scores[rows], np.inf), cut[rows]),
+        "tp": np.where(nothing, 0, tp[rows]),
+        "fp": np.where(nothing, 0, fp[rows]),
+        "positives": positives[rows],
+        "negatives": negatives[rows],
+    }
+    curve["fn"] = curve["positives"] - curve["tp"]
+    curve["tn"] = curve["negatives"] - curve["fp"]
+    alerts = curve["tp"] + curve["fp"]
+    zeros = np.zeros(len(rows))
+    curve["precision"] = np.divide(curve["tp"], alerts, out=zeros.copy(), where=alerts > 0)
+    curve["recall"] = np.divide(curve["tp"], curve["positives"], out=zeros.copy(), where=curve["positives"] > 0)
+    denom = 2 * curve["tp"] + curve["fp"] + curve["fn"]
+    curve["f1"] = np.divide(2 * curve["tp"], denom, out=zeros.copy(), where=denom > 0)
+    curve["cost"] = fp_cost * curve["fp"] + fn_cost * curve["fn"]
+    curve["names"] = names
+    return curve
+
+
+def threshold_curve(scores, y, segments=None, fp_cost: float = 1.0, fn_cost: float = 1.0) -> pd.DataFrame:
+    """
+    Confusion counts and metrics at every cut point.
+
+    Each row is "alert when score >= threshold" within one segment
+    (segments=None: a single segment named 'all'). Thresholds sit halfway
+    between consecutive distinct scores; each segment's first row has a
+    threshold above its highest score, where nothing alerts.
+
+    Returns:
+        DataFrame with segment, threshold, tp, fp, fn, tn, precision,
+        recall, f1 and cost columns
+    """
+    curve = _curve(scores, y, segments, fp_cost=fp_cost, fn_cost=fn_cost)
+    names = curve.pop("names")
+    curve["segment"] = pd.Categorical.from_codes(curve["segment"], categories=names)
+    columns = ("segment", "threshold", "tp", "fp", "fn", "tn", "precision", "recall", "f1", "cost")
+    return pd.DataFrame({c: curve[c] for c in columns})
+
+
+def _best(curve: Dict[str, np.ndarray], objective: str) -> Dict[str, Dict]:
+    """Best cut per segment; ties go to the higher threshold (fewer alerts)."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}")
+    gain = curve["f1"] if objective == "f1" else -curve["cost"]
+    order = np.lexsort((-curve["threshold"], -gain, curve["segment"]))
+    codes = curve["segment"][order]
+    first = order[np.r_[True, codes[1:] != codes[:-1]]]
+    return {
+        str(curve["names"][curve["segment"][n]]): {
+            "threshold": float(curve["threshold"][n]),
+            "precision": float(curve["precision"][n]),
+            "recall": float(curve["recall"][n]),
+            "f1": float(curve["f1"][n]),
+            "cost": float(curve["cost"][n]),
+            "support": int(curve["positives"][n] + curve["negatives"][n]),
+            "positives": int(curve["positives"][n]),
+        }
+        for n in first
+    }
+
+
+def optimize_thresholds(scores, y, segments=None, objective: str = "f1", fp_cost: float = 1.0,
+                        fn_cost: float = 1.0, min_support: int = 50) -> Dict:
+    """
+    Best global threshold and, with segments, the best threshold per segment.
+
+    Args:
+        scores: Risk scores
+        y: True labels (1 = attack)
+        segments: Optional segment label per score (see
+            src.response_engine.segment_labels)
+        objective: 'f1' (maximized) or 'cost' (fp_cost * FP + fn_cost * FN, minimized)
+        min_support: Segments with fewer events, or no attacks, keep the
+            global threshold and are left out of "segments"
+
+    Returns:
+        {"global": metrics, "segments": {label: metrics}}, where metrics
+        has threshold, precision, recall, f1, cost, support and positives
+    """
+    result = {"global": _best(_curve(scores, y, fp_cost=fp_cost, fn_cost=fn_cost), objective)["all"],
+              "segments": {}}
+    if segments is not None:
+        best = _best(_curve(scores, y, segments, fp_cost=fp_cost, fn_cost=fn_cost), objective)
+        result["segments"] = {
+            label: m for label, m in best.items() if m["support"] >= min_support and m["positives"] > 0
+        }
+    return result
+
+
+def threshold_config(result: Dict, settings: Dict) -> Dict:
+    """model_config.tuned.yaml updates for an optimize_thresholds result."""
+    best = result["global"]
+    return {
+        "risk_threshold": best["threshold"],
+        "f1_at_risk_threshold": best["f1"],
+        "risk_thresholds": {
+            "objective": settings["objective"],
+            "segment_by": settings["segment_by"],
+            "subnet_prefix": settings["subnet_prefix"],
+            "segments": {label: m["threshold"] for label, m in result["segments"].items()},
+        },
+    }
@@ -0,0 +1,232 @@
+"""
+In-process API benchmark.
+
+Drives the FastAPI app through httpx's ASGI transport (no server, no
+network) with synthetic EventIn payloads, prints throughput and
+p50/p95/p99 latency per endpoint and writes a JSON report so runs can be
+compared across commits:
+
+    python scripts/train_models.py            # once, if models/saved is empty
+    python scripts/benchmark_api.py --requests 2000 --concurrency 32 --batch-size 100
+    python scripts/benchmark_api.py --compare benchmarks/<earlier>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import httpx
+
+from api.main import app
+from api.routes import prediction
+from models.registry import ModelRegistry, get_registry
+from models import registry as registry_module
+
+ENDPOINTS = ("event", "batch", "stream")
+
+NORMAL_ACTIONS = ["login", "file_access", "email_send", "web_browse", "file_download", "logout"]
+ATTACK_ACTIONS = ["login", "file_download", "port_scan"]
+
+
+def make_payloads(n: int, seed: int = 0, attack_ratio: float = 0.1):
+    """Synthetic EventIn payloads shaped like the data generators' output."""
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(n):
+        attack = rng.random() < attack_ratio
+        hour = rng.randint(0, 5) if attack else rng.randint(8, 17)
+        payloads.append({
+            "timestamp": f"2024-01-15 {hour:02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+            "user_id": rng.choice(["admin", "root"]) if attack else f"user_{rng.randint(1, 25):03d}",
+            "ip_address": f"203.0.113.{rng.randint(1, 20)}" if attack else f"192.168.1.{rng.randint(10, 50)}",
+            "action": rng.choice(ATTACK_ACTIONS if attack else NORMAL_ACTIONS),
+            "status": "failed" if attack and rng.random() < 0.7 else "success",
+            "bytes_transferred": rng.randint(10 << 20, 100 << 20) if attack else rng.randint(1024, 1 << 20),
+            "duration_ms": rng.randint(1, 50) if attack else rng.randint(100, 5000),
+            "user_agent": "python-requests/2.31" if attack else "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+        })
+    return payloads
+
+
+def _request_args(endpoint: str, events):
+    if endpoint == "event":
+        return "/predict/event", {"json": events[0]}
+    if endpoint == "batch":
+        return "/predict/batch", {"json": {"events": events}}
+    body = "".join(json.dumps(e) + "\n" for e in events)
+    return "/predict/stream", {
+        "content": body, "headers": {"Content-Type": "application/x-ndjson"}
+    }
+
+
+async def run_endpoint(client, endpoint: str, payloads, requests: int,
+                       concurrency: int, batch_size: int):
+    """Send `requests` requests with `concurrency` in flight; returns latencies and errors."""
+    per_request = 1 if endpoint == "event" else batch_size
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, errors
+        while next_request < requests:
+            n = next_request
+            next_request += 1
+            start = (n * per_request) % len(payloads)
+            events = [payloads[(start + k) % len(payloads)] for k in range(per_request)]
+            path, kwargs = _request_args(endpoint, events)
+            t0 = time.perf_counter()
+            response = await client.post(path, **kwargs)
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return np.array(latencies), errors, elapsed, per_request
+
+
+def summarize(latencies, errors, elapsed, per_request):
+    ms = latencies * 1000
+    return {
+        "requests": int(len(latencies)),
+        "events": int(len(latencies) * per_request),
+        "errors": int(errors),
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "events_per_second": round(len(latencies) * per_request / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+async def run_benchmark(endpoints=("event", "batch"), requests: int = 1000,
+                        concurrency: int = 16, batch_size: int = 100,
+                        distinct: int = 5000, warmup: int = 50, seed: int = 0):
+    """Benchmark each endpoint in turn against the in-process app."""
+    payloads = make_payloads(distinct, seed=seed)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for endpoint in endpoints:
+                if warmup:
+                    await run_endpoint(client, endpoint, payloads, warmup,
+                                       min(concurrency, warmup), batch_size)
+                latencies, errors, elapsed, per_request = await run_endpoint(
+                    client, endpoint, payloads, requests, concurrency, batch_size
+                )
+                results[endpoint] = summarize(latencies, errors, elapsed, per_request)
+            server = (await client.get("/api/monitor/metrics")).json()
+    finally:
+        # No lifespan under ASGITransport: stop the executor ourselves
+        await prediction.shutdown_executor()
+    return results, server.get("prediction_latency")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':<8} {'req/s':>10} {'events/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in results.items():
+        print(f"{endpoint:<8} {r['requests_per_second']:>10.1f} {r['events_per_second']:>11.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7d}")
+        old = (baseline or {}).get(endpoint)
+        if old:
+            def delta(key):
+                return 100.0 * (r[key] - old[key]) / old[key] if old[key] else 0.0
+            print(f"{'  vs base':<8} {delta('requests_per_second'):>+9.1f}% {delta('events_per_second'):>+10.1f}% "
+                  f"{delta('p50_ms'):>+8.1f}% {delta('p95_ms'):>+8.1f}% {delta('p99_ms'):>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default="event,batch",
+                        help=f"Comma-separated subset of {','.join(ENDPOINTS)} (default: event,batch)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (default: 16)")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Events per batch/stream request (default: 100)")
+    parser.add_argument("--distinct", type=int, default=5000,
+                        help="Distinct payloads cycled through; lower values raise cache hit rates (default: 5000)")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint (default: 50)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--models-dir", default=None, help="Model directory (default: models/saved)")
+    parser.add_argument("--output", default=None,
+                        help="Report path (default: benchmarks/api-<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier report to print deltas against")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-alert log output")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Every high-risk event logs an alert warning; that would swamp the output
+        logging.disable(logging.WARNING)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if args.models_dir:
+        registry_module._registry = ModelRegistry(args.models_dir)
+    bundle = get_registry().load()
+    print(f"Model version {bundle.version}, engine {getattr(bundle.anomaly_model, 'engine', 'sklearn')}")
+    print(f"{args.requests} requests/endpoint, concurrency {args.concurrency}, batch size {args.batch_size}\n")
+
+    results, server_latency = asyncio.run(run_benchmark(
+        endpoints=endpoints, requests=args.requests, concurrency=args.concurrency,
+        batch_size=args.batch_size, distinct=args.distinct, warmup=args.warmup, seed=args.seed,
+    ))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+    print_results(results, baseline)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model_version": bundle.version,
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "verbose")},
+        "results": results,
+        "server_prediction_latency": server_latency,
+    }
+    output = Path(args.output) if args.output else (
+        ROOT / "benchmarks" / f"api-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Compare categorical encodings on generated high-cardinality logs.
+
+For each strategy in feature_engineering.encoding terms (dense one-hot,
+sparse one-hot, hash, frequency, target on user_id / ip_address /
+user_agent) this reports matrix width and memory, fit and transform
+time, single-event encoding latency and, unless --no-models, intent
+forest fit time, scoring latency and ROC AUC on a held-out split:
+
+    python scripts/benchmark_encodings.py --events 100000 --users 20000 --ips 30000
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from models.intent_predictor import IntentPredictor
+from src.feature_engineering import add_time_features
+from src.feature_pipeline import FeaturePipeline
+
+HIGH_CARDINALITY = ("user_id", "ip_address", "user_agent")
+
+# name -> (FeaturePipeline kwargs, sparse output)
+STRATEGIES = {
+    "onehot": ({}, False),
+    "onehot_sparse": ({}, True),
+    "hash": ({"encodings": {c: "hash" for c in HIGH_CARDINALITY}}, False),
+    "frequency": ({"encodings": {c: "frequency" for c in HIGH_CARDINALITY}}, False),
+    "target": ({"encodings": {c: "target" for c in HIGH_CARDINALITY}}, False),
+}
+
+NORMAL_ACTIONS = np.array(["login", "file_access", "email_send", "web_browse", "file_download", "logout"])
+ATTACK_ACTIONS = np.array(["login", "file_download", "port_scan"])
+
+
+def make_dataset(n_events: int, n_users: int, n_ips: int, n_agents: int = 500,
+                 attack_ratio: float = 0.1, seed: int = 0) -> pd.DataFrame:
+    """Events shaped like the data generators' output, with many users and IPs."""
+    rng = np.random.default_rng(seed)
+    attack = rng.random(n_events) < attack_ratio
+    hour = np.where(attack, rng.integers(0, 6, n_events), rng.integers(8, 18, n_events))
+    timestamp = pd.Timestamp("2024-01-15") + pd.to_timedelta(
+        hour * 3600 + rng.integers(0, 3600, n_events), unit="s")
+
+    # Zipf-like skew: a few busy users/IPs, a long tail of rare ones
+    users = np.minimum(rng.zipf(1.3, n_events), n_users) - 1
+    ips = np.minimum(rng.zipf(1.3, n_events), n_ips) - 1
+    user_pool = np.array([f"user_{i:06d}" for i in range(n_users)])
+    ip_pool = np.array([f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(n_ips)])
+    attacker_pool = np.array([f"svc_{i:04d}" for i in range(max(1, n_users // 100))])
+    attack_ip_pool = np.array([f"203.0.{i >> 8 & 255}.{i & 255}" for i in range(max(1, n_ips // 100))])
+    agent_pool = np.array([f"agent/{i}" for i in range(n_agents)])
+
+    return pd.DataFrame({
+        "timestamp": timestamp,
+        "user_id": np.where(attack, rng.choice(attacker_pool, n_events), user_pool[users]),
+        "ip_address": np.where(attack, rng.choice(attack_ip_pool, n_events), ip_pool[ips]),
+        "action": np.where(attack, rng.choice(ATTACK_ACTIONS, n_events), rng.choice(NORMAL_ACTIONS, n_events)),
+        "status": np.where(attack & (rng.random(n_events) < 0.7), "failed", "success"),
+        "bytes_transferred": np.where(attack, rng.integers(10 << 20, 100 << 20, n_events),
+                                      rng.integers(1024, 1 << 20, n_events)),
+        "duration_ms": np.where(attack, rng.integers(1, 50, n_events), rng.integers(100, 5000, n_events)),
+        "user_agent": rng.choice(agent_pool, n_events),
+        "risk_label": attack.astype(np.int8),
+    })
+
+
+def matrix_bytes(X) -> int:
+    if sp.issparse(X):
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(X.nbytes)
+
+
+def benchmark_strategy(name, train, test, records, models: bool = True, trees: int = 50):
+    kwargs, sparse = STRATEGIES[name]
+    pipeline = FeaturePipeline(**kwargs)
+
+    started = time.perf_counter()
+    pipeline.fit(train)
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    X_train = pipeline.transform(train, sparse=sparse)
+    transform_seconds = time.perf_counter() - started
+    X_test = pipeline.transform(test, sparse=sparse)
+
+    latencies = []
+    for record in records:
+        t0 = time.perf_counter()
+        pipeline.transform(record)
+        latencies.append(time.perf_counter() - t0)
+    latencies = np.array(latencies) * 1000
+
+    result = {
+        "n_features": pipeline.n_features,
+        "matrix_mb": round(matrix_bytes(X_train) / 1e6, 3),
+        "fit_seconds": round(fit_seconds, 4),
+        "transform_seconds": round(transform_seconds, 4),
+        "rows_per_second": round(len(train) / transform_seconds, 1) if transform_seconds else None,
+        "event_p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "event_p99_ms": round(float(np.percentile(latencies, 99)), 4),
+    }
+    if models:
+        y_train, y_test = train["risk_label"].values, test["risk_label"].values
+        model = IntentPredictor(n_estimators=trees)
+        started = time.perf_counter()
+        model.fit(X_train, y_train)
+        result["model_fit_seconds"] = round(time.perf_counter() - started, 4)
+        started = time.perf_counter()
+        probs = model.predict_proba(X_test)
+        result["model_score_seconds"] = round(time.perf_counter() - started, 4)
+        try:
+            result["roc_auc"] = round(float(roc_auc_score(y_test, probs)), 4)
+        except ValueError:
+            result["roc_auc"] = None
+    return result
+
+
+def print_results(results):
+    header = (f"{'strategy':<14} {'features':>9} {'matrix MB':>10} {'fit s':>8} {'transform s':>12} "
+              f"{'event p50 ms':>13} {'model fit s':>12} {'score s':>8} {'AUC':>7}")
+    print(header)
+    print("-" * len(header))
+
+    for name, r in results.items():
+        print(f"{name:<14} {r['n_features']:>9d} {r['matrix_mb']:>10.2f} {r['fit_seconds']:>8.3f} "
+              f"{r['transform_seconds']:>12.3f} {r['event_p50_ms']:>13.4f} "
+              f"{r.get('model_fit_seconds', float('nan')):>12.3f} {r.get('model_score_seconds', float('nan')):>8.3f} "
+              f"{(r.get('roc_auc') if r.get('roc_auc') is not None else float('nan')):>7.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000, help="Generated events (default: 50000)")
+    parser.add_argument("--users", type=int, default=10000, help="Distinct users (default: 10000)")
+    parser.add_argument("--ips", type=int, default=20000, help="Distinct IPs (default: 20000)")
+    parser.add_argument("--agents", type=int, default=500, help="Distinct user agents (default: 500)")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help=f"Comma-separated subset of {','.join(STRATEGIES)}")
+    parser.add_argument("--trees", type=int, default=50, help="Trees in the intent forest (default: 50)")
+    parser.add_argument("--no-models", action="store_true", help="Only measure encoding")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="Report path (default: benchmarks/encodings-<timestamp>.json)")
+    args = parser.parse_args()
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(sorted(unknown))}")
+
+    df = add_time_features(make_dataset(args.events, args.users, args.ips, args.agents, seed=args.seed))
+    train, test = train_test_split(df, test_size=0.2, stratify=df["risk_label"], random_state=args.seed)
+    records = test.drop(columns=["risk_label"]).head(200).to_dict(orient="records")
+    print(f"{len(df):,} events, {df['user_id'].nunique():,} users, {df['ip_address'].nunique():,} IPs, "
+          f"{df['user_agent'].nunique():,} user agents\n")
+
+    results = {
+        name: benchmark_strategy(name, train, test, records, models=not args.no_models, trees=args.trees)
+        for name in strategies
+    }
+    print_results(results)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    output = Path(args.output) if args.output else (
+        ROOT / "benchmarks" / f"encodings-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
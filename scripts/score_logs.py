@@ -0,0 +1,81 @@
+"""
+Score a log file offline, one chunk at a time.
+
+Streams the input CSV through the published models (see models/registry.py)
+and appends anomaly_score, intent_probability and risk_score columns,
+writing each chunk before reading the next, so files larger than memory
+can be scored:
+
+    python scripts/score_logs.py data/events.csv scored.csv
+    python scripts/score_logs.py data/events.csv scored.parquet --chunksize 200000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from models.registry import ModelRegistry, get_registry
+from models.risk_scorer import compute_risk_score
+from src.feature_engineering import DEFAULT_CHUNKSIZE, add_time_features, iter_raw_logs
+
+
+def score_chunks(chunks, bundle):
+    """Yield each raw chunk with the three score columns added."""
+    for raw in chunks:
+        X = bundle.pipeline.transform(add_time_features(raw.copy()))
+        anomaly_scores = bundle.anomaly_model.anomaly_score(X)
+        intent_probs = bundle.intent_model.predict_proba(X)
+        raw["anomaly_score"] = anomaly_scores
+        raw["intent_probability"] = intent_probs
+        raw["risk_score"] = compute_risk_score(
+            anomaly_scores, intent_probs, calibrator=bundle.calibrator
+        )
+        yield raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Log CSV to score")
+    parser.add_argument("output", help="Output .csv or .parquet")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Rows per chunk (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--models-dir", default=None, help="Model directory (default: models/saved)")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models_dir) if args.models_dir else get_registry()
+    bundle = registry.load()
+    output = Path(args.output)
+    parquet = output.suffix == ".parquet"
+
+    start = time.perf_counter()
+    rows = 0
+    writer = None
+    try:
+        for n, chunk in enumerate(score_chunks(iter_raw_logs(args.input, args.chunksize), bundle)):
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(output, mode="w" if n == 0 else "a", header=n == 0, index=False)
+            rows += len(chunk)
+            print(f"Scored {rows:,} rows", end="\r")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\nScored {rows:,} rows with model {bundle.version} in {elapsed:.1f}s -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 """
 Train all models (anomaly detector + intent predictor).
+
+    python scripts/train_models.py            # parameters from configs/model_config.yaml
+    python scripts/train_models.py --search   # search them first (search section)
 """
 
+import argparse
 import sys
 import os
 
@@ -14,12 +18,25 @@ from models.model_trainer import train_models
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/sample_logs.csv", help="Training log (default: data/sample_logs.csv)")
+    parser.add_argument("--models-dir", default="models/saved", help="Model versions directory (default: models/saved)")
+    parser.add_argument("--search", action="store_true",
+                        help="Search hyperparameters before training and save the best to model_config.tuned.yaml")
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="Also fit every installed intent backend and report fit time, latency and size")
+    parser.add_argument("--no-feature-cache", action="store_true", help="Always re-encode the training log")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🧠  CyberIntent-AI Model Trainer")
     print("=" * 60)
     train_models(
-        data_path="data/sample_logs.csv",
-        models_dir="models/saved",
+        data_path=args.data,
+        models_dir=args.models_dir,
+        use_feature_cache=not args.no_feature_cache,
+        search=args.search,
+        compare_backends=args.compare_backends,
     )
 
 
@@ -5,8 +5,14 @@ from datetime import datetime
 from typing import List, Dict, Optional, Callable
 import logging
 
+from src.metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
+_metrics = get_metrics()
+ALERT_HANDLER_ERRORS = _metrics.counter(
+    "alert_handler_errors_total", "Alert handlers that raised")
+
 
 class AlertSeverity(Enum):
     """Alert severity levels."""
@@ -72,9 +78,15 @@ class Alert:
 class AlertSystem:
     """Manage system alerts and notifications."""
 
-    def __init__(self):
-        """Initialize alert system."""
+    def __init__(self, max_alerts: Optional[int] = None):
+        """
+        Initialize alert system.
+
+        Args:
+            max_alerts: Keep at most this many alerts (None = unbounded)
+        """
         self.alerts: List[Alert] = []
+        self.max_alerts = max_alerts
         self.handlers: List[Callable] = []
         self.thresholds = {
             'anomaly_score': 0.7,
@@ -99,6 +111,13 @@ class AlertSystem:
             alert: Alert to raise
         """
         self.alerts.append(alert)
+        _metrics.counter(
+            "alerts_total", "Alerts raised",
+            labels={"type": alert.alert_type.value, "severity": alert.severity.name},
+        ).inc()
+        if self.max_alerts and len(self.alerts) > 2 * self.max_alerts:
+            # Trim in bulk so long-running services stay bounded
+            self.alerts = self.alerts[-self.max_alerts:]
         logger.warning(f"Alert raised: {alert}")
         
         # Call all handlers
@@ -106,6 +125,7 @@ class AlertSystem:
             try:
                 handler(alert)
             except Exception as e:
+                ALERT_HANDLER_ERRORS.inc()
                 logger.error(f"Error in alert handler: {e}")
 
     def check_anomaly_score(self, score: float, context: Dict = None) -> Optional[Alert]:
@@ -157,6 +177,32 @@ class AlertSystem:
             return alert
         return None
 
+    def check_failed_logins(self, count: int, period: str, context: Dict = None) -> Optional[Alert]:
+        """
+        Check a sliding-window failed-login count.
+
+        Raises once per burst: only the event that takes the count past
+        the threshold alerts, not every failed login after it.
+
+        Args:
+            count: Failed logins in the window, this event included
+            period: Window label (e.g. '1m')
+            context: Additional context
+
+        Returns:
+            Alert if raised, None otherwise
+        """
+        if int(count) == int(self.thresholds['failed_logins']) + 1:
+            alert = Alert(
+                alert_type=AlertType.THRESHOLD_EXCEEDED,
+                severity=AlertSeverity.CRITICAL,
+                message=f"{int(count)} failed logins within {period}",
+                details={'failed_logins': int(count), 'period': period, 'context': context or {}}
+            )
+            self.raise_alert(alert)
+            return alert
+        return None
+
     def set_threshold(self, threshold_name: str, value: float) -> None:
         """Set alert threshold."""
         if threshold_name in self.thresholds:
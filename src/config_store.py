@@ -0,0 +1,165 @@
+"""Shared in-memory view of the YAML files in configs/."""
+
+import copy
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CONFIG_FILES = {
+    "config": "config.yaml",
+    "model": "model_config.yaml",
+    "alert_rules": "alert_rules.yaml",
+}
+
+# Values written by tools (hyperparameter search, trained thresholds) live
+# next to the hand-edited file rather than in it, and are merged over it
+OVERLAY_FILES = {
+    "model": "model_config.tuned.yaml",
+}
+
+
+def merge_config(base: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """`updates` over `base`, one level deep: sections are merged key by key."""
+    merged = dict(base)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def write_config(path: Path, config: Dict[str, Any]) -> Path:
+    """
+    Write a YAML file atomically: a temp file in the same directory is
+    renamed over `path`, so a reloading store never reads half of it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(yaml.safe_dump(config, sort_keys=False))
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+class ConfigStore:
+    """
+    Loads configs/config.yaml, model_config.yaml and alert_rules.yaml once
+    and serves them from memory. model_config.tuned.yaml, if present, is
+    merged over model_config.yaml.
+
+    File mtimes are checked at most once per check_interval seconds; a
+    changed file is parsed in full and then swapped in with a single
+    reference assignment, so readers see either the old or the new
+    config, never a partial one. A file that fails to parse keeps its
+    previous contents.
+    """
+
+    def __init__(self, config_dir: Optional[Path] = None, check_interval: float = 1.0):
+        """
+        Initialize config store.
+
+        Args:
+            config_dir: Directory holding the YAML files
+            check_interval: Seconds between mtime checks
+        """
+        self.config_dir = Path(config_dir) if config_dir else ROOT / "configs"
+        self.check_interval = check_interval
+        self.reload_count = 0
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._stamps: Dict[str, Any] = {}
+        self._last_check = float("-inf")
+        self._lock = threading.Lock()
+        self.reload(force=True)
+
+    def _stamp(self, filename: str):
+        try:
+            st = os.stat(self.config_dir / filename)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read files whose mtime/size changed. Returns True if anything changed.
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            configs = dict(self._configs)
+            stamps = dict(self._stamps)
+            changed = False
+
+            for name, filename in CONFIG_FILES.items():
+                files = [filename] + ([OVERLAY_FILES[name]] if name in OVERLAY_FILES else [])
+                stamp = tuple(self._stamp(f) for f in files)
+                if not force and stamp == self._stamps.get(name):
+                    continue
+                config: Dict[str, Any] = {}
+                try:
+                    for f, file_stamp in zip(files, stamp):
+                        if file_stamp is not None:
+                            with (self.config_dir / f).open("r") as fh:
+                                config = merge_config(config, yaml.safe_load(fh) or {})
+                except Exception as e:
+                    logger.error(f"Keeping previous {filename}: {e}")
+                    continue
+                configs[name] = config
+                stamps[name] = stamp
+                changed = True
+
+            if changed:
+                self._configs = configs
+                self._stamps = stamps
+                self.reload_count += 1
+                logger.info("Configuration loaded from %s", self.config_dir)
+            return changed
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """
+        Current contents of one config file ('config', 'model', 'alert_rules').
+
+        The returned dict is shared; treat it as read-only.
+        """
+        self._maybe_reload()
+        return self._configs.get(name, {})
+
+    def value(self, name: str, *keys: str, default: Any = None) -> Any:
+        """Nested lookup, e.g. value('config', 'model', 'inference_engine')."""
+        node: Any = self.get(name)
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return default
+            node = node[key]
+        return node
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Deep copy of all configs."""
+        self._maybe_reload()
+        return copy.deepcopy(self._configs)
+
+
+_store: Optional[ConfigStore] = None
+
+
+def get_config_store() -> ConfigStore:
+    """Process-wide config store."""
+    global _store
+    if _store is None:
+        _store = ConfigStore()
+    return _store
@@ -5,6 +5,8 @@ import numpy as np
 from typing import List, Optional, Tuple
 import logging
 
+from src.feature_engineering import LOG_DTYPES
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,7 +25,7 @@ class DataProcessor:
             Loaded DataFrame
         """
         if filepath.endswith('.csv'):
-            return pd.read_csv(filepath)
+            return pd.read_csv(filepath, dtype=LOG_DTYPES)
         elif filepath.endswith('.json'):
             return pd.read_json(filepath)
         else:
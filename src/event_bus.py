@@ -0,0 +1,188 @@
+"""In-process publish/subscribe bus for scored events and alerts."""
+
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from src.alert_system import Alert, AlertSeverity
+
+logger = logging.getLogger(__name__)
+
+
+def risk_severity(risk: float) -> str:
+    """Severity name for a 0-1 risk score (LOW/MEDIUM/HIGH/CRITICAL quartiles)."""
+    if risk >= 0.75:
+        return AlertSeverity.CRITICAL.name
+    if risk >= 0.5:
+        return AlertSeverity.HIGH.name
+    if risk >= 0.25:
+        return AlertSeverity.MEDIUM.name
+    return AlertSeverity.LOW.name
+
+
+class Subscription:
+    """
+    One client's view of the bus: filters plus a bounded buffer.
+
+    When the client falls behind, the oldest buffered messages are dropped
+    and the next get() reports how many were lost.
+    """
+
+    def __init__(self,
+                 loop: asyncio.AbstractEventLoop,
+                 max_buffer: int = 1000,
+                 min_severity: Optional[str] = None,
+                 user_id: Optional[str] = None,
+                 ip_address: Optional[str] = None,
+                 types: Optional[List[str]] = None):
+        """
+        Initialize subscription.
+
+        Args:
+            loop: Event loop the consumer runs on
+            max_buffer: Messages kept before dropping the oldest
+            min_severity: Lowest severity name delivered (e.g. 'HIGH')
+            user_id: Only messages for this user
+            ip_address: Only messages for this IP
+            types: Message types to deliver ('event', 'alert'); None = all
+        """
+        self.loop = loop
+        self.min_level = AlertSeverity[min_severity.upper()].value if min_severity else 0
+        self.user_id = user_id
+        self.ip_address = ip_address
+        self.types = set(types) if types else None
+        self.buffer = deque(maxlen=max(1, int(max_buffer)))
+        self.dropped = 0
+        self._unreported_drops = 0
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+
+    def matches(self, message: Dict) -> bool:
+        if self.types is not None and message["type"] not in self.types:
+            return False
+        if AlertSeverity[message["severity"]].value < self.min_level:
+            return False
+        if self.user_id is not None and message.get("user_id") != self.user_id:
+            return False
+        if self.ip_address is not None and message.get("ip_address") != self.ip_address:
+            return False
+        return True
+
+    def offer(self, message: Dict) -> None:
+        """Buffer a message; safe to call from any thread."""
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+                self._unreported_drops += 1
+            self.buffer.append(message)
+        try:
+            self.loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Consumer's loop is closed; it will be unsubscribed
+            pass
+
+    async def get(self) -> Dict:
+        """Next message for this client (waits if none is buffered)."""
+        while True:
+            with self._lock:
+                if self._unreported_drops:
+                    count, self._unreported_drops = self._unreported_drops, 0
+                    return {"type": "dropped", "count": count}
+                if self.buffer:
+                    return self.buffer.popleft()
+                self._ready.clear()
+            await self._ready.wait()
+
+
+class EventBus:
+    """
+    Fans scored events and alerts out to subscribers and keeps a short
+    history for the /events and /alerts endpoints.
+    """
+
+    def __init__(self, history_size: int = 1000):
+        self.history = {
+            "event": deque(maxlen=history_size),
+            "alert": deque(maxlen=history_size),
+        }
+        self.published = 0
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, **kwargs) -> Subscription:
+        """Register a subscription on the running loop (see Subscription for kwargs)."""
+        subscription = Subscription(asyncio.get_running_loop(), **kwargs)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def publish(self, message: Dict) -> None:
+        """Deliver a message to matching subscribers; safe from any thread."""
+        self.history[message["type"]].append(message)
+        self.published += 1
+        for subscription in self._subscribers:
+            if subscription.matches(message):
+                subscription.offer(message)
+
+    def publish_alert(self, alert: Alert) -> None:
+        """AlertSystem handler: publish a raised Alert."""
+        context = alert.details.get("context", {}) if isinstance(alert.details, dict) else {}
+        self.publish({
+            "type": "alert",
+            "severity": alert.severity.name,
+            "user_id": context.get("user_id"),
+            "ip_address": context.get("ip_address"),
+            "timestamp": alert.timestamp.isoformat(),
+            "data": alert.to_dict(),
+        })
+
+    def publish_scored_events(self, records, anomaly_scores, intent_probs, risk_scores) -> None:
+        """Publish one 'event' message per scored record."""
+        timestamp = datetime.now().isoformat()
+        keep = self.history["event"].maxlen
+        if not self._subscribers and len(records) > keep:
+            # Nobody listening: only the tail can end up in the history
+            records, anomaly_scores, intent_probs, risk_scores = (
+                records[-keep:], anomaly_scores[-keep:], intent_probs[-keep:], risk_scores[-keep:]
+            )
+        for record, a, i, r in zip(records, anomaly_scores, intent_probs, risk_scores):
+            self.publish({
+                "type": "event",
+                "severity": risk_severity(float(r)),
+                "user_id": record.get("user_id"),
+                "ip_address": record.get("ip_address"),
+                "timestamp": timestamp,
+                "data": {
+                    **{k: v for k, v in record.items() if k != "risk_label"},
+                    "anomaly_score": float(a),
+                    "intent_probability": float(i),
+                    "risk_score": float(r),
+                },
+            })
+
+    def recent(self, kind: str, limit: int = 100) -> List[Dict]:
+        """Newest-last list of up to `limit` recent messages of one type."""
+        items = list(self.history[kind])
+        return items[-limit:] if limit > 0 else []
+
+
+_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """Process-wide event bus."""
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
@@ -0,0 +1,204 @@
+"""
+On-disk cache of encoded feature matrices.
+
+Encoding a log file (read, add time features, one-hot encode) is
+repeated by every training run and dashboard load even when neither the
+file nor the pipeline changed. FeatureCache stores the float32 matrix
+and labels as .npy files keyed by the source file's fingerprint (size
+and mtime, optionally a content hash) and the feature pipeline
+(its version and encoding settings, plus the fitted state when one is
+given).
+Hits are memory-mapped read-only, so nothing is copied until rows are
+used.
+
+Settings come from configs/config.yaml (feature_engineering.cache).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+
+from src.config_store import get_config_store
+from src.feature_pipeline import FeaturePipeline
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_cache_settings() -> Dict:
+    """Feature cache settings from configs/config.yaml (feature_engineering.cache)."""
+    settings = {"enabled": True, "dir": "data/cache/features", "hash_contents": False}
+    settings.update(
+        get_config_store().value("config", "feature_engineering", "cache", default=None) or {}
+    )
+    return settings
+
+
+def fingerprint(path, hash_contents: bool = False) -> Dict:
+    """Identity of a source file: resolved path, size, mtime (and sha256 if asked)."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    result = {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if hash_contents:
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        result["sha256"] = digest.hexdigest()
+    return result
+
+
+class CacheEntry:
+    """Where one (source, pipeline) combination is cached."""
+
+    def __init__(self, key: str, directory: Path, source: Dict, pipeline: str):
+        self.key = key
+        self.directory = directory
+        self.source = source
+        self.pipeline = pipeline
+
+
+class CachedFeatures:
+    """A cache hit: memory-mapped matrix and labels plus metadata."""
+
+    def __init__(self, X: np.ndarray, y: Optional[np.ndarray], meta: Dict,
+                 pipeline: Optional[FeaturePipeline] = None):
+        self.X = X
+        self.y = y
+        self.meta = meta
+        self.pipeline = pipeline
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+
+class FeatureCache:
+    """Encoded feature matrices on disk, one directory per entry."""
+
+    def __init__(self, directory=None, hash_contents: bool = False):
+        """
+        Initialize cache.
+
+        Args:
+            directory: Cache directory (default: data/cache/features)
+            hash_contents: Key on a sha256 of the source too, not only
+                size and mtime (reads the whole file once per lookup)
+        """
+        directory = Path(directory or "data/cache/features")
+        self.directory = directory if directory.is_absolute() else ROOT / directory
+        self.hash_contents = hash_contents
+
+    def entry(self, source, pipeline: Optional[FeaturePipeline] = None) -> CacheEntry:
+        """
+        Cache entry for `source` encoded by `pipeline`.
+
+        An unfitted pipeline (default: FeaturePipeline()) stands for one
+        fitted on the source itself, as in training: its settings are part
+        of the key and the fitted pipeline is stored with the matrix.
+        """
+        source_fp = fingerprint(source, self.hash_contents)
+        pipeline = pipeline if pipeline is not None else FeaturePipeline()
+        pipeline_id = pipeline.fingerprint() if pipeline.columns else f"fit-{pipeline.fingerprint()}"
+        key = hashlib.sha256(
+            json.dumps({"source": source_fp, "pipeline": pipeline_id}, sort_keys=True).encode()
+        ).hexdigest()[:24]
+        return CacheEntry(key, self.directory / key, source_fp, pipeline_id)
+
+    def load(self, entry: CacheEntry) -> Optional[CachedFeatures]:
+        """Memory-mapped features for `entry`, None on a miss."""
+        directory = entry.directory
+        try:
+            meta = json.loads((directory / "meta.json").read_text())
+            X = np.load(directory / "X.npy", mmap_mode="r")
+            y = np.load(directory / "y.npy", mmap_mode="r") if (directory / "y.npy").exists() else None
+            pipeline_path = directory / "pipeline.joblib"
+            pipeline = joblib.load(pipeline_path) if pipeline_path.exists() else None
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable feature cache entry {directory}: {e}")
+            return None
+        logger.info(f"Feature cache hit: {entry.source['path']} ({meta.get('rows')} rows)")
+        return CachedFeatures(X, y, meta, pipeline)
+
+    def store(self, entry: CacheEntry, X: np.ndarray, y: Optional[np.ndarray] = None,
+              pipeline: Optional[FeaturePipeline] = None) -> Optional[CachedFeatures]:
+        """
+        Write features for `entry` and return them memory-mapped.
+
+        Nothing is written if the source changed since the entry was
+        made (e.g. a live log still being appended to). Older entries for
+        the same source and pipeline are removed.
+        """
+        try:
+            current = fingerprint(entry.source["path"], "sha256" in entry.source)
+        except OSError:
+            return None
+        if current != entry.source:
+            logger.info(f"Not caching features: {entry.source['path']} changed while reading")
+            return None
+
+        meta = {
+            "key": entry.key,
+            "source": entry.source,
+            "pipeline": entry.pipeline,
+            "rows": int(len(X)),
+            "n_features": int(X.shape[1]) if X.ndim == 2 else 0,
+            "created_at": datetime.now().isoformat(),
+        }
+        staging = self.directory / f".tmp-{entry.key}-{os.getpid()}"
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            np.save(staging / "X.npy", np.ascontiguousarray(X, dtype=np.float32))
+            if y is not None:
+                np.save(staging / "y.npy", np.asarray(y))
+            if pipeline is not None:
+                joblib.dump(pipeline, staging / "pipeline.joblib")
+            (staging / "meta.json").write_text(json.dumps(meta, indent=2))
+            self._prune(entry)
+            os.replace(staging, entry.directory)
+        except OSError as e:
+            # Another process may have published the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not (entry.directory / "meta.json").exists():
+                logger.warning(f"Could not write feature cache entry {entry.directory}: {e}")
+                return None
+        return self.load(entry)
+
+    def _prune(self, entry: CacheEntry) -> None:
+        """Drop entries for the same source and pipeline (older file versions)."""
+        if not self.directory.exists():
+            return
+        for meta_path in self.directory.glob("*/meta.json"):
+            if meta_path.parent == entry.directory or meta_path.parent.name.startswith("."):
+                continue
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            if (meta.get("source", {}).get("path") == entry.source["path"]
+                    and meta.get("pipeline") == entry.pipeline):
+                shutil.rmtree(meta_path.parent, ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """
+    Feature cache configured by feature_engineering.cache in
+    configs/config.yaml, or None when disabled.
+    """
+    settings = load_cache_settings()
+    if not settings.get("enabled", True):
+        return None
+    return FeatureCache(settings.get("dir"), hash_contents=bool(settings.get("hash_contents")))
@@ -1,44 +1,133 @@
+from typing import Iterable, Iterator
+
 import pandas as pd
 import numpy as np
+from pandas.api.types import union_categoricals
 
 
-def load_logs(path: str = "data/sample_logs.csv") -> pd.DataFrame:
-    """
-    Load the log dataset and normalize the label column.
+# Declared dtypes for the generator schema (data/generators/normal_user.py).
+# Repetitive strings become categoricals, numerics stay 32-bit: the model
+# matrix is float32 anyway.
+LOG_DTYPES = {
+    "user_id": "category",
+    "ip_address": "category",
+    "action": "category",
+    "status": "category",
+    "user_agent": "category",
+    "label": "category",
+    "bytes_transferred": "float32",
+    "duration_ms": "float32",
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+
+BENIGN_LABELS = ["benign", "normal", "legit", "legitimate"]
 
-    Supports:
-      - risk_label column (0 = normal, 1 = malicious), OR
-      - label column with values like 'benign', 'malicious', etc.
-    """
-    df = pd.read_csv(path)
 
+def _normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
     # Parse timestamp if present
     if "timestamp" in df.columns:
         df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
 
     # Normalize label to risk_label (0/1)
     if "risk_label" in df.columns:
-        df["risk_label"] = df["risk_label"].astype(int)
+        df["risk_label"] = df["risk_label"].astype(np.int8)
     elif "label" in df.columns:
         # Treat benign/normal as 0, everything else as 1
-        benign_values = {"benign", "normal", "legit", "legitimate"}
-        df["risk_label"] = df["label"].astype(str).str.lower().apply(
-            lambda v: 0 if v in benign_values else 1
-        )
+        labels = df["label"].astype(str).str.lower()
+        df["risk_label"] = (~labels.isin(BENIGN_LABELS)).astype(np.int8)
     else:
         raise ValueError(
             "Dataset must contain either 'risk_label' or 'label' column."
         )
+    return df
+
+
+def iter_raw_logs(path: str = "data/sample_logs.csv",
+                  chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a log CSV as normalized chunks of at most `chunksize` rows.
+
+    Columns get the dtypes in LOG_DTYPES, timestamps are parsed and the
+    label is mapped to risk_label, but the timestamp is kept (no time
+    features). Only one chunk is held in memory at a time.
+    """
+    reader = pd.read_csv(path, dtype=LOG_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        yield _normalize_chunk(chunk)
+
+
+def load_log_column(path: str, column: str, chunksize: int = DEFAULT_CHUNKSIZE) -> np.ndarray:
+    """
+    One raw column of a log CSV as an object array, reading only that
+    column, one chunk at a time.
+    """
+    reader = pd.read_csv(path, usecols=[column], dtype={column: LOG_DTYPES.get(column, "object")},
+                         chunksize=chunksize)
+    chunks = [chunk[column].to_numpy(dtype=object) for chunk in reader]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=object)
+
+
+def iter_logs(path: str = "data/sample_logs.csv",
+              chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Like iter_raw_logs, but each chunk is ready for feature encoding (as load_logs)."""
+    for chunk in iter_raw_logs(path, chunksize):
+        yield add_time_features(chunk)
 
+
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate chunks, keeping categorical columns categorical.
+
+    pd.concat turns categoricals with differing categories into object
+    columns; union the categories instead (sorted, as for object data).
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    categorical = [
+        c for c in chunks[0].columns
+        if isinstance(chunks[0][c].dtype, pd.CategoricalDtype)
+        and all(isinstance(ch[c].dtype, pd.CategoricalDtype) for ch in chunks)
+    ]
+    df = pd.concat(chunks, ignore_index=True)
+    for c in categorical:
+        df[c] = union_categoricals([ch[c] for ch in chunks], sort_categories=True)
+    return df
+
+
+def load_logs(path: str = "data/sample_logs.csv",
+              chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Load the log dataset and normalize the label column.
+
+    Supports:
+      - risk_label column (0 = normal, 1 = malicious), OR
+      - label column with values like 'benign', 'malicious', etc.
+
+    Read in chunks with declared dtypes; see iter_logs for the streaming
+    version.
+    """
+    return concat_chunks(iter_logs(path, chunksize))
+
+
+def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace the raw timestamp with hour / is_night features.
+
+    Shared by training (via load_logs) and inference so both see the
+    same columns.
+    """
     # Time-based features
     if "timestamp" in df.columns:
-        df["hour"] = df["timestamp"].dt.hour
-        df["is_night"] = ((df["hour"] < 7) | (df["hour"] > 20)).astype(int)
+        ts = pd.to_datetime(df["timestamp"], errors="coerce")
+        df["hour"] = ts.dt.hour.fillna(0).astype(np.int8)
+        df["is_night"] = ((df["hour"] < 7) | (df["hour"] > 20)).astype(np.int8)
         # We won't use raw timestamp directly as a feature
         df = df.drop(columns=["timestamp"])
     else:
-        df["hour"] = 0
-        df["is_night"] = 0
+        df["hour"] = np.int8(0)
+        df["is_night"] = np.int8(0)
 
     return df
 
@@ -47,6 +136,9 @@ def build_features(df: pd.DataFrame):
     """
     Build ML-friendly numeric feature matrix X and label vector y.
     Automatically handles numeric + categorical columns.
+
+    The column set depends on the rows passed in; use FeaturePipeline
+    (src/feature_pipeline.py) to encode new data with training columns.
     """
     # Labels
     y = df["risk_label"].values
@@ -0,0 +1,513 @@
+"""Fitted feature transformer shared by training and inference."""
+
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # only needed for Arrow/Parquet input
+    pa = None
+
+from src.config_store import get_config_store
+from src.feature_engineering import add_time_features
+from src.ip_features import IP_FEATURES, ip_features, load_ip_settings
+
+# Categorical encodings, selectable per column:
+#   onehot     one 0/1 column per training value (build_features layout)
+#   hash       hash_features 0/1 columns, value -> crc32 bucket; no vocabulary
+#   frequency  one column: share of training rows with the value (0 if unseen)
+#   target     one column: smoothed attack rate of the value (prior if unseen)
+ENCODINGS = ("onehot", "hash", "frequency", "target")
+
+
+def load_encoding_settings() -> Dict:
+    """Categorical encoding settings from configs/config.yaml (feature_engineering.encoding)."""
+    settings = {
+        "default": "onehot",
+        "columns": {},
+        "hash_features": 32,
+        "target_smoothing": 20.0,
+        "sparse": False,
+    }
+    settings.update(
+        get_config_store().value("config", "feature_engineering", "encoding", default=None) or {}
+    )
+    return settings
+
+
+class FeaturePipeline:
+    """
+    Frozen version of build_features.
+
+    fit() records the numeric columns, their fill values, the category
+    vocabulary of every categorical column and the final column order.
+    transform() then maps dicts or DataFrames onto exactly those columns
+    as a float32 matrix, using precomputed index lookups instead of
+    pd.get_dummies. Unknown categories encode like the dropped baseline
+    category (all zeros).
+
+    With the default one-hot encoding every distinct user or IP becomes
+    a column. High-cardinality columns can use hash, frequency or target
+    encoding instead (see ENCODINGS), which are appended after the
+    build_features columns, and transform(sparse=True) returns a
+    scipy.sparse CSR matrix for training on wide one-hot matrices.
+
+    ip_features=True adds numeric columns derived from ip_address
+    (src/ip_features.py: /16 and /24 prefix, internal flag, IPv6 flag),
+    so models can generalise over subnets instead of single addresses.
+    """
+
+    VERSION = 1
+
+    def __init__(self, encodings: Optional[Dict[str, str]] = None, default_encoding: str = "onehot",
+                 hash_features: int = 32, target_smoothing: float = 20.0, ip_features: bool = False):
+        """
+        Initialize pipeline.
+
+        Args:
+            encodings: Column -> encoding for categorical columns
+            default_encoding: Encoding of columns not listed in `encodings`
+            hash_features: Output columns per hash-encoded column
+            target_smoothing: Pseudo-count pulling rare values' target
+                encoding towards the overall attack rate
+            ip_features: Derive IP_FEATURES columns from ip_address
+        """
+        self.encoding_spec = dict(encodings or {})
+        self.default_encoding = default_encoding
+        for encoding in [default_encoding, *self.encoding_spec.values()]:
+            if encoding not in ENCODINGS:
+                raise ValueError(f"Unknown encoding '{encoding}', expected one of {ENCODINGS}")
+        self.hash_features = int(hash_features)
+        self.target_smoothing = float(target_smoothing)
+        self.ip_features = bool(ip_features)
+
+        self.numeric_columns: List[str] = []
+        self.categorical_columns: List[str] = []
+        self.encodings: Dict[str, str] = {}
+        self.vocabularies: Dict[str, List[str]] = {}
+        self.encoding_tables: Dict[str, List[float]] = {}
+        self.fill_values: Dict[str, float] = {}
+        self.columns: List[str] = []
+        self._numeric_index: Dict[str, int] = {}
+        self._category_index: Dict[str, Dict[str, int]] = {}
+        self._encoded_index: Dict[str, int] = {}
+        self._tables: Dict[str, np.ndarray] = {}
+        self._lookups: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_config(cls) -> "FeaturePipeline":
+        """Unfitted pipeline with the encodings from configs/config.yaml."""
+        settings = load_encoding_settings()
+        return cls(
+            encodings=settings["columns"],
+            default_encoding=settings["default"],
+            hash_features=settings["hash_features"],
+            target_smoothing=settings["target_smoothing"],
+            ip_features=bool(load_ip_settings().get("features")),
+        )
+
+    def __setstate__(self, state):
+        # Pipelines pickled before encodings existed are all one-hot
+        self.__init__()
+        self.__dict__.update(state)
+        if not self.encodings:
+            self.encodings = {c: "onehot" for c in self.categorical_columns}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    def fit(self, df: pd.DataFrame):
+        """
+        Fit on a DataFrame as returned by load_logs. Labels are only
+        used by target encoding.
+        """
+        return self.fit_chunks([df])
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]):
+        """
+        Fit on DataFrame chunks as yielded by iter_logs, one at a time.
+
+        Only per-value counts are kept between chunks, so a log larger
+        than memory can be fitted; the result is the same as fit() on
+        all chunks concatenated. Column types come from the first chunk.
+        """
+        counts: Dict[str, pd.Series] = {}
+        label_sums: Dict[str, pd.Series] = {}
+        labels = rows = 0
+        for chunk in chunks:
+            df = self._with_ip_features(self._prepare_frame(chunk))
+            if not rows:
+                self._fit_schema(df)
+            targets = [c for c in self.categorical_columns if self.encodings[c] == "target"]
+            if targets and "risk_label" not in df.columns:
+                raise ValueError(f"Target encoding of '{targets[0]}' needs a risk_label column")
+            y = df["risk_label"].astype(float) if targets else None
+            for c in self.categorical_columns:
+                if self.encodings[c] == "hash":
+                    continue
+                values = df[c].astype(str)
+                counts[c] = _add_counts(counts.get(c), values.value_counts(dropna=False))
+                if self.encodings[c] == "target":
+                    label_sums[c] = _add_counts(label_sums.get(c), y.groupby(values.to_numpy()).sum())
+            labels += float(y.sum()) if y is not None else 0.0
+            rows += len(df)
+        if not rows:
+            raise ValueError("No rows to fit the feature pipeline on")
+
+        # build_features layout: numeric columns, then one-hot columns
+        # without each column's first (baseline) value
+        self.vocabularies = {c: sorted(counts[c].index.tolist()) for c in counts}
+        self.columns = list(self.numeric_columns)
+        for c in self.categorical_columns:
+            if self.encodings[c] == "onehot":
+                self.columns += [f"{c}_{v}" for v in self.vocabularies[c][1:]]
+
+        # build_features fills numeric gaps with 0
+        self.fill_values = {c: 0.0 for c in self.numeric_columns}
+        self.encoding_tables = {}
+        prior = labels / rows
+        m = self.target_smoothing
+        for c in self.categorical_columns:
+            encoding = self.encodings[c]
+            if encoding == "onehot":
+                continue
+            if encoding == "hash":
+                self.columns += [f"{c}_hash_{k}" for k in range(self.hash_features)]
+                continue
+            if encoding == "frequency":
+                table = counts[c] / rows
+            else:
+                table = (label_sums[c] + m * prior) / (counts[c] + m)
+                self.fill_values[c] = prior
+            self.encoding_tables[c] = [float(table[v]) for v in self.vocabularies[c]]
+            self.columns.append(f"{c}_{'freq' if encoding == 'frequency' else 'target'}")
+        self._build_index()
+        return self
+
+    def _fit_schema(self, df: pd.DataFrame) -> None:
+        X_raw = df.drop(columns=[c for c in ["risk_label", "label"] if c in df.columns])
+        self.numeric_columns = X_raw.select_dtypes(include=["number"]).columns.tolist()
+        self.categorical_columns = X_raw.select_dtypes(
+            include=["object", "category", "bool", "string"]
+        ).columns.tolist()
+        self.encodings = {
+            c: self.encoding_spec.get(c, self.default_encoding) for c in self.categorical_columns
+        }
+
+    def transform_chunks(self, chunks: Iterable[pd.DataFrame], n_rows: int, sparse: bool = False):
+        """
+        Encode chunks into one matrix of n_rows rows, preallocated
+        instead of built from a concatenated frame, so only one chunk's
+        rows are held besides the matrix.
+        """
+        if sparse:
+            return sp.vstack([self.transform(chunk, sparse=True) for chunk in chunks], format="csr")
+        X = np.empty((n_rows, self.n_features), dtype=np.float32)
+        start = 0
+        for chunk in chunks:
+            X[start:start + len(chunk)] = self.transform(chunk)
+            start += len(chunk)
+        if start != n_rows:
+            raise ValueError(f"Expected {n_rows} rows, got {start}")
+        return X
+
+    def _build_index(self):
+        position = {name: i for i, name in enumerate(self.columns)}
+        self._numeric_index = {c: position[c] for c in self.numeric_columns}
+        self._category_index = {
+            c: {
+                v: position[f"{c}_{v}"]
+                for v in vocab
+                if f"{c}_{v}" in position
+            }
+            for c, vocab in self.vocabularies.items()
+            if self.encodings.get(c, "onehot") == "onehot"
+        }
+        self._encoded_index = {}
+        self._tables = {}
+        self._lookups = {}
+        for c, encoding in self.encodings.items():
+            if encoding == "hash":
+                self._encoded_index[c] = position[f"{c}_hash_0"]
+            elif encoding in ("frequency", "target"):
+                suffix = "freq" if encoding == "frequency" else "target"
+                self._encoded_index[c] = position[f"{c}_{suffix}"]
+                unknown = self.fill_values.get(c, 0.0) if encoding == "target" else 0.0
+                table = self.encoding_tables[c]
+                self._tables[c] = np.array(table + [unknown], dtype=np.float32)
+                self._lookups[c] = dict(zip(self.vocabularies[c], table))
+
+    def _bucket(self, value: str) -> int:
+        return zlib.crc32(value.encode("utf-8")) % self.hash_features
+
+    def _buckets(self, values: pd.Series) -> np.ndarray:
+        """Hash bucket per value, hashing each distinct value once."""
+        codes, uniques = pd.factorize(values)
+        buckets = np.fromiter((self._bucket(u) for u in uniques), dtype=np.int64, count=len(uniques))
+        return buckets[codes]
+
+    def transform(self, data, sparse: bool = False):
+        """
+        Encode a dict, a list of dicts, a DataFrame or a pyarrow Table into
+        a float32 matrix with columns in self.columns order.
+
+        sparse=True returns a scipy.sparse CSR matrix instead, built
+        without materialising the dense matrix for frames and tables.
+        """
+        if isinstance(data, pd.DataFrame):
+            return self._transform_frame(data, sparse)
+        if pa is not None and isinstance(data, (pa.Table, pa.RecordBatch)):
+            return self._transform_arrow(data, sparse)
+        if isinstance(data, dict):
+            data = [data]
+        X = self._transform_records(data)
+        return sp.csr_matrix(X) if sparse else X
+
+    def fingerprint(self) -> str:
+        """Digest of the settings and fitted state; equal digests encode identically."""
+        state = {
+            "version": self.VERSION,
+            "encoding_spec": self.encoding_spec,
+            "default_encoding": self.default_encoding,
+            "hash_features": self.hash_features,
+            "target_smoothing": self.target_smoothing,
+            "ip_features": self.ip_features,
+            "columns": self.columns,
+            "numeric_columns": self.numeric_columns,
+            "fill_values": self.fill_values,
+            "vocabularies": self.vocabularies,
+            "encoding_tables": self.encoding_tables,
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:16]
+
+    def fit_transform(self, df: pd.DataFrame, sparse: bool = False):
+        return self.fit(df).transform(df, sparse=sparse)
+
+    @staticmethod
+    def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        if "hour" in df.columns and "timestamp" not in df.columns:
+            return df
+        return add_time_features(df.copy())
+
+    def _with_ip_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.ip_features or "ip_address" not in df.columns or IP_FEATURES[0] in df.columns:
+            return df
+        df = df.copy()
+        for name, values in ip_features(df["ip_address"].to_numpy(dtype=object)).items():
+            df[name] = values
+        return df
+
+    def _transform_frame(self, df: pd.DataFrame, sparse: bool = False):
+        df = self._with_ip_features(self._prepare_frame(df))
+        n = len(df)
+        X = _MatrixBuilder(n, self.n_features, sparse)
+        rows = np.arange(n)
+
+        for col, j in self._numeric_index.items():
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors="coerce")
+                X.set_column(j, values.fillna(self.fill_values[col]).to_numpy(dtype=np.float32))
+            else:
+                X.set_column(j, self.fill_values[col])
+
+        for col, index in self._category_index.items():
+            if col not in df.columns or not index:
+                continue
+            vocab = self.vocabularies[col]
+            codes = pd.Index(vocab).get_indexer(df[col].astype(str))  # -1 when unseen
+            # vocabulary position -> output column (-1 for the dropped baseline)
+            lookup = np.array([index.get(v, -1) for v in vocab] + [-1], dtype=np.int64)
+            target = lookup[codes]
+            hit = target >= 0
+            X.set_ones(rows[hit], target[hit])
+
+        for col, j in self._encoded_index.items():
+            if self.encodings[col] == "hash":
+                if col in df.columns:
+                    X.set_ones(rows, j + self._buckets(df[col].astype(str)))
+                continue
+            table = self._tables[col]
+            if col in df.columns:
+                codes = pd.Index(self.vocabularies[col]).get_indexer(df[col].astype(str))
+                X.set_column(j, table[codes])
+            else:
+                X.set_column(j, table[-1])
+
+        return X.build()
+
+    def _transform_arrow(self, table, sparse: bool = False):
+        """
+        Encode straight from Arrow buffers: numeric columns are cast and
+        viewed as NumPy arrays, categories are matched against the
+        vocabulary with pc.index_in. No pandas conversion, no per-row work.
+        """
+        n = table.num_rows
+        X = _MatrixBuilder(n, self.n_features, sparse)
+        rows = np.arange(n)
+        names = set(table.column_names)
+
+        derived = {}
+        if "hour" not in names:
+            if "timestamp" in names:
+                hour = _arrow_hours(table.column("timestamp"))
+            else:
+                hour = np.zeros(n, dtype=np.int64)
+            derived = {"hour": hour, "is_night": ((hour < 7) | (hour > 20)).astype(np.int64)}
+        if self.ip_features and "ip_address" in names and IP_FEATURES[0] not in names:
+            addresses = table.column("ip_address").to_numpy(zero_copy_only=False)
+            derived.update(ip_features(addresses))
+
+        for col, j in self._numeric_index.items():
+            if col in derived:
+                X.set_column(j, derived[col])
+            elif col in names:
+                values = pc.cast(table.column(col), pa.float64(), safe=False)
+                values = pc.fill_null(values, self.fill_values[col])
+                X.set_column(j, values.to_numpy())
+            else:
+                X.set_column(j, self.fill_values[col])
+
+        for col, index in self._category_index.items():
+            if col not in names or not index:
+                continue
+            vocab = self.vocabularies[col]
+            values = pc.cast(table.column(col), pa.string())
+            codes = pc.index_in(values, value_set=pa.array(vocab, pa.string()))
+            codes = pc.fill_null(codes, len(vocab)).to_numpy()
+            lookup = np.array([index.get(v, -1) for v in vocab] + [-1], dtype=np.int64)
+            target = lookup[codes]
+            hit = target >= 0
+            X.set_ones(rows[hit], target[hit])
+
+        for col, j in self._encoded_index.items():
+            if col not in names:
+                if self.encodings[col] != "hash":
+                    X.set_column(j, self._tables[col][-1])
+                continue
+            values = pc.cast(table.column(col), pa.string())
+            if self.encodings[col] == "hash":
+                # Nulls hash like the 'nan' a CSV-loaded frame would hold
+                values = pc.fill_null(values, "nan").to_numpy(zero_copy_only=False)
+                X.set_ones(rows, j + self._buckets(pd.Series(values, dtype=object)))
+                continue
+            vocab = self.vocabularies[col]
+            codes = pc.index_in(values, value_set=pa.array(vocab, pa.string()))
+            codes = pc.fill_null(codes, len(vocab)).to_numpy()
+            X.set_column(j, self._tables[col][codes])
+
+        return X.build()
+
+    def _transform_records(self, records) -> np.ndarray:
+        X = np.zeros((len(records), self.n_features), dtype=np.float32)
+        derived = {}
+        if self.ip_features and IP_FEATURES[0] in self._numeric_index:
+            # One vectorized pass over the batch's addresses
+            derived = ip_features([record.get("ip_address") for record in records])
+        for r, record in enumerate(records):
+            if "hour" not in record and "timestamp" in record:
+                record = dict(record)
+                record["hour"] = _hour_of(record["timestamp"])
+                record["is_night"] = int(record["hour"] < 7 or record["hour"] > 20)
+            if derived and "ip_address" in record and IP_FEATURES[0] not in record:
+                record = {**record, **{name: values[r] for name, values in derived.items()}}
+
+            for col, j in self._numeric_index.items():
+                value = record.get(col)
+                try:
+                    X[r, j] = self.fill_values[col] if value is None else float(value)
+                except (TypeError, ValueError):
+                    X[r, j] = self.fill_values[col]
+                if X[r, j] != X[r, j]:  # NaN
+                    X[r, j] = self.fill_values[col]
+
+            for col, index in self._category_index.items():
+                if col in record:
+                    j = index.get(str(record[col]))
+                    if j is not None:
+                        X[r, j] = 1.0
+
+            for col, j in self._encoded_index.items():
+                if self.encodings[col] == "hash":
+                    if col in record:
+                        X[r, j + self._bucket(str(record[col]))] = 1.0
+                elif col in record:
+                    X[r, j] = self._lookups[col].get(str(record[col]), self._tables[col][-1])
+                else:
+                    X[r, j] = self._tables[col][-1]
+        return X
+
+
+def _add_counts(total: Optional[pd.Series], counts: pd.Series) -> pd.Series:
+    return counts if total is None else total.add(counts, fill_value=0)
+
+
+class _MatrixBuilder:
+    """Collects encoded values into a dense array or CSR triplets."""
+
+    def __init__(self, n: int, n_features: int, sparse: bool):
+        self.shape = (n, n_features)
+        self.sparse = sparse
+        self.dense = None if sparse else np.zeros(self.shape, dtype=np.float32)
+        self._rows, self._cols, self._values = [], [], []
+
+    def set_column(self, j: int, values) -> None:
+        if not self.sparse:
+            self.dense[:, j] = values
+            return
+        values = np.broadcast_to(np.asarray(values, dtype=np.float32), (self.shape[0],))
+        nonzero = np.flatnonzero(values)
+        self._rows.append(nonzero)
+        self._cols.append(np.full(len(nonzero), j))
+        self._values.append(values[nonzero])
+
+    def set_ones(self, rows: np.ndarray, cols: np.ndarray) -> None:
+        if not self.sparse:
+            self.dense[rows, cols] = 1.0
+            return
+        self._rows.append(rows)
+        self._cols.append(cols)
+        self._values.append(np.ones(len(rows), dtype=np.float32))
+
+    def build(self):
+        if not self.sparse:
+            return self.dense
+        if not self._rows:
+            return sp.csr_matrix(self.shape, dtype=np.float32)
+        return sp.csr_matrix(
+            (np.concatenate(self._values), (np.concatenate(self._rows), np.concatenate(self._cols))),
+            shape=self.shape, dtype=np.float32,
+        )
+
+
+def _arrow_hours(column) -> np.ndarray:
+    """Hour per row of an Arrow timestamp/string column, 0 where unparseable."""
+    if not pa.types.is_timestamp(column.type):
+        try:
+            column = pc.cast(column, pa.timestamp("us"))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Offsets or odd formats: parse like add_time_features does
+            ts = pd.to_datetime(column.to_pandas(), errors="coerce")
+            return ts.dt.hour.fillna(0).astype(np.int64).to_numpy()
+    return pc.fill_null(pc.hour(column), 0).to_numpy().astype(np.int64)
+
+
+def _hour_of(value) -> int:
+    """Hour of a timestamp value, 0 when it can't be parsed (like NaT in training)."""
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        return value.hour
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).hour
+    except ValueError:
+        ts = pd.to_datetime(value, errors="coerce")
+        return 0 if pd.isna(ts) else int(ts.hour)
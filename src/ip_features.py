@@ -0,0 +1,371 @@
+"""
+Vectorized IP address parsing, subnet features and CIDR range lookups.
+
+Addresses arrive as strings. parse_ips() turns a whole column into
+integers: each distinct value is parsed once, dotted-quad IPv4 is
+parsed with NumPy byte arithmetic (no per-row Python), and only the
+remaining values (IPv6, malformed input) go through the ipaddress module.
+
+CidrIndex flattens a list of (possibly nested) networks into disjoint
+sorted ranges, so looking up an array of addresses is one searchsorted
+per address family, O(log n) per address, with longest-prefix-match
+labels. It backs the internal/external flag and reputation lists
+(the src_ip_reputation condition in configs/alert_rules.yaml).
+
+Settings come from configs/config.yaml (feature_engineering.ip).
+"""
+
+import ipaddress
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config_store import get_config_store
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# RFC 1918, loopback, link-local, CGNAT and their IPv6 counterparts
+DEFAULT_INTERNAL_NETWORKS = [
+    "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "127.0.0.0/8",
+    "169.254.0.0/16", "100.64.0.0/10", "::1/128", "fc00::/7", "fe80::/10",
+]
+
+IP_FEATURES = ("ip_is_ipv6", "ip_prefix16", "ip_prefix24", "ip_is_internal")
+
+_IPV4_WIDTH = 15  # len("255.255.255.255")
+
+
+def load_ip_settings() -> Dict:
+    """IP settings from configs/config.yaml (feature_engineering.ip)."""
+    settings = {"internal_networks": list(DEFAULT_INTERNAL_NETWORKS), "reputation_file": None}
+    settings.update(
+        get_config_store().value("config", "feature_engineering", "ip", default=None) or {}
+    )
+    return settings
+
+
+class IPArray(NamedTuple):
+    """Parsed addresses, one entry per input value."""
+
+    version: np.ndarray          # int8: 4, 6, or 0 when unparseable
+    v4: np.ndarray               # uint32 address, 0 unless version == 4
+    v6: Optional[np.ndarray]     # object array of int, None unless any IPv6
+
+    def __len__(self) -> int:
+        return len(self.version)
+
+
+def _parse_ipv4_bytes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dotted-quad strings -> (uint32 addresses, valid mask).
+
+    Works on the fixed-width byte matrix of the strings, one column of
+    characters at a time. Rejects anything ipaddress would reject:
+    wrong dot count, empty or >3-digit octets, octets > 255 and leading
+    zeros.
+    """
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=bool)
+    valid = np.char.str_len(values) <= _IPV4_WIDTH
+    try:
+        encoded = values.astype(f"S{_IPV4_WIDTH}")
+    except UnicodeEncodeError:
+        # Non-ASCII can't be an IPv4 address; blank those rows out
+        ascii_only = np.array([v.isascii() for v in values], dtype=bool)
+        valid &= ascii_only
+        encoded = np.where(ascii_only, values, "").astype(f"S{_IPV4_WIDTH}")
+    chars = encoded.view(np.uint8).reshape(n, _IPV4_WIDTH)
+
+    address = np.zeros(n, dtype=np.uint32)
+    octet = np.zeros(n, dtype=np.uint32)
+    digits = np.zeros(n, dtype=np.uint8)
+    leading_zero = np.zeros(n, dtype=bool)
+    dots = np.zeros(n, dtype=np.uint8)
+
+    def close_octet(done):
+        nonlocal address, octet, digits, leading_zero, valid
+        ok = (octet <= 255) & (digits >= 1) & (digits <= 3) & ~leading_zero
+        valid &= ~done | ok
+        address = np.where(done, (address << 8) | (octet & 255), address)
+        octet = np.where(done, 0, octet)
+        digits = np.where(done, 0, digits)
+        leading_zero = np.where(done, False, leading_zero)
+
+    for j in range(_IPV4_WIDTH):
+        c = chars[:, j]
+        is_digit = (c >= 48) & (c <= 57)
+        is_dot = c == 46
+        valid &= is_digit | is_dot | (c == 0)
+        leading_zero |= is_digit & (digits == 1) & (octet == 0)
+        octet = np.where(is_digit, octet * 10 + (c - 48), octet)
+        digits = digits + is_digit
+        if is_dot.any():
+            close_octet(is_dot)
+            dots += is_dot
+    close_octet(np.ones(n, dtype=bool))
+    valid &= dots == 3
+
+    return np.where(valid, address, 0).astype(np.uint32), valid
+
+
+def parse_ips(values) -> IPArray:
+    """Parse a sequence/Series/array of address strings into an IPArray."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    m = len(uniques)
+
+    version = np.zeros(m + 1, dtype=np.int8)   # last slot: missing values
+    v4 = np.zeros(m + 1, dtype=np.uint32)
+    v6 = None
+
+    is_str = np.array([isinstance(u, str) for u in uniques], dtype=bool)
+    strings = uniques[is_str].astype(str) if is_str.any() else np.zeros(0, dtype=str)
+    parsed, ok = _parse_ipv4_bytes(strings)
+    string_index = np.flatnonzero(is_str)
+    version[string_index[ok]] = 4
+    v4[string_index[ok]] = parsed[ok]
+
+    # IPv6, IPv4-mapped and anything the fast path rejected
+    for i in string_index[~ok]:
+        try:
+            address = ipaddress.ip_address(uniques[i].strip())
+        except ValueError:
+            continue
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if address.version == 4:
+            version[i] = 4
+            v4[i] = int(address)
+        else:
+            if v6 is None:
+                v6 = np.full(m + 1, None, dtype=object)
+            version[i] = 6
+            v6[i] = int(address)
+
+    codes = np.where(codes < 0, m, codes)
+    return IPArray(version[codes], v4[codes], None if v6 is None else v6[codes])
+
+
+def ipv4_to_int(values) -> np.ndarray:
+    """uint32 per IPv4 address, 0 for anything else."""
+    return parse_ips(values).v4
+
+
+def int_to_ipv4(addresses) -> np.ndarray:
+    """Dotted-quad strings for an array of uint32 addresses."""
+    addresses = np.asarray(addresses, dtype=np.uint32)
+    octets = [(addresses >> shift) & 255 for shift in (24, 16, 8, 0)]
+    out = octets[0].astype(str).astype(object)
+    for octet in octets[1:]:
+        out = out + "." + octet.astype(str).astype(object)
+    return out
+
+
+def _network_ranges(networks) -> Dict[int, List[Tuple[int, int, int]]]:
+    """(start, end, label index) per family, for flattening."""
+    ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+    for label_index, network in enumerate(networks):
+        net = ipaddress.ip_network(network, strict=False)
+        ranges[net.version].append((int(net.network_address), int(net.broadcast_address), label_index))
+    return ranges
+
+
+def _flatten(ranges: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Disjoint (start, end, label) segments from nested or disjoint ranges.
+
+    CIDR blocks never partially overlap, so a stack walk in start order
+    (outer blocks first) gives every address the label of the innermost
+    block containing it.
+    """
+    segments = []
+    stack: List[Tuple[int, int]] = []  # (end, label) of open blocks
+    position = None
+
+    def emit(start, end, label):
+        if start <= end:
+            segments.append((start, end, label))
+
+    for start, end, label in sorted(ranges, key=lambda r: (r[0], -(r[1] - r[0]))):
+        while stack and stack[-1][0] < start:
+            open_end, open_label = stack.pop()
+            emit(position, open_end, open_label)
+            position = open_end + 1
+        if stack:
+            emit(position, start - 1, stack[-1][1])
+        position = start
+        stack.append((end, label))
+    while stack:
+        open_end, open_label = stack.pop()
+        emit(position, open_end, open_label)
+        position = open_end + 1
+    return segments
+
+
+class CidrIndex:
+    """
+    Sorted disjoint address ranges with a label per range.
+
+    Built from CIDR strings (label = True) or a {cidr: label} mapping.
+    When networks nest, the most specific one wins.
+    """
+
+    def __init__(self, networks: Union[Iterable[str], Dict[str, object]]):
+        if isinstance(networks, dict):
+            cidrs, self.labels = list(networks.keys()), list(networks.values())
+        else:
+            cidrs = list(networks)
+            self.labels = [True] * len(cidrs)
+        self.networks = cidrs
+
+        ranges = _network_ranges(cidrs)
+        v4 = _flatten(ranges[4])
+        self._v4_starts = np.array([s for s, _, _ in v4], dtype=np.uint64)
+        self._v4_ends = np.array([e for _, e, _ in v4], dtype=np.uint64)
+        self._v4_labels = np.array([l for _, _, l in v4], dtype=np.int64)
+        v6 = _flatten(ranges[6])
+        # 128-bit bounds as Python ints; searchsorted compares them as objects
+        self._v6_starts = np.array([s for s, _, _ in v6] + [None], dtype=object)[:-1]
+        self._v6_ends = np.array([e for _, e, _ in v6] + [None], dtype=object)[:-1]
+        self._v6_labels = np.array([l for _, _, l in v6], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    @classmethod
+    def from_file(cls, path) -> "CidrIndex":
+        """
+        Read one network per line, optionally followed by a label
+        (whitespace or comma separated). Blank lines and # comments are
+        skipped.
+        """
+        networks: Dict[str, object] = {}
+        for line in Path(path).read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.replace(",", " ").split(None, 1)
+            networks[parts[0]] = parts[1].strip() if len(parts) > 1 else True
+        return cls(networks)
+
+    def lookup(self, addresses) -> np.ndarray:
+        """Index into self.labels per address, -1 where no network matches."""
+        ips = addresses if isinstance(addresses, IPArray) else parse_ips(addresses)
+        out = np.full(len(ips), -1, dtype=np.int64)
+
+        is_v4 = ips.version == 4
+        if is_v4.any() and len(self._v4_starts):
+            query = ips.v4[is_v4].astype(np.uint64)
+            pos = np.searchsorted(self._v4_starts, query, side="right") - 1
+            safe = np.maximum(pos, 0)
+            hit = (pos >= 0) & (query <= self._v4_ends[safe])
+            out[np.flatnonzero(is_v4)[hit]] = self._v4_labels[safe[hit]]
+
+        is_v6 = ips.version == 6
+        if is_v6.any() and len(self._v6_starts):
+            query = ips.v6[is_v6]
+            pos = np.searchsorted(self._v6_starts, query, side="right") - 1
+            safe = np.maximum(pos, 0)
+            hit = (pos >= 0) & np.array(
+                [q <= e for q, e in zip(query, self._v6_ends[safe])], dtype=bool
+            )
+            out[np.flatnonzero(is_v6)[hit]] = self._v6_labels[safe[hit]]
+        return out
+
+    def contains(self, addresses) -> np.ndarray:
+        """True where an address falls in any network."""
+        return self.lookup(addresses) >= 0
+
+    def label(self, addresses, default=None) -> np.ndarray:
+        """Label of the most specific matching network per address."""
+        index = self.lookup(addresses)
+        labels = np.array(list(self.labels) + [default], dtype=object)
+        return labels[index]
+
+
+def ip_features(values, internal: Optional[CidrIndex] = None) -> Dict[str, np.ndarray]:
+    """
+    Numeric features per address.
+
+    ip_prefix16 / ip_prefix24 are the IPv4 /16 and /24 network numbers
+    (exact in float32, unlike the full 32-bit address), 0 for IPv6 or
+    unparseable input. ip_is_internal uses the configured internal
+    networks.
+    """
+    ips = parse_ips(values)
+    internal = internal if internal is not None else get_internal_index()
+    return {
+        "ip_is_ipv6": (ips.version == 6).astype(np.int8),
+        "ip_prefix16": (ips.v4 >> 16).astype(np.int32),
+        "ip_prefix24": (ips.v4 >> 8).astype(np.int32),
+        "ip_is_internal": internal.contains(ips).astype(np.int8),
+    }
+
+
+def add_ip_features(df: pd.DataFrame, column: str = "ip_address") -> pd.DataFrame:
+    """Add IP_FEATURES columns derived from `column` (zeros if it is missing)."""
+    if column in df.columns:
+        for name, values in ip_features(df[column].to_numpy(dtype=object)).items():
+            df[name] = values
+    else:
+        for name in IP_FEATURES:
+            df[name] = np.int8(0)
+    return df
+
+
+def subnet_labels(values, prefix: int = 24) -> np.ndarray:
+    """'a.b.c.0/24'-style network per IPv4 address; the address itself otherwise."""
+    ips = parse_ips(values)
+    mask = np.uint32((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF)
+    networks = int_to_ipv4(ips.v4 & mask) + f"/{prefix}"
+    return np.where(ips.version == 4, networks, np.asarray(values, dtype=object))
+
+
+_internal: Optional[CidrIndex] = None
+_reputation: Optional[CidrIndex] = None
+_reputation_loaded = False
+
+
+def get_internal_index() -> CidrIndex:
+    """Index of feature_engineering.ip.internal_networks."""
+    global _internal
+    if _internal is None:
+        _internal = CidrIndex(load_ip_settings()["internal_networks"])
+    return _internal
+
+
+def get_reputation_index() -> Optional[CidrIndex]:
+    """Index of feature_engineering.ip.reputation_file, None if not configured."""
+    global _reputation, _reputation_loaded
+    if not _reputation_loaded:
+        path = load_ip_settings().get("reputation_file")
+        if path:
+            path = Path(path)
+            path = path if path.is_absolute() else ROOT / path
+            try:
+                _reputation = CidrIndex.from_file(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load IP reputation list {path}: {e}")
+        _reputation_loaded = True
+    return _reputation
+
+
+def ip_reputation(values) -> np.ndarray:
+    """
+    Reputation per address: the reputation list's label where one
+    matches, otherwise 'internal' or 'external'.
+    """
+    ips = parse_ips(values)
+    result = np.where(get_internal_index().contains(ips), "internal", "external").astype(object)
+    reputation = get_reputation_index()
+    if reputation is not None:
+        labels = reputation.label(ips)
+        listed = labels != None  # noqa: E711 - elementwise on an object array
+        result[listed] = labels[listed]
+    return result
@@ -0,0 +1,326 @@
+"""
+In-process instrumentation: counters and fixed-bucket latency histograms.
+
+Writers never take a lock. Every metric keeps one cell per thread, and a
+thread only ever touches its own cell, so recording is a dict lookup and
+an add. Readers sum the cells when a snapshot or a Prometheus scrape is
+taken. The bucket layout is fixed, so memory use does not grow with
+traffic, and p50/p95/p99 are estimated by interpolating inside a bucket.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond compiled-forest scoring up to slow batches
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _label_set(labels: Optional[Dict[str, str]]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items
+    )
+    return "{" + body + "}"
+
+
+class Counter:
+    """Monotonic counter with per-thread cells."""
+
+    def __init__(self, name: str, labels: LabelSet = ()):
+        self.name = name
+        self.labels = labels
+        self._cells: Dict[int, List[float]] = {}
+        self._samples = deque(maxlen=120)
+
+    def inc(self, amount: float = 1) -> None:
+        cell = self._cells.get(threading.get_ident())
+        if cell is None:
+            cell = self._cells.setdefault(threading.get_ident(), [0])
+        cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in list(self._cells.values()))
+
+    def rate(self, window: float = 60.0) -> float:
+        """
+        Per-second increase over roughly the last `window` seconds.
+
+        Each call stores a (time, value) sample; the rate is measured
+        against the oldest sample still inside the window.
+        """
+        now, value = time.monotonic(), self.value
+        samples = self._samples
+        while len(samples) > 1 and now - samples[1][0] >= window:
+            samples.popleft()
+        samples.append((now, value))
+        start, start_value = samples[0]
+        if now - start <= 0:
+            return 0.0
+        return (value - start_value) / (now - start)
+
+
+class Histogram:
+    """Fixed-bucket histogram with per-thread cells."""
+
+    def __init__(self, name: str, labels: LabelSet = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._cells: Dict[int, list] = {}
+
+    def _cell(self) -> list:
+        cell = self._cells.get(threading.get_ident())
+        if cell is None:
+            # counts per bucket (+Inf last), then running sum
+            cell = self._cells.setdefault(
+                threading.get_ident(), [[0] * (len(self.buckets) + 1), 0.0]
+            )
+        return cell
+
+    def observe(self, value: float) -> None:
+        cell = self._cell()
+        cell[0][bisect.bisect_left(self.buckets, value)] += 1
+        cell[1] += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a `with` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def totals(self) -> Tuple[List[int], float]:
+        """(per-bucket counts with +Inf last, sum of observations)."""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for bucket_counts, value_sum in list(self._cells.values()):
+            for i, c in enumerate(bucket_counts):
+                counts[i] += c
+            total += value_sum
+        return counts, total
+
+    @property
+    def count(self) -> int:
+        return sum(self.totals()[0])
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> Optional[float]:
+        """Estimated q-quantile (linear within the bucket), None if empty."""
+        counts = counts if counts is not None else self.totals()[0]
+        n = sum(counts)
+        if n == 0:
+            return None
+        rank = q * n
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    # Overflow bucket has no upper bound
+                    return self.buckets[-1]
+                return lower + (self.buckets[i] - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Count, mean and p50/p95/p99 in milliseconds."""
+        counts, total = self.totals()
+        n = sum(counts)
+
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "count": n,
+            "mean_ms": ms(total / n) if n else None,
+            "p50_ms": ms(self.quantile(0.50, counts)),
+            "p95_ms": ms(self.quantile(0.95, counts)),
+            "p99_ms": ms(self.quantile(0.99, counts)),
+        }
+
+
+class MetricsRegistry:
+    """Named metrics plus gauges and counters computed at scrape time."""
+
+    def __init__(self, namespace: str = "cyberintent"):
+        self.namespace = namespace
+        self.started_at = time.time()
+        self._metrics: Dict[Tuple[str, LabelSet], object] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._callbacks: Dict[Tuple[str, LabelSet], Tuple[str, str, Callable[[], Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, kind: str, name: str, help: str, labels, **kwargs):
+        key = (name, _label_set(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            # Creation is rare (first use of a name/label set); recording is not locked
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, key[1], **kwargs)
+                    self._help.setdefault(name, (kind, help))
+                    self._metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get(Counter, "counter", name, help, labels)
+
+    def histogram(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None,
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, "histogram", name, help, labels, buckets=buckets)
+
+    def gauge(self, name: str, help: str, fn: Callable[[], Optional[float]],
+              labels: Optional[Dict[str, str]] = None) -> None:
+        """Register a gauge whose value is read from `fn()` at scrape time."""
+        self._callbacks[(name, _label_set(labels))] = ("gauge", help, fn)
+
+    def counter_fn(self, name: str, help: str, fn: Callable[[], Optional[float]],
+                   labels: Optional[Dict[str, str]] = None) -> None:
+        """
+        Register a counter whose value is read from `fn()` at scrape time,
+        for totals kept elsewhere (e.g. CPU seconds); `fn` must not decrease.
+        """
+        self._callbacks[(name, _label_set(labels))] = ("counter", help, fn)
+
+    def collect(self, name: str) -> List[object]:
+        """All label variants of one metric."""
+        return [m for (n, _), m in list(self._metrics.items()) if n == name]
+
+    def total(self, name: str) -> float:
+        """Counter value summed over all label sets."""
+        return sum(m.value for m in self.collect(name))
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        by_name: Dict[str, List[object]] = {}
+        for (name, _), metric in sorted(list(self._metrics.items()), key=lambda kv: kv[0]):
+            by_name.setdefault(name, []).append(metric)
+
+        for name, metrics in by_name.items():
+            kind, help = self._help[name]
+            full = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} {kind}")
+            for metric in metrics:
+                if kind == "counter":
+                    lines.append(f"{full}{_format_labels(metric.labels)} {metric.value:g}")
+                    continue
+                counts, total = metric.totals()
+                cumulative = 0
+                for bound, c in zip(metric.buckets + (float("inf"),), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(
+                        f"{full}_bucket{_format_labels(metric.labels, ('le', le))} {cumulative}"
+                    )
+                lines.append(f"{full}_sum{_format_labels(metric.labels)} {total:g}")
+                lines.append(f"{full}_count{_format_labels(metric.labels)} {cumulative}")
+
+        described = set()
+        for (name, labels), (kind, help, fn) in sorted(list(self._callbacks.items()), key=lambda kv: kv[0]):
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is None:
+                continue
+            full = f"{self.namespace}_{name}"
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {full} {help}")
+                lines.append(f"# TYPE {full} {kind}")
+            lines.append(f"{full}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class ProcessStats:
+    """CPU and memory usage of this process (Linux /proc, None elsewhere)."""
+
+    def __init__(self):
+        self._last = (time.monotonic(), self._cpu_seconds())
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        t = os.times()
+        return t.user + t.system
+
+    def cpu_percent(self) -> float:
+        """Process CPU use since the previous call (100 = one full core)."""
+        now, cpu = time.monotonic(), self._cpu_seconds()
+        last_time, last_cpu = self._last
+        self._last = (now, cpu)
+        elapsed = now - last_time
+        return 100.0 * (cpu - last_cpu) / elapsed if elapsed > 0 else 0.0
+
+    @staticmethod
+    def resident_bytes() -> Optional[int]:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def total_memory_bytes() -> Optional[int]:
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemTotal:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def memory_percent(self) -> Optional[float]:
+        rss, total = self.resident_bytes(), self.total_memory_bytes()
+        if rss is None or not total:
+            return None
+        return 100.0 * rss / total
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                registry = MetricsRegistry()
+                registry.gauge(
+                    "process_resident_memory_bytes", "Resident memory of the process",
+                    ProcessStats.resident_bytes,
+                )
+                registry.counter_fn(
+                    "process_cpu_seconds_total", "User plus system CPU time",
+                    ProcessStats._cpu_seconds,
+                )
+                registry.gauge(
+                    "uptime_seconds", "Seconds since the metrics registry was created",
+                    lambda: time.time() - registry.started_at,
+                )
+                _metrics = registry
+    return _metrics
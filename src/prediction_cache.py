@@ -0,0 +1,131 @@
+"""Bounded LRU/TTL cache for per-event predictions."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.config_store import get_config_store
+
+
+class PredictionCache:
+    """
+    Caches prediction results keyed by the encoded feature row and the
+    model generation.
+
+    Entries are evicted least-recently-used once max_size is reached and
+    expire ttl_seconds after insertion. Keys include the generation of the
+    bundle being scored, so a request still on the old bundle during a
+    hot swap can never store or read entries for the new one. The first
+    request on a new generation clears the cache; requests that are
+    still on a recent generation don't clear it again.
+    """
+
+    # Generations that don't clear the cache again when a request still on them binds
+    RECENT_GENERATIONS = 4
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries
+            ttl_seconds: Lifetime of an entry
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._generation: Optional[str] = None
+        self._recent = deque(maxlen=self.RECENT_GENERATIONS)
+        self._lock = threading.Lock()
+
+    def bind_generation(self, generation: str) -> None:
+        """Clear the cache when scoring first moves to a new model generation."""
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation and generation not in self._recent:
+                    if self._generation is not None:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._generation = generation
+                    self._recent.append(generation)
+
+    def key(self, row: np.ndarray, generation: str) -> bytes:
+        """Hash of one encoded feature row plus the generation that scores it."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(generation).encode())
+        h.update(np.ascontiguousarray(row, dtype=np.float32).tobytes())
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "generation": self._generation,
+        }
+
+
+_cache: Optional[PredictionCache] = None
+_cache_loaded = False
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Process-wide cache configured by api.prediction_cache in
+    configs/config.yaml, or None when disabled.
+    """
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        settings = get_config_store().value("config", "api", "prediction_cache", default=None) or {}
+        if settings.get("enabled", False):
+            _cache = PredictionCache(
+                max_size=settings.get("max_size", 10000),
+                ttl_seconds=settings.get("ttl_seconds", 300),
+            )
+        _cache_loaded = True
+    return _cache
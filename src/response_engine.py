@@ -1,39 +1,94 @@
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import time
 
+import numpy as np
 import pandas as pd
-import yaml
+
+from src.config_store import get_config_store
+from src.ip_features import ip_reputation, subnet_labels
+from src.metrics import get_metrics
 
 
 ROOT = Path(__file__).resolve().parents[1]
 
+_metrics = get_metrics()
+DEFENSE_SECONDS = _metrics.histogram(
+    "response_decision_seconds", "Time for one simulate_auto_defense pass")
+DEFENSE_RUNS = _metrics.counter("response_runs_total", "simulate_auto_defense passes")
+BLOCKED_IPS = _metrics.counter("responses_executed_total", "IPs selected for blocking")
+
+# segment_by -> event field the segment comes from
+SEGMENT_COLUMNS = {"action": "action", "subnet": "ip_address"}
+
 
 def load_risk_threshold(default: float = 0.7) -> float:
     """
-    Load default risk threshold from configs/model_config.yaml if present.
+    Default risk threshold from configs/model_config.yaml if present.
+
+    Served from the in-memory config store; edits to the file are picked
+    up without a restart.
+    """
+    try:
+        return float(get_config_store().value("model", "risk_threshold", default=default))
+    except (TypeError, ValueError):
+        return default
+
+
+def segment_labels(values, segment_by: str, subnet_prefix: int = 24) -> np.ndarray:
+    """Segment per event: the action itself, or the IPv4 subnet of its address."""
+    if segment_by not in SEGMENT_COLUMNS:
+        raise ValueError(f"Unknown segment_by '{segment_by}', expected one of {tuple(SEGMENT_COLUMNS)}")
+    values = np.asarray(values, dtype=object)
+    if segment_by == "subnet":
+        return subnet_labels(values, subnet_prefix).astype(str)
+    return values.astype(str)
+
+
+def load_segment_thresholds() -> Optional[Dict]:
+    """
+    Per-segment risk thresholds (risk_thresholds in
+    configs/model_config.tuned.yaml, written by the trainer), or None when the
+    global threshold applies to every event.
     """
-    cfg_path = ROOT / "configs" / "model_config.yaml"
-    if cfg_path.exists():
-        try:
-            with cfg_path.open("r") as f:
-                cfg = yaml.safe_load(f) or {}
-            return float(cfg.get("risk_threshold", default))
-        except Exception:
-            return default
-    return default
+    config = get_config_store().value("model", "risk_thresholds", default=None) or {}
+    if config.get("segment_by") not in SEGMENT_COLUMNS or not config.get("segments"):
+        return None
+    return config
+
+
+def segment_thresholds(values, config: Dict, default: float) -> np.ndarray:
+    """Threshold per event from its segment; `default` for unlisted segments."""
+    labels = segment_labels(values, config["segment_by"], config.get("subnet_prefix", 24))
+    return pd.Series(labels).map(config["segments"]).fillna(default).to_numpy(dtype=np.float64)
 
 
 def simulate_auto_defense(
     df: pd.DataFrame,
     risk_threshold: float,
     min_events_for_block: int = 3,
+    subnet_prefix: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     Simulate automatic defense actions:
     - Count high-risk events
-    - Aggregate by IP
+    - Aggregate by IP (or by IPv4 subnet when subnet_prefix is set, e.g.
+      24 to block a /24 that spreads an attack over many addresses)
     - Decide which IPs to 'block'
+
+    blocked_df carries each entry's reputation ('internal', 'external' or
+    the label from the configured reputation list).
     """
+    started = time.perf_counter()
+    result = _decide_blocks(df, risk_threshold, min_events_for_block, subnet_prefix)
+    DEFENSE_RUNS.inc()
+    BLOCKED_IPS.inc(len(result["blocked_ips"]))
+    DEFENSE_SECONDS.observe(time.perf_counter() - started)
+    return result
+
+
+def _decide_blocks(df: pd.DataFrame, risk_threshold: float, min_events_for_block: int,
+                   subnet_prefix: Optional[int] = None) -> Dict[str, Any]:
     if "risk_score" not in df.columns or "ip_address" not in df.columns:
         return {
             "high_risk_events": 0,
@@ -51,6 +106,9 @@ def simulate_auto_defense(
             "blocked_df": pd.DataFrame(),
         }
 
+    if subnet_prefix is not None:
+        high = high.assign(ip_address=subnet_labels(high["ip_address"].to_numpy(dtype=object), subnet_prefix))
+
     summary = (
         high.groupby("ip_address")
         .agg(
@@ -62,6 +120,8 @@ def simulate_auto_defense(
 
     blocked = summary[summary["events"] >= min_events_for_block].copy()
     blocked = blocked.sort_values("max_risk", ascending=False)
+    # Subnet labels ('a.b.c.0/24') don't parse as addresses; use the network address
+    blocked["reputation"] = ip_reputation(blocked["ip_address"].str.split("/").str[0].to_numpy(dtype=object))
 
     return {
         "high_risk_events": high_count,
@@ -0,0 +1,370 @@
+"""
+Session reconstruction and session-level features.
+
+A session is a run of events from one (user_id, ip_address) pair with
+no gap longer than gap_seconds between consecutive events. Attacks
+show up as sessions (reconnaissance, then brute force, then
+exfiltration) even when no single event looks unusual.
+
+Batch mode (build_sessions, add_session_features) sorts once by key
+and time and finds session boundaries with a vectorized diff; every
+aggregate is a cumulative sum or reduction over the sorted arrays, with
+no per-event Python. SessionTracker is the incremental counterpart for
+the stream path and produces the same session-to-date features.
+
+Settings come from configs/config.yaml (feature_engineering.sessions).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # only needed for Arrow input
+    pa = None
+
+from src.config_store import get_config_store
+from src.feature_engineering import concat_chunks, iter_raw_logs
+from src.window_features import FAILED_STATUSES, _epoch_seconds
+
+KEYS = ("user_id", "ip_address")
+SESSION_FEATURES = (
+    "session_duration",
+    "session_events",
+    "session_failure_ratio",
+    "session_bytes",
+    "session_distinct_actions",
+)
+# Event fields sessions read
+EVENT_FIELDS = ("timestamp", "action", "status", "bytes_transferred", *KEYS)
+
+
+def load_session_settings() -> Dict:
+    """Session settings from configs/config.yaml (feature_engineering.sessions)."""
+    settings = {"enabled": False, "gap_seconds": 1800, "max_keys": 100_000, "keep_closed": 1000}
+    settings.update(
+        get_config_store().value("config", "feature_engineering", "sessions", default=None) or {}
+    )
+    return settings
+
+
+def _sessionize(df: pd.DataFrame, gap_seconds: float) -> Dict[str, np.ndarray]:
+    """
+    Sorted order, session ids and session-to-date aggregates.
+
+    All returned arrays are in sorted (key, time) order; `order` maps
+    them back to df rows. Events without a parseable timestamp count as
+    arriving with their key's latest event.
+    """
+    n = len(df)
+    key_codes = np.zeros(n, dtype=np.int64)
+    for column in KEYS:
+        codes, uniques = pd.factorize(df[column] if column in df.columns else pd.Series(np.zeros(n)),
+                                      use_na_sentinel=False)
+        key_codes = key_codes * max(len(uniques), 1) + codes
+    key_codes = pd.factorize(key_codes)[0]
+
+    ts = pd.to_datetime(df["timestamp"], errors="coerce") if "timestamp" in df.columns else pd.Series(
+        pd.NaT, index=df.index)
+    seconds = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+    seconds[ts.isna().to_numpy()] = np.nan
+
+    # NaN sorts last within a key
+    order = np.lexsort((seconds, key_codes))
+    key = key_codes[order]
+    t = seconds[order]
+
+    rows = np.arange(n)
+    key_start = np.ones(n, dtype=bool)
+    key_start[1:] = key[1:] != key[:-1]
+    if np.isnan(t).any():
+        starts = np.flatnonzero(key_start)
+        latest = np.fmax.reduceat(t, starts) if n else t
+        t = np.where(np.isnan(t), np.nan_to_num(latest)[np.cumsum(key_start) - 1], t)
+
+    new_session = key_start.copy()
+    new_session[1:] |= np.diff(t) > gap_seconds
+    session = np.cumsum(new_session) - 1
+    first = np.maximum.accumulate(np.where(new_session, rows, 0))
+
+    def to_date(values):
+        """Running total of `values`, restarting at every session."""
+        total = np.cumsum(values)
+        return total - (total - values)[first]
+
+    status = df["status"] if "status" in df.columns else pd.Series("", index=df.index)
+    failed = status.astype(str).str.lower().isin(FAILED_STATUSES).to_numpy()[order]
+    nbytes = (
+        pd.to_numeric(df["bytes_transferred"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)[order]
+        if "bytes_transferred" in df.columns else np.zeros(n)
+    )
+    actions = pd.factorize(df["action"] if "action" in df.columns else pd.Series(np.zeros(n)),
+                           use_na_sentinel=False)
+    action = actions[0][order]
+    # First time each action appears in its session
+    pair = session * max(len(actions[1]), 1) + action
+    new_action = np.zeros(n, dtype=np.int64)
+    new_action[np.unique(pair, return_index=True)[1]] = 1
+
+    events = rows - first + 1
+    failures = to_date(failed.astype(np.int64))
+    return {
+        "order": order,
+        "session": session,
+        "new_session": new_session,
+        "t": t,
+        "session_duration": t - t[first],
+        "session_events": events,
+        "session_failures": failures,
+        "session_failure_ratio": failures / events,
+        "session_bytes": to_date(nbytes),
+        "session_distinct_actions": to_date(new_action),
+    }
+
+
+def add_session_features(df: pd.DataFrame, gap_seconds: Optional[float] = None) -> pd.DataFrame:
+    """
+    Session id and session-to-date features for every event.
+
+    Each event sees its session as of that event (itself included), the
+    values SessionTracker produces on the stream. `df` needs its
+    timestamp column (e.g. chunks from iter_raw_logs, before
+    add_time_features drops it). Returns a copy with the columns added.
+    """
+    if gap_seconds is None:
+        gap_seconds = load_session_settings()["gap_seconds"]
+    parts = _sessionize(df, float(gap_seconds))
+    order = parts["order"]
+
+    out = df.copy()
+    session_id = np.empty(len(df), dtype=np.int64)
+    session_id[order] = parts["session"]
+    out["session_id"] = session_id
+    for name in SESSION_FEATURES:
+        column = np.empty(len(df), dtype=np.float32)
+        column[order] = parts[name]
+        out[name] = column
+    return out
+
+
+def build_sessions(df: pd.DataFrame, gap_seconds: Optional[float] = None) -> pd.DataFrame:
+    """
+    One row per session: session_id, user_id, ip_address, start, end,
+    duration_seconds, events, failures, failure_ratio, bytes,
+    distinct_actions, and attack (any event labelled malicious) when
+    df has risk_label. Session ids match add_session_features.
+    """
+    if gap_seconds is None:
+        gap_seconds = load_session_settings()["gap_seconds"]
+    parts = _sessionize(df, float(gap_seconds))
+    order = parts["order"]
+    starts = np.flatnonzero(parts["new_session"])
+    ends = np.append(starts[1:], len(order))[:len(starts)] - 1
+
+    sessions = pd.DataFrame({"session_id": np.arange(len(starts))})
+    first_rows = order[starts]
+    for column in KEYS:
+        if column in df.columns:
+            sessions[column] = df[column].iloc[first_rows].to_numpy()
+    sessions["start"] = pd.to_datetime(parts["t"][starts], unit="s")
+    sessions["end"] = pd.to_datetime(parts["t"][ends], unit="s")
+    sessions["duration_seconds"] = parts["session_duration"][ends]
+    sessions["events"] = parts["session_events"][ends]
+    sessions["failures"] = parts["session_failures"][ends]
+    sessions["failure_ratio"] = parts["session_failure_ratio"][ends]
+    sessions["bytes"] = parts["session_bytes"][ends]
+    sessions["distinct_actions"] = parts["session_distinct_actions"][ends]
+    if "risk_label" in df.columns and len(starts):
+        labels = df["risk_label"].to_numpy(dtype=np.int64)[order]
+        sessions["attack"] = np.maximum.reduceat(labels, starts).astype(np.int8)
+    return sessions.sort_values(["start", "session_id"], kind="stable").reset_index(drop=True)
+
+
+def load_sessions(path: str = "data/sample_logs.csv", gap_seconds: Optional[float] = None) -> pd.DataFrame:
+    """build_sessions over a log file (read in dtype-declared chunks, timestamps kept)."""
+    return build_sessions(concat_chunks(iter_raw_logs(path)), gap_seconds)
+
+
+class _Session:
+    __slots__ = ("session_id", "start", "last", "events", "failures", "bytes", "actions")
+
+    def __init__(self, session_id: int, t: float):
+        self.session_id = session_id
+        self.start = t
+        self.last = t
+        self.events = 0
+        self.failures = 0
+        self.bytes = 0.0
+        self.actions = set()
+
+
+class SessionTracker:
+    """
+    Open sessions per (user_id, ip_address), updated one event at a time.
+
+    update() returns the event's session-to-date features, as
+    add_session_features computes them in batch. Sessions that see no
+    event for gap_seconds (event time) are closed and their summaries
+    kept in `closed` (the most recent keep_closed); at most max_keys
+    sessions stay open, closing the least recently seen first.
+    Thread-safe.
+    """
+
+    def __init__(self, gap_seconds: float = 1800, max_keys: int = 100_000, keep_closed: int = 1000):
+        """
+        Initialize tracker.
+
+        Args:
+            gap_seconds: Inactivity that ends a session
+            max_keys: Keep at most this many open sessions
+            keep_closed: Summaries of closed sessions to retain
+        """
+        self.gap_seconds = float(gap_seconds)
+        self.max_keys = max(1, int(max_keys))
+        self.closed = deque(maxlen=max(0, int(keep_closed)))
+        self._open: "OrderedDict[tuple, _Session]" = OrderedDict()
+        self._clock = -math.inf
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.sessions_closed = 0
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def _close(self, key: tuple, session: _Session) -> None:
+        self.sessions_closed += 1
+        self.closed.append({
+            "session_id": session.session_id,
+            **dict(zip(KEYS, key)),
+            "start": session.start,
+            "end": session.last,
+            "duration_seconds": session.last - session.start,
+            "events": session.events,
+            "failures": session.failures,
+            "failure_ratio": session.failures / session.events,
+            "bytes": session.bytes,
+            "distinct_actions": len(session.actions),
+        })
+
+    def _expire(self) -> None:
+        sessions = self._open
+        cutoff = self._clock - self.gap_seconds
+        while sessions:
+            key, session = next(iter(sessions.items()))
+            if len(sessions) <= self.max_keys and session.last >= cutoff:
+                break
+            sessions.popitem(last=False)
+            self._close(key, session)
+
+    def _add(self, event: Dict) -> Dict[str, float]:
+        key = tuple(event.get(k) for k in KEYS)
+        t = _epoch_seconds(event.get("timestamp"))
+        session = self._open.get(key)
+        if t is None:
+            t = session.last if session is not None else time.time()
+        if session is not None and t - session.last > self.gap_seconds:
+            del self._open[key]
+            self._close(key, session)
+            session = None
+        if session is None:
+            session = _Session(self._next_id, t)
+            self._next_id += 1
+            self._open[key] = session
+        else:
+            self._open.move_to_end(key)
+
+        session.last = max(session.last, t)
+        self._clock = max(self._clock, session.last)
+        session.events += 1
+        session.failures += int(str(event.get("status")).lower() in FAILED_STATUSES)
+        try:
+            nbytes = float(event.get("bytes_transferred") or 0.0)
+        except (TypeError, ValueError):
+            nbytes = 0.0
+        session.bytes += 0.0 if nbytes != nbytes else nbytes
+        session.actions.add(str(event.get("action")))
+        return {
+            "session_duration": session.last - session.start,
+            "session_events": float(session.events),
+            "session_failure_ratio": session.failures / session.events,
+            "session_bytes": session.bytes,
+            "session_distinct_actions": float(len(session.actions)),
+        }
+
+    def update(self, event: Dict) -> Dict[str, float]:
+        """Add one event; returns its session features."""
+        with self._lock:
+            out = self._add(event)
+            self._expire()
+        return out
+
+    def update_many(self, records: Iterable[Dict]) -> Dict[str, np.ndarray]:
+        """Add events in order; returns one float32 column per feature."""
+        with self._lock:
+            rows = [self._add(event) for event in records]
+            self._expire()
+        return {
+            name: np.fromiter((row[name] for row in rows), dtype=np.float32, count=len(rows))
+            for name in SESSION_FEATURES
+        }
+
+    def enrich(self, data):
+        """
+        Add events and append their session features.
+
+        A list of dicts comes back as new dicts with the features merged
+        in; a pyarrow Table comes back with one extra column per feature.
+        """
+        if pa is not None and isinstance(data, pa.Table):
+            names = [c for c in EVENT_FIELDS if c in data.column_names]
+            columns = [data.column(c).to_pylist() for c in names]
+            rows = (dict(zip(names, values)) for values in zip(*columns))
+            for name, values in self.update_many(rows).items():
+                data = data.append_column(name, pa.array(values))
+            return data
+        columns = self.update_many(data)
+        return [
+            {**record, **{name: float(values[n]) for name, values in columns.items()}}
+            for n, record in enumerate(data)
+        ]
+
+    def recent_sessions(self, limit: int = 50) -> List[Dict]:
+        """Most recently closed sessions, newest first."""
+        with self._lock:
+            return list(self.closed)[::-1][:limit]
+
+    def stats(self) -> Dict:
+        return {
+            "open_sessions": len(self._open),
+            "max_keys": self.max_keys,
+            "closed_sessions": self.sessions_closed,
+            "gap_seconds": self.gap_seconds,
+        }
+
+
+_tracker: Optional[SessionTracker] = None
+_tracker_loaded = False
+
+
+def get_session_tracker() -> Optional[SessionTracker]:
+    """
+    Process-wide tracker configured by feature_engineering.sessions in
+    configs/config.yaml, or None when disabled.
+    """
+    global _tracker, _tracker_loaded
+    if not _tracker_loaded:
+        settings = load_session_settings()
+        if settings.get("enabled"):
+            _tracker = SessionTracker(
+                gap_seconds=settings["gap_seconds"],
+                max_keys=settings["max_keys"],
+                keep_closed=settings["keep_closed"],
+            )
+        _tracker_loaded = True
+    return _tracker
@@ -5,23 +5,43 @@ from collections import deque
 from typing import Callable, Any, Optional
 from datetime import datetime, timedelta
 import logging
+import time
+
+from src.metrics import get_metrics
+from src.session_features import SessionTracker
+from src.window_features import WindowFeatureEngine
 
 logger = logging.getLogger(__name__)
 
+_metrics = get_metrics()
+STREAM_EVENTS = _metrics.counter("stream_events_total", "Events processed by StreamProcessor")
+STREAM_EVENT_SECONDS = _metrics.histogram(
+    "stream_event_seconds", "StreamProcessor time per event, callbacks included")
+STREAM_CALLBACK_ERRORS = _metrics.counter(
+    "stream_callback_errors_total", "StreamProcessor callbacks that raised")
+
 
 class StreamProcessor:
     """Process network events in real-time streams."""
 
-    def __init__(self, window_size: int = 100, window_seconds: Optional[int] = None):
+    def __init__(self, window_size: int = 100, window_seconds: Optional[int] = None,
+                 window_features: Optional[WindowFeatureEngine] = None,
+                 sessions: Optional[SessionTracker] = None):
         """
         Initialize stream processor.
         
         Args:
             window_size: Number of events to buffer
             window_seconds: Time window in seconds (alternative to size)
+            window_features: Engine whose per-user/IP window features are
+                added to each event before callbacks run
+            sessions: Tracker whose session-to-date features are added
+                to each event before callbacks run
         """
         self.window_size = window_size
         self.window_seconds = window_seconds
+        self.window_features = window_features
+        self.sessions = sessions
         self.event_buffer = deque(maxlen=window_size)
         self.callbacks = []
 
@@ -44,8 +64,15 @@ class StreamProcessor:
         Returns:
             Processed event
         """
+        started = time.perf_counter()
+
         # Add processing timestamp
         event['processed_at'] = datetime.now()
+
+        if self.window_features is not None:
+            event.update(self.window_features.update(event))
+        if self.sessions is not None:
+            event.update(self.sessions.update(event))
         
         # Add to buffer
         self.event_buffer.append(event)
@@ -55,8 +82,11 @@ class StreamProcessor:
             try:
                 callback(event)
             except Exception as e:
+                STREAM_CALLBACK_ERRORS.inc()
                 logger.error(f"Error in callback: {e}")
-        
+
+        STREAM_EVENTS.inc()
+        STREAM_EVENT_SECONDS.observe(time.perf_counter() - started)
         return event
 
     def process_batch(self, events: list) -> pd.DataFrame:
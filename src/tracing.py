@@ -0,0 +1,192 @@
+"""
+Span-style timing of scoring stages.
+
+A Trace collects (stage, start, duration) spans. The active trace lives
+in a context variable, so code deep in the scoring path only calls
+span("stage") and never needs a trace handed to it. With no active trace
+span() returns a shared no-op context manager: tracing that is switched
+off costs one context-variable lookup per stage.
+
+Settings come from configs/config.yaml (api.tracing):
+  enabled      allow tracing at all
+  sample_rate  fraction of requests/loads written to the trace file
+  path         JSONL file, relative to the repo root unless absolute
+"""
+
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config_store import get_config_store
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_NOOP = nullcontext()
+_current: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar(
+    "trace", default=None
+)
+
+
+class Trace:
+    """Spans recorded for one request or one dashboard load."""
+
+    def __init__(self, name: str, sampled: bool = False):
+        """
+        Initialize trace.
+
+        Args:
+            name: What is being traced (e.g. 'POST /predict/event')
+            sampled: Write this trace to the trace file when finished
+        """
+        self.name = name
+        self.sampled = sampled
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []
+        self.attributes: Dict[str, object] = {}
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, start - self.start, time.perf_counter() - start))
+
+    def add_span(self, stage: str, start: float, duration: float) -> None:
+        """Record a span measured elsewhere (start is a perf_counter value)."""
+        self.spans.append((stage, start - self.start, duration))
+
+    def merge(self, other: "Trace", prefix: str = "") -> None:
+        """Copy another trace's spans (e.g. a shared micro-batch) into this one."""
+        for stage, offset, duration in list(other.spans):
+            self.add_span(prefix + stage, other.start + offset, duration)
+
+    @property
+    def duration(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        parts = [f"{stage};dur={duration * 1000:.3f}" for stage, _, duration in self.spans]
+        parts.append(f"total;dur={self.duration * 1000:.3f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "timestamp": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [
+                {"stage": stage, "offset_ms": round(offset * 1000, 3),
+                 "duration_ms": round(duration * 1000, 3)}
+                for stage, offset, duration in self.spans
+            ],
+            **({"attributes": self.attributes} if self.attributes else {}),
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def span(stage: str):
+    """Time a stage of the active trace; no-op when nothing is traced."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return trace.span(stage)
+
+
+def mark(stage: str) -> None:
+    """Record a span from the start of the active trace until now."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span(stage, trace.start, trace.duration)
+
+
+def activate(trace: Optional[Trace]):
+    """Make `trace` the active trace; returns a token for deactivate()."""
+    return _current.set(trace)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+def tracing_settings() -> Dict:
+    settings = {"enabled": False, "sample_rate": 0.0, "path": "logs/traces.jsonl"}
+    settings.update(get_config_store().value("config", "api", "tracing", default=None) or {})
+    return settings
+
+
+def start_trace(name: str, requested: bool = False) -> Optional[Trace]:
+    """
+    New trace if tracing is enabled and this call is requested or sampled.
+
+    Returns None otherwise, which keeps span() on its no-op path.
+    """
+    settings = tracing_settings()
+    if not settings.get("enabled"):
+        return None
+    sampled = random.random() < float(settings.get("sample_rate") or 0.0)
+    if not (requested or sampled):
+        return None
+    return Trace(name, sampled=sampled)
+
+
+class TraceWriter:
+    """Appends finished traces to a JSONL file."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def write(self, trace: Trace) -> None:
+        path = Path(tracing_settings()["path"])
+        if not path.is_absolute():
+            path = ROOT / path
+        line = json.dumps(trace.to_dict(), default=str) + "\n"
+        try:
+            with self._lock:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.error(f"Could not write trace to {path}: {e}")
+
+
+_writer = TraceWriter()
+
+
+def finish_trace(trace: Optional[Trace]) -> None:
+    """Write a sampled trace to the trace file."""
+    if trace is not None and trace.sampled:
+        _writer.write(trace)
+
+
+@contextmanager
+def traced(name: str, requested: bool = False):
+    """
+    Run a block under a new trace (if enabled/sampled) and write it when done.
+
+    Yields the Trace, or None when not tracing.
+    """
+    trace = start_trace(name, requested=requested)
+    if trace is None:
+        yield None
+        return
+    token = activate(trace)
+    try:
+        yield trace
+    finally:
+        deactivate(token)
+        finish_trace(trace)
@@ -0,0 +1,339 @@
+"""
+Per-entity sliding-window behavioural features.
+
+WindowFeatureEngine keeps running aggregates per user_id and per
+ip_address over a few time windows (e.g. the last minute, five minutes,
+hour): event count, failed logins, bytes transferred, distinct actions
+and event rate. These are the quantities configs/alert_rules.yaml talks
+about (failed_logins per period, connection_rate) and that a single-row
+encoder can't see.
+
+Each window is a ring of fixed-width time buckets, so an update is O(1)
+amortized: add to the newest bucket, drop buckets that fell out of the
+window and subtract their totals. Memory per key is bounded by the
+bucket count, and keys that go quiet for idle_seconds (or the least
+recently seen keys beyond max_keys) are evicted.
+
+Settings come from configs/config.yaml (feature_engineering.window_features).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # only needed for Arrow input
+    pa = None
+
+from src.config_store import get_config_store
+
+ENTITIES = {"user_id": "user", "ip_address": "ip"}
+STATS = ("events", "failed_logins", "bytes", "distinct_actions", "rate")
+FAILED_STATUSES = frozenset({"failed", "failure", "denied", "error"})
+# Event fields the engine reads
+EVENT_FIELDS = ("timestamp", "action", "status", "bytes_transferred", *ENTITIES)
+
+
+def load_window_settings() -> Dict:
+    """Window feature settings from configs/config.yaml (feature_engineering.window_features)."""
+    settings = {
+        "enabled": False,
+        "windows": {"1m": 60, "5m": 300, "1h": 3600},
+        "buckets_per_window": 60,
+        "idle_seconds": 3600,
+        "max_keys": 100_000,
+    }
+    configured = get_config_store().value(
+        "config", "feature_engineering", "window_features", default=None
+    ) or {}
+    settings.update(configured)
+    return settings
+
+
+def _epoch_seconds(value) -> Optional[float]:
+    """Seconds since the epoch for a timestamp value, None if unparseable."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return None if value != value else float(value)
+    if isinstance(value, datetime):
+        return None if pd.isna(value) else value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        ts = pd.to_datetime(value, errors="coerce")
+        return None if pd.isna(ts) else ts.timestamp()
+
+
+class _Window:
+    """Time buckets of one window for one key, plus their running totals."""
+
+    __slots__ = ("width", "n_buckets", "buckets", "events", "failed_logins", "bytes", "actions")
+
+    def __init__(self, width: float, n_buckets: int):
+        self.width = width
+        self.n_buckets = n_buckets
+        # [bucket index, events, failed logins, bytes, {action: count}]
+        self.buckets = deque()
+        self.events = 0
+        self.failed_logins = 0
+        self.bytes = 0.0
+        self.actions: Dict[str, int] = {}
+
+    def add(self, t: float, action: str, failed_login: int, nbytes: float) -> None:
+        index = int(t // self.width)
+        oldest = index - self.n_buckets + 1
+        buckets = self.buckets
+        while buckets and buckets[0][0] < oldest:
+            _, events, failed_logins, bucket_bytes, actions = buckets.popleft()
+            self.events -= events
+            self.failed_logins -= failed_logins
+            self.bytes -= bucket_bytes
+            for name, count in actions.items():
+                left = self.actions[name] - count
+                if left:
+                    self.actions[name] = left
+                else:
+                    del self.actions[name]
+        if not buckets:
+            self.bytes = 0.0  # don't carry float drift into a new burst
+
+        if buckets and buckets[-1][0] == index:
+            bucket = buckets[-1]
+        else:
+            bucket = [index, 0, 0, 0.0, {}]
+            buckets.append(bucket)
+        bucket[1] += 1
+        bucket[2] += failed_login
+        bucket[3] += nbytes
+        bucket[4][action] = bucket[4].get(action, 0) + 1
+        self.events += 1
+        self.failed_logins += failed_login
+        self.bytes += nbytes
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+
+class _KeyState:
+    __slots__ = ("last_seen", "windows")
+
+    def __init__(self, windows: List[_Window]):
+        self.last_seen = -math.inf
+        self.windows = windows
+
+
+class WindowFeatureEngine:
+    """
+    Sliding-window aggregates per user_id and ip_address.
+
+    Features are named <entity>_<stat>_<window>, e.g. user_failed_logins_1m
+    or ip_rate_5m (events per second), and include the event being added.
+    Event time comes from the event's timestamp (wall clock when missing);
+    events older than a key's latest event count as arriving at that time.
+    Thread-safe.
+    """
+
+    def __init__(self, windows: Optional[Dict[str, float]] = None, buckets_per_window: int = 60,
+                 idle_seconds: float = 3600, max_keys: int = 100_000):
+        """
+        Initialize engine.
+
+        Args:
+            windows: Window label -> length in seconds
+            buckets_per_window: Time resolution of each window (memory per key)
+            idle_seconds: Forget keys with no events for this long (event time)
+            max_keys: Keep at most this many keys, dropping the least recently seen
+        """
+        self.windows = {str(k): float(v) for k, v in (windows or {"1m": 60, "5m": 300}).items()}
+        self.buckets_per_window = max(1, int(buckets_per_window))
+        self.idle_seconds = float(idle_seconds)
+        self.max_keys = max(1, int(max_keys))
+        self._labels = sorted(self.windows, key=self.windows.get)
+        self._keys: "OrderedDict[tuple, _KeyState]" = OrderedDict()
+        self._clock = -math.inf
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [
+            f"{prefix}_{stat}_{label}"
+            for prefix in ENTITIES.values()
+            for label in self._labels
+            for stat in STATS
+        ]
+
+    @property
+    def shortest_window(self) -> str:
+        return self._labels[0]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _state(self, entity: str, key) -> _KeyState:
+        state = self._keys.get((entity, key))
+        if state is None:
+            state = _KeyState([
+                _Window(self.windows[label] / self.buckets_per_window, self.buckets_per_window)
+                for label in self._labels
+            ])
+            self._keys[(entity, key)] = state
+        else:
+            self._keys.move_to_end((entity, key))
+        return state
+
+    def _evict(self) -> None:
+        keys = self._keys
+        cutoff = self._clock - self.idle_seconds
+        while keys:
+            state = next(iter(keys.values()))
+            if len(keys) <= self.max_keys and state.last_seen >= cutoff:
+                break
+            keys.popitem(last=False)
+            self.evicted += 1
+
+    def _add(self, event: Dict, out: Dict[str, float]) -> None:
+        action = str(event.get("action"))
+        failed_login = int(
+            action == "login" and str(event.get("status")).lower() in FAILED_STATUSES
+        )
+        try:
+            nbytes = float(event.get("bytes_transferred") or 0.0)
+        except (TypeError, ValueError):
+            nbytes = 0.0
+        if nbytes != nbytes:  # NaN
+            nbytes = 0.0
+
+        t = _epoch_seconds(event.get("timestamp"))
+        t = time.time() if t is None else t
+        for entity, prefix in ENTITIES.items():
+            key = event.get(entity)
+            if key is None:
+                # No entity to aggregate over
+                for label in self._labels:
+                    for stat in STATS:
+                        out[f"{prefix}_{stat}_{label}"] = 0.0
+                continue
+            state = self._state(entity, key)
+            when = max(t, state.last_seen)
+            state.last_seen = when
+            self._clock = max(self._clock, when)
+            for label, window in zip(self._labels, state.windows):
+                window.add(when, action, failed_login, nbytes)
+                out[f"{prefix}_events_{label}"] = float(window.events)
+                out[f"{prefix}_failed_logins_{label}"] = float(window.failed_logins)
+                out[f"{prefix}_bytes_{label}"] = window.bytes
+                out[f"{prefix}_distinct_actions_{label}"] = float(len(window.actions))
+                out[f"{prefix}_rate_{label}"] = window.events / self.windows[label]
+
+    def update(self, event: Dict) -> Dict[str, float]:
+        """Add one event; returns its window features."""
+        out: Dict[str, float] = {}
+        with self._lock:
+            self._add(event, out)
+            self._evict()
+        return out
+
+    def update_many(self, records: Iterable[Dict]) -> Dict[str, np.ndarray]:
+        """Add events in order; returns one float32 column per feature."""
+        rows = []
+        with self._lock:
+            for event in records:
+                out: Dict[str, float] = {}
+                self._add(event, out)
+                rows.append(out)
+            self._evict()
+        return {
+            name: np.fromiter((row[name] for row in rows), dtype=np.float32, count=len(rows))
+            for name in self.feature_names
+        }
+
+    def enrich(self, data):
+        """
+        Add events and append their window features.
+
+        A list of dicts comes back as new dicts with the features merged
+        in; a pyarrow Table comes back with one extra column per feature.
+        """
+        if pa is not None and isinstance(data, pa.Table):
+            names = [c for c in EVENT_FIELDS if c in data.column_names]
+            columns = [data.column(c).to_pylist() for c in names]
+            rows = (dict(zip(names, values)) for values in zip(*columns))
+            for name, values in self.update_many(rows).items():
+                data = data.append_column(name, pa.array(values))
+            return data
+        columns = self.update_many(data)
+        return [
+            {**record, **{name: float(values[n]) for name, values in columns.items()}}
+            for n, record in enumerate(data)
+        ]
+
+    def evict_idle(self) -> int:
+        """Drop idle keys now; returns how many keys are left."""
+        with self._lock:
+            self._evict()
+            return len(self._keys)
+
+    def stats(self) -> Dict:
+        return {
+            "keys": len(self._keys),
+            "max_keys": self.max_keys,
+            "evicted": self.evicted,
+            "windows": dict(self.windows),
+        }
+
+
+def add_window_features(df: pd.DataFrame, engine: Optional[WindowFeatureEngine] = None) -> pd.DataFrame:
+    """
+    Window features for a historical log, computed in timestamp order.
+
+    Uses a fresh engine unless one is given, so training frames get the
+    same values the live engine would have produced. `df` needs its
+    timestamp column (e.g. chunks from iter_raw_logs, before
+    add_time_features drops it). Returns a copy with the features added.
+    """
+    engine = engine or WindowFeatureEngine(**_engine_args(load_window_settings()))
+    order = np.argsort(pd.to_datetime(df["timestamp"], errors="coerce").to_numpy(), kind="stable")
+    fields = [c for c in EVENT_FIELDS if c in df.columns]
+    ordered = df[fields].iloc[order].to_dict("records")
+    columns = engine.update_many(ordered)
+
+    out = df.copy()
+    for name, values in columns.items():
+        column = np.empty(len(df), dtype=np.float32)
+        column[order] = values
+        out[name] = column
+    return out
+
+
+def _engine_args(settings: Dict) -> Dict:
+    return {
+        "windows": settings["windows"],
+        "buckets_per_window": settings["buckets_per_window"],
+        "idle_seconds": settings["idle_seconds"],
+        "max_keys": settings["max_keys"],
+    }
+
+
+_engine: Optional[WindowFeatureEngine] = None
+_engine_loaded = False
+
+
+def get_window_engine() -> Optional[WindowFeatureEngine]:
+    """
+    Process-wide engine configured by feature_engineering.window_features
+    in configs/config.yaml, or None when disabled.
+    """
+    global _engine, _engine_loaded
+    if not _engine_loaded:
+        settings = load_window_settings()
+        if settings.get("enabled"):
+            _engine = WindowFeatureEngine(**_engine_args(settings))
+        _engine_loaded = True
+    return _engine
@@ -0,0 +1,72 @@
+"""Shared fixtures: a small synthetic event log and models trained on it."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_pipeline import FeaturePipeline
+from models.anomaly_detector import AnomalyDetector
+from models.intent_predictor import IntentPredictor
+from models.risk_scorer import ScoreCalibrator
+from models import registry as registry_module
+from models.registry import ModelBundle, ModelRegistry
+
+
+def make_events(n_normal: int = 300, n_attack: int = 60, seed: int = 0) -> pd.DataFrame:
+    """Events with the same columns as data/generators/normal_user.py."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-15 08:00:00")
+
+    normal = pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(rng.integers(0, 10 * 3600, n_normal), unit="s"),
+        "user_id": rng.choice([f"user_{i:03d}" for i in range(1, 11)], n_normal),
+        "ip_address": rng.choice([f"192.168.1.{i}" for i in range(10, 30)], n_normal),
+        "action": rng.choice(["login", "file_access", "email_send", "web_browse", "logout"], n_normal),
+        "status": np.where(rng.random(n_normal) > 0.05, "success", "failed"),
+        "bytes_transferred": rng.integers(1024, 1024 * 1024, n_normal),
+        "duration_ms": rng.integers(100, 5000, n_normal),
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+        "risk_label": 0,
+    })
+    attack = pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(rng.integers(-8 * 3600, -6 * 3600, n_attack), unit="s"),
+        "user_id": rng.choice(["admin", "root"], n_attack),
+        "ip_address": rng.choice(["203.0.113.5", "198.51.100.7"], n_attack),
+        "action": rng.choice(["login", "file_download", "port_scan"], n_attack),
+        "status": np.where(rng.random(n_attack) > 0.7, "success", "failed"),
+        "bytes_transferred": rng.integers(10 * 1024 * 1024, 100 * 1024 * 1024, n_attack),
+        "duration_ms": rng.integers(1, 50, n_attack),
+        "user_agent": "python-requests/2.31",
+        "risk_label": 1,
+    })
+    df = pd.concat([normal, attack], ignore_index=True)
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def events_df():
+    return make_events()
+
+
+@pytest.fixture(scope="session")
+def trained_models(events_df):
+    """
+    (anomaly_model, intent_model, pipeline, calibrator) trained on
+    events_df with small forests.
+    """
+    pipeline = FeaturePipeline().fit(events_df)
+    X = pipeline.transform(events_df)
+    y = events_df["risk_label"].values
+    anomaly_model = AnomalyDetector(n_estimators=25).fit(X[y == 0])
+    intent_model = IntentPredictor(n_estimators=25).fit(X, y)
+    calibrator = ScoreCalibrator().fit(anomaly_model.anomaly_score(X))
+    return anomaly_model, intent_model, pipeline, calibrator
+
+
+@pytest.fixture
+def model_registry(trained_models, tmp_path, monkeypatch):
+    """Process-wide registry serving trained_models (no files on disk)."""
+    registry = ModelRegistry(models_dir=tmp_path)
+    registry.swap(ModelBundle(*trained_models))
+    monkeypatch.setattr(registry_module, "_registry", registry)
+    return registry
@@ -0,0 +1,148 @@
+"""Tests for admission control."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.admission import AdmissionController, AdmissionMiddleware
+
+
+def test_waiters_admitted_by_lane_priority():
+    async def main():
+        controller = AdmissionController(
+            max_in_flight=1, lane_limits={"high": 5, "normal": 5, "bulk": 5}, queue_timeout_ms=1000
+        )
+        assert await controller.acquire("normal")
+        order = []
+
+        async def waiter(lane):
+            assert await controller.acquire(lane)
+            order.append(lane)
+            controller.release()
+
+        tasks = [asyncio.ensure_future(waiter(lane)) for lane in ("bulk", "normal", "high")]
+        await asyncio.sleep(0.01)
+        assert controller.queue_depth() == 3
+        controller.release()
+        await asyncio.gather(*tasks)
+        return order, controller.in_flight
+
+    order, in_flight = asyncio.run(main())
+    assert order == ["high", "normal", "bulk"]
+    assert in_flight == 0
+
+
+def test_full_lane_and_timeout_reject():
+    async def main():
+        controller = AdmissionController(
+            max_in_flight=1, lane_limits={"normal": 1, "bulk": 0}, queue_timeout_ms=20
+        )
+        assert await controller.acquire("normal")
+        assert not await controller.acquire("bulk")        # no queue room
+        assert not await controller.acquire("normal")      # waits, times out
+        return controller.stats()
+
+    stats = asyncio.run(main())
+    assert stats["rejected"] == {"high": 0, "normal": 1, "bulk": 1}
+    assert stats["queue_depth"]["normal"] == 0
+    assert stats["retry_after_seconds"] >= 1
+
+
+def test_slot_granted_as_timeout_fires_is_not_lost(monkeypatch):
+    async def main():
+        controller = AdmissionController(
+            max_in_flight=1, lane_limits={"normal": 1}, queue_timeout_ms=20
+        )
+        assert await controller.acquire("normal")
+
+        async def release_then_time_out(waiter, timeout):
+            # Both in the same loop tick: the waiter holds the slot when
+            # wait_for reports the timeout
+            controller.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", release_then_time_out)
+        admitted = await controller.acquire("normal")
+        monkeypatch.undo()
+        controller.release()
+        return admitted, controller.stats()
+
+    admitted, stats = asyncio.run(main())
+    assert admitted
+    assert stats["in_flight"] == 0
+    assert stats["rejected"]["normal"] == 0
+
+
+def _slow_app(settings):
+    app = FastAPI()
+
+    @app.post("/predict/event")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(AdmissionMiddleware, settings=settings)
+    return app
+
+
+def test_overload_returns_429_with_retry_after():
+    settings = {
+        "enabled": True, "max_in_flight": 1, "queue_timeout_ms": 1000,
+        "lanes": {"high": 1, "normal": 0, "bulk": 0},
+        "paths": ["/predict"], "bulk_paths": ["/predict/batch"],
+        "high_priority_sources": ["10.1.2.0/24"],
+    }
+    app = _slow_app(settings)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        sensor = httpx.ASGITransport(app=app, client=("10.1.2.3", 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client, \
+                httpx.AsyncClient(transport=sensor, base_url="http://t") as sensor_client:
+            first = asyncio.ensure_future(client.post("/predict/event"))
+            await asyncio.sleep(0.05)
+            rejected = await client.post("/predict/event")
+            health = await client.get("/health")
+            priority = await sensor_client.post("/predict/event")
+            return (await first), rejected, health, priority
+
+    first, rejected, health, priority = asyncio.run(main())
+    assert first.status_code == 200
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert health.status_code == 200
+    assert priority.status_code == 200  # queued in the high lane, then admitted
+
+
+def test_high_lane_follows_client_address_not_headers():
+    middleware = AdmissionMiddleware(None, controller=object(), settings={
+        "paths": ["/predict"], "bulk_paths": ["/predict/batch"],
+        "high_priority_sources": ["10.1.2.0/24", "192.168.0.7"],
+    })
+
+    def scope(host, headers=()):
+        return {"path": "/predict/event", "client": (host, 1), "headers": list(headers)}
+
+    assert middleware.lane_for(scope("10.1.2.200")) == "high"
+    assert middleware.lane_for(scope("192.168.0.7")) == "high"
+    assert middleware.lane_for(scope("203.0.113.9", [(b"x-source", b"192.168.0.7")])) == "normal"
+    assert middleware.lane_for(scope("testclient")) == "normal"
+
+
+def test_admission_stats_in_monitoring(model_registry):
+    from api.main import app
+
+    client = TestClient(app)
+    client.post("/predict/event", json={"action": "login"})
+    stats = client.get("/api/monitor/admission").json()
+    assert stats["enabled"] is True
+    assert stats["admitted"]["normal"] >= 1
+    assert "admission" in client.get("/api/monitor/performance").json()
+    assert "cyberintent_admission_queue_depth" in client.get("/metrics").text
@@ -0,0 +1,31 @@
+"""Smoke test for scripts/benchmark_api.py."""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "benchmark_api", Path(__file__).resolve().parents[1] / "scripts" / "benchmark_api.py"
+)
+benchmark_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark_api)
+
+
+def test_payloads_are_valid_events():
+    from api.schemas import EventIn
+
+    for payload in benchmark_api.make_payloads(50):
+        EventIn.parse_obj(payload)
+
+
+def test_run_benchmark_reports_percentiles(model_registry):
+    results, server_latency = asyncio.run(benchmark_api.run_benchmark(
+        endpoints=("event", "batch", "stream"), requests=20, concurrency=4,
+        batch_size=10, distinct=100, warmup=2,
+    ))
+    assert set(results) == {"event", "batch", "stream"}
+    for endpoint, r in results.items():
+        assert r["errors"] == 0
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
+    assert results["batch"]["events"] == 200
+    assert server_latency["count"] > 0
@@ -0,0 +1,29 @@
+"""Smoke test for scripts/benchmark_encodings.py."""
+
+import importlib.util
+from pathlib import Path
+
+from src.feature_engineering import add_time_features
+
+spec = importlib.util.spec_from_file_location(
+    "benchmark_encodings",
+    Path(__file__).resolve().parents[1] / "scripts" / "benchmark_encodings.py",
+)
+benchmark_encodings = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark_encodings)
+
+
+def test_every_strategy_reports_size_and_latency():
+    df = add_time_features(benchmark_encodings.make_dataset(2000, n_users=500, n_ips=800))
+    train, test = df.iloc[:1600], df.iloc[1600:]
+    records = test.drop(columns=["risk_label"]).head(10).to_dict(orient="records")
+
+    results = {
+        name: benchmark_encodings.benchmark_strategy(name, train, test, records, trees=5)
+        for name in benchmark_encodings.STRATEGIES
+    }
+    assert results["hash"]["n_features"] < results["onehot"]["n_features"]
+    assert results["onehot_sparse"]["matrix_mb"] < results["onehot"]["matrix_mb"]
+    for r in results.values():
+        assert r["transform_seconds"] >= 0
+        assert r["roc_auc"] is not None
@@ -0,0 +1,104 @@
+"""Tests for Arrow IPC / Parquet scoring."""
+
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from api.columnar import ARROW_STREAM, PARQUET, ColumnarError, validate_events
+from api.main import app
+
+EVENT_COLUMNS = [
+    "timestamp", "user_id", "ip_address", "action", "status",
+    "bytes_transferred", "duration_ms", "user_agent",
+]
+
+
+def _events_table(events_df, n=40):
+    df = events_df.head(n)[EVENT_COLUMNS].copy()
+    df["timestamp"] = df["timestamp"].astype(str)
+    return pa.Table.from_pandas(df, preserve_index=False), df
+
+
+def _ipc_bytes(table):
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow_encoding_matches_records(trained_models, events_df):
+    pipeline = trained_models[2]
+    table, df = _events_table(events_df)
+    expected = pipeline.transform(df.to_dict("records"))
+    np.testing.assert_array_equal(pipeline.transform(validate_events(table)), expected)
+
+
+def test_validation_reports_bad_columns():
+    table = pa.table({
+        "action": pa.array(["login", None]),
+        "bytes_transferred": pa.array(["12", "lots"]),
+        "user_id": pa.array([1, 2]),
+    })
+    with pytest.raises(ColumnarError) as exc:
+        validate_events(table)
+    failed = {e["column"] for e in exc.value.errors}
+    assert failed == {"action", "bytes_transferred", "user_id"}
+
+
+def test_missing_columns_get_eventin_defaults():
+    table = validate_events(pa.table({"action": ["login"]}))
+    assert table.column("status").to_pylist() == ["success"]
+    assert table.column("bytes_transferred").to_pylist() == [0]
+    assert table.column("timestamp").to_pylist() == [None]
+
+
+@pytest.fixture
+def client(model_registry):
+    return TestClient(app)
+
+
+def test_arrow_route_matches_batch_route(client, events_df):
+    table, df = _events_table(events_df)
+    response = client.post(
+        "/predict/arrow", content=_ipc_bytes(table), headers={"Content-Type": ARROW_STREAM}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM
+    result = ipc.open_stream(response.content).read_all()
+    assert result.num_rows == len(df)
+
+    batch = client.post("/predict/batch", json={"events": df.to_dict("records")}).json()
+    expected = [item["prediction"]["risk_score"] for item in batch["results"]]
+    np.testing.assert_allclose(result.column("risk_score").to_pylist(), expected)
+    assert set(result.column("recommended_action").to_pylist()) <= {"block", "monitor"}
+
+
+def test_parquet_in_and_out(client, events_df):
+    table, df = _events_table(events_df, n=10)
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+    response = client.post(
+        "/predict/arrow", content=buf.getvalue(),
+        headers={"Content-Type": PARQUET, "Accept": PARQUET},
+    )
+    assert response.status_code == 200
+    assert pq.read_table(io.BytesIO(response.content)).num_rows == 10
+
+
+def test_error_statuses(client):
+    bad = pa.table({"action": pa.array([None], pa.string())})
+    response = client.post(
+        "/predict/arrow", content=_ipc_bytes(bad), headers={"Content-Type": ARROW_STREAM}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["column"] == "action"
+
+    assert client.post("/predict/arrow", content=b"{}",
+                       headers={"Content-Type": "application/json"}).status_code == 415
+    assert client.post("/predict/arrow", content=b"garbage",
+                       headers={"Content-Type": ARROW_STREAM}).status_code == 400
@@ -0,0 +1,60 @@
+"""Tests for the flat-array tree inference engine."""
+
+import numpy as np
+import pytest
+
+from models.anomaly_detector import AnomalyDetector
+from models.intent_predictor import IntentPredictor
+
+
+@pytest.fixture(scope="module")
+def data(trained_models, events_df):
+    _, _, pipeline, _ = trained_models
+    X = pipeline.transform(events_df)
+    return X, events_df["risk_label"].values
+
+
+def test_compiled_isolation_forest_matches_sklearn(data):
+    X, y = data
+    detector = AnomalyDetector(n_estimators=30).fit(X[y == 0])
+    expected = detector.anomaly_score(X)
+
+    detector.set_engine("compiled")
+    np.testing.assert_allclose(detector.anomaly_score(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(detector.anomaly_score(X[:1]), expected[:1], rtol=0, atol=1e-12)
+
+
+def test_compiled_isolation_forest_with_feature_subsampling(data):
+    X, y = data
+    detector = AnomalyDetector(n_estimators=30)
+    detector.model.set_params(max_features=0.5)
+    detector.fit(X[y == 0])
+    expected = detector.anomaly_score(X)
+
+    detector.set_engine("compiled")
+    np.testing.assert_allclose(detector.anomaly_score(X), expected, rtol=0, atol=1e-12)
+
+
+def test_compiled_random_forest_matches_sklearn(data):
+    X, y = data
+    predictor = IntentPredictor(n_estimators=30).fit(X, y)
+    expected = predictor.predict_proba(X)
+
+    predictor.set_engine("compiled")
+    np.testing.assert_allclose(predictor.predict_proba(X), expected, rtol=0, atol=1e-12)
+    assert predictor.predict(X[:5]).tolist() == (expected[:5] >= 0.5).astype(int).tolist()
+
+
+def test_compiled_gradient_boosting_matches_sklearn(data):
+    X, y = data
+    predictor = IntentPredictor(n_estimators=30, backend="hist_gradient_boosting").fit(X, y)
+    expected = predictor.predict_proba(X)
+
+    predictor.set_engine("compiled")
+    np.testing.assert_allclose(predictor.predict_proba(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(predictor.predict_proba(X[:1]), expected[:1], rtol=0, atol=1e-12)
+
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        IntentPredictor().set_engine("onnx")
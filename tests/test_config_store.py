@@ -0,0 +1,69 @@
+"""Tests for the in-memory config store."""
+
+import os
+
+import yaml
+
+from src.config_store import ConfigStore
+
+
+def _write(path, data, mtime_ns=None):
+    path.write_text(yaml.safe_dump(data))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_loads_all_files_once(tmp_path):
+    _write(tmp_path / "config.yaml", {"model": {"inference_engine": "compiled"}})
+    _write(tmp_path / "model_config.yaml", {"risk_threshold": 0.6})
+
+    store = ConfigStore(tmp_path, check_interval=60)
+    assert store.value("config", "model", "inference_engine") == "compiled"
+    assert store.value("model", "risk_threshold") == 0.6
+    assert store.get("alert_rules") == {}
+    assert store.value("model", "missing", default=1) == 1
+    assert store.reload_count == 1
+
+
+def test_reloads_changed_file(tmp_path):
+    cfg = tmp_path / "model_config.yaml"
+    _write(cfg, {"risk_threshold": 0.6}, mtime_ns=1_000_000_000)
+    store = ConfigStore(tmp_path, check_interval=0)
+
+    _write(cfg, {"risk_threshold": 0.8}, mtime_ns=2_000_000_000)
+    assert store.value("model", "risk_threshold") == 0.8
+
+
+def test_no_reread_within_interval(tmp_path):
+    cfg = tmp_path / "model_config.yaml"
+    _write(cfg, {"risk_threshold": 0.6}, mtime_ns=1_000_000_000)
+    store = ConfigStore(tmp_path, check_interval=60)
+
+    _write(cfg, {"risk_threshold": 0.8}, mtime_ns=2_000_000_000)
+    assert store.value("model", "risk_threshold") == 0.6
+    assert store.reload() is True
+    assert store.value("model", "risk_threshold") == 0.8
+
+
+def test_broken_file_keeps_previous_config(tmp_path):
+    cfg = tmp_path / "model_config.yaml"
+    _write(cfg, {"risk_threshold": 0.6}, mtime_ns=1_000_000_000)
+    store = ConfigStore(tmp_path, check_interval=0)
+
+    cfg.write_text("risk_threshold: [unclosed")
+    os.utime(cfg, ns=(2_000_000_000, 2_000_000_000))
+    assert store.value("model", "risk_threshold") == 0.6
+
+
+def test_tuned_overlay_merged_over_model_config(tmp_path):
+    _write(tmp_path / "model_config.yaml", {"risk_threshold": 0.6, "intent_predictor": {"max_depth": 5, "n_estimators": 100}},
+           mtime_ns=1_000_000_000)
+    store = ConfigStore(tmp_path, check_interval=0)
+    assert store.value("model", "intent_predictor", "max_depth") == 5
+
+    _write(tmp_path / "model_config.tuned.yaml", {"intent_predictor": {"max_depth": 10}})
+    assert store.value("model", "intent_predictor") == {"max_depth": 10, "n_estimators": 100}
+    assert store.value("model", "risk_threshold") == 0.6
+
+    (tmp_path / "model_config.tuned.yaml").unlink()
+    assert store.value("model", "intent_predictor", "max_depth") == 5
@@ -0,0 +1,100 @@
+"""Tests for the on-disk feature cache."""
+
+import os
+
+import numpy as np
+import pytest
+
+from models import model_trainer
+from src.feature_cache import FeatureCache
+from src.feature_engineering import load_logs
+from src.feature_pipeline import FeaturePipeline
+from tests.conftest import make_events
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "logs.csv"
+    make_events().to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeatureCache(tmp_path / "cache")
+
+
+def test_miss_then_memory_mapped_hit(cache, log_path):
+    df = load_logs(log_path)
+    pipeline = FeaturePipeline().fit(df)
+    X = pipeline.transform(df)
+    y = df["risk_label"].values
+
+    entry = cache.entry(log_path, pipeline=pipeline)
+    assert cache.load(entry) is None
+    cache.store(entry, X, y)
+
+    hit = cache.load(cache.entry(log_path, pipeline=pipeline))
+    assert isinstance(hit.X, np.memmap)
+    np.testing.assert_array_equal(hit.X, X)
+    np.testing.assert_array_equal(hit.y, y)
+    assert hit.meta["rows"] == len(df)
+
+
+def test_key_changes_with_source_and_pipeline(cache, log_path):
+    df = load_logs(log_path)
+    pipeline = FeaturePipeline().fit(df)
+    other = FeaturePipeline().fit(df.iloc[:50])
+    entry = cache.entry(log_path, pipeline=pipeline)
+
+    assert cache.entry(log_path, pipeline=pipeline).key == entry.key
+    assert cache.entry(log_path, pipeline=other).key != entry.key
+    assert cache.entry(log_path).key != entry.key
+
+    stat = os.stat(log_path)
+    os.utime(log_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.entry(log_path, pipeline=pipeline).key != entry.key
+
+
+def test_content_hash_is_part_of_key(tmp_path, log_path):
+    cache = FeatureCache(tmp_path / "cache", hash_contents=True)
+    entry = cache.entry(log_path)
+    assert "sha256" in entry.source
+
+
+def test_store_skips_source_changed_while_reading(cache, log_path):
+    entry = cache.entry(log_path)
+    with open(log_path, "a") as f:
+        f.write(make_events(n_normal=1, n_attack=0).to_csv(index=False, header=False))
+
+    assert cache.store(entry, np.zeros((3, 2), dtype=np.float32)) is None
+    assert cache.load(entry) is None
+
+
+def test_store_replaces_entries_for_older_file_versions(cache, log_path):
+    first = cache.entry(log_path)
+    cache.store(first, np.zeros((3, 2), dtype=np.float32))
+
+    stat = os.stat(log_path)
+    os.utime(log_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = cache.entry(log_path)
+    cache.store(second, np.ones((3, 2), dtype=np.float32))
+
+    assert cache.load(first) is None
+    assert cache.load(second).X.sum() == 6
+
+
+def test_training_features_reuse_cache(cache, log_path, monkeypatch):
+    monkeypatch.setattr(model_trainer, "get_feature_cache", lambda: cache)
+    pipeline, X, y = model_trainer.load_training_features(str(log_path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("log was re-read despite a cache hit")
+
+    monkeypatch.setattr(model_trainer, "iter_logs", fail)
+    cached_pipeline, cached_X, cached_y = model_trainer.load_training_features(str(log_path))
+
+    assert cached_pipeline.columns == pipeline.columns
+    assert isinstance(cached_X, np.memmap)
+    np.testing.assert_array_equal(cached_X, X)
+    np.testing.assert_array_equal(cached_y, y)
@@ -0,0 +1,155 @@
+"""Tests for the fitted feature pipeline."""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from src.feature_engineering import add_time_features, build_features
+from src.feature_pipeline import FeaturePipeline
+
+
+def test_matches_build_features_on_training_data(events_df):
+    X_ref, _ = build_features(add_time_features(events_df.copy()))
+    pipeline = FeaturePipeline().fit(events_df)
+    X = pipeline.transform(events_df)
+
+    assert X.dtype == np.float32
+    assert pipeline.columns == list(X_ref.columns)
+    np.testing.assert_allclose(X, X_ref.to_numpy(dtype=np.float32))
+
+
+def test_records_and_frame_encode_identically(events_df):
+    pipeline = FeaturePipeline().fit(events_df)
+    sample = events_df.head(20).drop(columns=["risk_label"])
+    records = sample.assign(timestamp=sample["timestamp"].astype(str)).to_dict(orient="records")
+
+    np.testing.assert_array_equal(pipeline.transform(records), pipeline.transform(sample))
+
+
+def test_single_event_keeps_training_columns(events_df):
+    pipeline = FeaturePipeline().fit(events_df)
+    event = {
+        "timestamp": "2024-01-15 03:21:00",
+        "user_id": "admin",
+        "ip_address": "203.0.113.5",
+        "action": "port_scan",
+        "status": "failed",
+        "bytes_transferred": 1024,
+        "duration_ms": 10,
+        "user_agent": "python-requests/2.31",
+    }
+    X = pipeline.transform(event)
+    assert X.shape == (1, pipeline.n_features)
+    assert X[0, pipeline.columns.index("hour")] == 3
+    assert X[0, pipeline.columns.index("is_night")] == 1
+    assert X[0, pipeline.columns.index("action_port_scan")] == 1
+
+
+def test_unknown_category_encodes_as_baseline(events_df):
+    pipeline = FeaturePipeline().fit(events_df)
+    X = pipeline.transform({"action": "never_seen", "bytes_transferred": None})
+    action_cols = [i for i, c in enumerate(pipeline.columns) if c.startswith("action_")]
+    assert X[0, action_cols].sum() == 0
+    assert X[0, pipeline.columns.index("bytes_transferred")] == pytest.approx(0.0)
+
+
+def test_unseen_values_in_a_frame_encode_without_warnings(events_df):
+    pipeline = FeaturePipeline(encodings={"user_id": "target"}).fit(events_df)
+    frame = events_df.head(3).assign(action="never_seen", user_id="nobody")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        X = pipeline.transform(frame)
+    action_cols = [i for i, c in enumerate(pipeline.columns) if c.startswith("action_")]
+    assert X[:, action_cols].sum() == 0
+    np.testing.assert_allclose(X[:, pipeline.columns.index("user_id_target")],
+                               pipeline.transform({"user_id": "nobody"})[0, pipeline.columns.index("user_id_target")])
+
+
+HIGH_CARDINALITY = {"user_id": "target", "ip_address": "hash", "user_agent": "frequency"}
+
+
+def _records(df):
+    sample = df.drop(columns=["risk_label"])
+    return sample.assign(timestamp=sample["timestamp"].astype(str)).to_dict(orient="records")
+
+
+def test_mixed_encodings_layout(events_df):
+    pipeline = FeaturePipeline(encodings=HIGH_CARDINALITY, hash_features=8).fit(events_df)
+
+    assert not any(c.startswith(("user_id_user", "ip_address_1")) for c in pipeline.columns)
+    assert [c for c in pipeline.columns if c.startswith("ip_address_hash_")] == [
+        f"ip_address_hash_{k}" for k in range(8)
+    ]
+    assert "user_id_target" in pipeline.columns
+    assert "user_agent_freq" in pipeline.columns
+    assert "action_port_scan" in pipeline.columns
+
+    X = pipeline.transform(events_df)
+    hashed = [pipeline.columns.index(f"ip_address_hash_{k}") for k in range(8)]
+    np.testing.assert_array_equal(X[:, hashed].sum(axis=1), 1.0)
+
+
+def test_frequency_and_target_values(events_df):
+    pipeline = FeaturePipeline(
+        encodings={"user_id": "target", "user_agent": "frequency"}, target_smoothing=0
+    ).fit(events_df)
+    X = pipeline.transform({"user_id": "admin", "user_agent": "python-requests/2.31"})
+    attack_share = (events_df["user_agent"] == "python-requests/2.31").mean()
+
+    # admin only appears in attack traffic
+    assert X[0, pipeline.columns.index("user_id_target")] == pytest.approx(1.0)
+    assert X[0, pipeline.columns.index("user_agent_freq")] == pytest.approx(attack_share)
+
+    unseen = pipeline.transform({"user_id": "nobody", "user_agent": "curl/8"})
+    assert unseen[0, pipeline.columns.index("user_id_target")] == pytest.approx(
+        events_df["risk_label"].mean())
+    assert unseen[0, pipeline.columns.index("user_agent_freq")] == 0
+
+
+def test_encodings_agree_across_input_types(events_df):
+    import pyarrow as pa
+
+    pipeline = FeaturePipeline(encodings=HIGH_CARDINALITY).fit(events_df)
+    sample = events_df.head(30)
+    X = pipeline.transform(sample)
+    table = pa.Table.from_pandas(
+        sample.drop(columns=["risk_label"]).assign(timestamp=sample["timestamp"].astype(str)),
+        preserve_index=False,
+    )
+
+    np.testing.assert_array_equal(pipeline.transform(_records(sample)), X)
+    np.testing.assert_array_equal(pipeline.transform(table), X)
+
+
+def test_sparse_output_matches_dense(events_df):
+    for encodings in ({}, HIGH_CARDINALITY):
+        pipeline = FeaturePipeline(encodings=encodings).fit(events_df)
+        dense = pipeline.transform(events_df)
+        sparse = pipeline.transform(events_df, sparse=True)
+
+        assert sparse.format == "csr"
+        assert sparse.dtype == np.float32
+        np.testing.assert_array_equal(sparse.toarray(), dense)
+        assert sparse.nnz < dense.size / 2
+
+
+def test_target_encoding_needs_labels(events_df):
+    with pytest.raises(ValueError):
+        FeaturePipeline(encodings={"user_id": "target"}).fit(events_df.drop(columns=["risk_label"]))
+    with pytest.raises(ValueError):
+        FeaturePipeline(encodings={"user_id": "embedding"})
+
+
+def test_pipelines_pickled_before_encodings_still_load(events_df):
+    pipeline = FeaturePipeline().fit(events_df)
+    state = {k: v for k, v in pipeline.__dict__.items()
+             if k not in ("encoding_spec", "default_encoding", "hash_features",
+                          "target_smoothing", "encodings", "encoding_tables",
+                          "_encoded_index", "_tables", "_lookups")}
+    old = FeaturePipeline.__new__(FeaturePipeline)
+    old.__setstate__(state)
+
+    np.testing.assert_array_equal(old.transform(events_df), pipeline.transform(events_df))
+    assert set(old.encodings.values()) == {"onehot"}
@@ -0,0 +1,106 @@
+"""Tests for the hyperparameter search."""
+
+import yaml
+
+from models.hyperparameter_search import (
+    candidate_grid,
+    expand_values,
+    save_search_results,
+    search_hyperparameters,
+    successive_halving,
+    update_model_config,
+)
+from src import config_store
+from src.config_store import ConfigStore
+from src.feature_pipeline import FeaturePipeline
+from tests.conftest import make_events
+
+
+def test_ranges_expand_to_values():
+    assert expand_values([5, None]) == [5, None]
+    assert expand_values({"low": 1, "high": 10, "num": 3}) == [1, 6, 10]
+    assert expand_values({"low": 0.01, "high": 1.0, "num": 3, "log": True}) == [0.01, 0.1, 1.0]
+
+
+def test_candidate_grid_combines_and_samples():
+    space = {"n_estimators": [50, 100], "max_depth": [5, 10, None]}
+    grid = candidate_grid(space, base={"random_state": 1})
+    assert len(grid) == 6
+    assert all(c["random_state"] == 1 for c in grid)
+
+    sampled = candidate_grid(space, max_candidates=4)
+    assert len(sampled) == 4
+    assert all(c in grid for c in [{**s, "random_state": 1} for s in sampled])
+
+
+def test_successive_halving_drops_worse_candidates_early():
+    candidates = [{"quality": q} for q in range(9)]
+    calls = []
+
+    def evaluate(alive, rows):
+        calls.append((len(alive), rows))
+        return [{"score": c["quality"] + rows / 1e6, "fit_seconds": 0.0} for c in alive]
+
+    trials = successive_halving(candidates, evaluate, n_rows=9000, min_rows=1000, eta=3)
+
+    assert calls == [(9, 1000), (3, 3000), (1, 9000)]
+    best = max((t for t in trials if t["round"] == 2), key=lambda t: t["score"])
+    assert best["params"] == {"quality": 8}
+
+
+def test_search_in_process_pool_saves_best(tmp_path):
+    df = make_events(n_normal=600, n_attack=120)
+    X = FeaturePipeline().fit_transform(df)
+    y = df["risk_label"].values
+    settings = {
+        "n_jobs": 2,
+        "min_rows": 100,
+        "spaces": {
+            "anomaly_detector": {"n_estimators": [10, 20]},
+            "intent_predictor": {"n_estimators": [5, 10], "max_depth": [1, None]},
+        },
+    }
+
+    results = search_hyperparameters(X, y, settings=settings, log=lambda message: None)
+
+    assert set(results) == {"anomaly_detector", "intent_predictor"}
+    assert results["intent_predictor"]["candidates"] == 4
+    # Not every candidate reaches the full training set
+    assert len(results["intent_predictor"]["trials"]) < 4 * 3
+    assert 0.5 < results["intent_predictor"]["score"] <= 1.0
+
+    path = tmp_path / "model_config.yaml"
+    path.write_text(yaml.safe_dump({"intent_predictor": {"learning_rate": 0.1}, "risk_threshold": 0.4}))
+    save_search_results(results, path)
+    config = yaml.safe_load(path.read_text())
+
+    assert config["risk_threshold"] == 0.4
+    assert config["intent_predictor"]["learning_rate"] == 0.1
+    assert config["intent_predictor"]["n_estimators"] == results["intent_predictor"]["params"]["n_estimators"]
+    assert config["search_results"]["intent_predictor"]["roc_auc"] == round(results["intent_predictor"]["score"], 6)
+
+
+def test_update_model_config_keeps_other_keys(tmp_path):
+    path = tmp_path / "model_config.yaml"
+    path.write_text(yaml.safe_dump({"anomaly_detector": {"contamination": 0.1}, "search": {"eta": 3}}))
+    update_model_config({"risk_threshold": 0.55, "anomaly_detector": {"n_estimators": 50}}, path)
+
+    assert yaml.safe_load(path.read_text()) == {
+        "anomaly_detector": {"contamination": 0.1, "n_estimators": 50},
+        "search": {"eta": 3},
+        "risk_threshold": 0.55,
+    }
+
+
+def test_update_model_config_leaves_hand_edited_file_alone(tmp_path, monkeypatch):
+    base = tmp_path / "model_config.yaml"
+    base.write_text("# tuned by hand\nrisk_threshold: 0.6  # keep\n")
+    store = ConfigStore(tmp_path, check_interval=0)
+    monkeypatch.setattr(config_store, "_store", store)
+
+    path = update_model_config({"risk_threshold": 0.55})
+
+    assert path == tmp_path / "model_config.tuned.yaml"
+    assert base.read_text() == "# tuned by hand\nrisk_threshold: 0.6  # keep\n"
+    assert store.value("model", "risk_threshold") == 0.55
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
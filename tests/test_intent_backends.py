@@ -0,0 +1,86 @@
+"""Tests for the pluggable intent predictor backends."""
+
+import numpy as np
+import pytest
+
+from models import intent_predictor as intent_module
+from models.intent_predictor import IntentPredictor, available_backends
+from models.model_trainer import profile_intent_model
+
+
+@pytest.fixture(scope="module")
+def data(trained_models, events_df):
+    _, _, pipeline, _ = trained_models
+    X = pipeline.transform(events_df)
+    return X, events_df["risk_label"].values
+
+
+def test_sklearn_backends_share_the_api(data):
+    X, y = data
+    for backend in ("random_forest", "hist_gradient_boosting"):
+        predictor = IntentPredictor(n_estimators=20, backend=backend).fit(X, y)
+        probs = predictor.predict_proba(X)
+        assert probs.shape == (len(X),)
+        assert ((probs >= 0) & (probs <= 1)).all()
+        assert predictor.predict(X).tolist() == (probs >= 0.5).astype(int).tolist()
+
+
+def test_min_samples_leaf_defaults_per_backend(caplog):
+    assert IntentPredictor(backend="random_forest").model.min_samples_leaf == 1
+    assert IntentPredictor(backend="hist_gradient_boosting").model.min_samples_leaf == 20
+    assert IntentPredictor(backend="hist_gradient_boosting", min_samples_leaf=5).model.min_samples_leaf == 5
+
+    with caplog.at_level("WARNING", logger="models.intent_predictor"):
+        IntentPredictor(backend="hist_gradient_boosting", subsample=0.8)
+    assert "subsample=0.8 is ignored" in caplog.text
+
+
+def test_backend_names_and_aliases():
+    assert IntentPredictor(backend="gradient_boosting").backend == "hist_gradient_boosting"
+    with pytest.raises(ValueError):
+        IntentPredictor(backend="catboost")
+
+
+def test_missing_library_raises_import_error(monkeypatch):
+    monkeypatch.setattr(intent_module, "lightgbm", None)
+    monkeypatch.setattr(intent_module, "xgboost", None)
+
+    assert available_backends() == ["random_forest", "hist_gradient_boosting"]
+    for backend in ("lightgbm", "xgboost"):
+        with pytest.raises(ImportError):
+            IntentPredictor(backend=backend)
+
+
+@pytest.mark.parametrize("backend", ["lightgbm", "xgboost"])
+def test_optional_backends_share_the_api(data, backend):
+    pytest.importorskip(backend)
+    X, y = data
+    predictor = IntentPredictor(n_estimators=20, backend=backend).fit(X, y)
+    probs = predictor.predict_proba(X)
+
+    assert probs.shape == (len(X),)
+    assert ((probs >= 0) & (probs <= 1)).all()
+    assert predictor.predict(X).tolist() == (probs >= 0.5).astype(int).tolist()
+
+
+def test_xgboost_unlimited_depth_grows_leaf_wise():
+    pytest.importorskip("xgboost")
+    unlimited = IntentPredictor(backend="xgboost", max_depth=None).model.get_params()
+    limited = IntentPredictor(backend="xgboost", max_depth=6).model.get_params()
+
+    assert (unlimited["max_depth"], unlimited["grow_policy"]) == (0, "lossguide")
+    assert limited["max_depth"] == 6 and limited["grow_policy"] is None
+
+
+def test_profile_reports_latency_and_size(data):
+    X, y = data
+    profile = profile_intent_model(
+        IntentPredictor(n_estimators=10, backend="hist_gradient_boosting"), X, y, X, y, latency_rows=20
+    )
+
+    assert profile["backend"] == "hist_gradient_boosting"
+    assert profile["fit_seconds"] > 0
+    assert 0 < profile["row_p50_ms"] <= profile["row_p99_ms"]
+    assert profile["model_bytes"] > 0
+    assert 0.5 < profile["roc_auc"] <= 1.0
+    assert np.isfinite(profile["rows_per_second"])
@@ -0,0 +1,106 @@
+"""Tests for vectorized IP parsing, CIDR lookups and IP features."""
+
+import ipaddress
+
+import numpy as np
+import pandas as pd
+
+from src.feature_pipeline import FeaturePipeline
+from src.ip_features import CidrIndex, int_to_ipv4, ip_reputation, parse_ips
+from src.response_engine import simulate_auto_defense
+
+
+def test_parse_matches_ipaddress():
+    rng = np.random.default_rng(0)
+    addresses = int_to_ipv4(rng.integers(0, 2 ** 32, 2000, dtype=np.uint64))
+    values = list(addresses) + [
+        "0.0.0.0", "255.255.255.255", "::1", "2001:db8::1", "::ffff:10.1.2.3",
+        "256.1.1.1", "01.2.3.4", "1.2.3", "1.2.3.4.5", "1..2.3", "host", "é.1.1.1", "", None,
+    ]
+    ips = parse_ips(values)
+
+    for n, value in enumerate(values):
+        try:
+            address = ipaddress.ip_address(value)
+        except ValueError:
+            assert ips.version[n] == 0, value
+            continue
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        assert ips.version[n] == address.version, value
+        if address.version == 4:
+            assert ips.v4[n] == int(address)
+        else:
+            assert ips.v6[n] == int(address)
+
+
+def test_cidr_index_most_specific_network_wins():
+    index = CidrIndex({
+        "10.0.0.0/8": "corp",
+        "10.1.0.0/16": "lab",
+        "10.1.2.0/24": "quarantine",
+        "10.1.2.128/25": "honeypot",
+        "2001:db8::/32": "v6",
+    })
+    labels = index.label(
+        ["10.0.0.1", "10.1.9.9", "10.1.2.3", "10.1.2.200", "10.1.3.0", "10.255.255.255",
+         "11.0.0.0", "2001:db8::5", "2001:db9::", "bogus"],
+        default="none",
+    )
+
+    assert labels.tolist() == [
+        "corp", "lab", "quarantine", "honeypot", "lab", "corp", "none", "v6", "none", "none",
+    ]
+
+
+def test_cidr_index_from_file(tmp_path):
+    path = tmp_path / "reputation.txt"
+    path.write_text("# known bad\n203.0.113.0/24 tor_exit\n198.51.100.7, scanner\n\n192.0.2.0/24\n")
+    index = CidrIndex.from_file(path)
+
+    assert len(index) == 3
+    assert index.label(["203.0.113.9", "198.51.100.7", "192.0.2.1", "8.8.8.8"]).tolist() == [
+        "tor_exit", "scanner", True, None,
+    ]
+
+
+def test_internal_flag_and_reputation():
+    assert ip_reputation(["10.2.3.4", "172.20.0.1", "192.168.1.10", "8.8.8.8", "fe80::1", "junk"]).tolist() == [
+        "internal", "internal", "internal", "external", "internal", "external",
+    ]
+
+
+def test_pipeline_ip_features_agree_across_input_types(events_df):
+    import pyarrow as pa
+
+    pipeline = FeaturePipeline(ip_features=True).fit(events_df)
+    for name in ("ip_prefix16", "ip_prefix24", "ip_is_internal", "ip_is_ipv6"):
+        assert name in pipeline.columns
+
+    sample = events_df.head(30)
+    X = pipeline.transform(sample)
+    records = sample.drop(columns=["risk_label"]).assign(
+        timestamp=sample["timestamp"].astype(str)).to_dict("records")
+    table = pa.Table.from_pandas(pd.DataFrame(records), preserve_index=False)
+
+    np.testing.assert_array_equal(pipeline.transform(records), X)
+    np.testing.assert_array_equal(pipeline.transform(table), X)
+    internal = ip_reputation(sample["ip_address"]) == "internal"
+    np.testing.assert_array_equal(X[:, pipeline.columns.index("ip_is_internal")], internal)
+    first = ipaddress.ip_address(sample["ip_address"].iloc[0])
+    assert X[0, pipeline.columns.index("ip_prefix24")] == int(first) >> 8
+
+
+def test_auto_defense_groups_by_subnet():
+    df = pd.DataFrame({
+        "ip_address": ["203.0.113.1", "203.0.113.2", "203.0.113.3", "10.0.0.5", "10.0.0.5", "10.0.0.5"],
+        "risk_score": [0.9] * 6,
+    })
+
+    by_ip = simulate_auto_defense(df, risk_threshold=0.5, min_events_for_block=3)
+    by_subnet = simulate_auto_defense(df, risk_threshold=0.5, min_events_for_block=3, subnet_prefix=24)
+
+    assert by_ip["blocked_ips"] == ["10.0.0.5"]
+    assert sorted(by_subnet["blocked_ips"]) == ["10.0.0.0/24", "203.0.113.0/24"]
+    reputation = dict(zip(by_subnet["blocked_df"]["ip_address"], by_subnet["blocked_df"]["reputation"]))
+    assert reputation == {"10.0.0.0/24": "internal", "203.0.113.0/24": "external"}
@@ -0,0 +1,90 @@
+"""Tests for the chunked, dtype-declared log loader."""
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import add_time_features, concat_chunks, iter_logs, load_log_column, load_logs
+from src.feature_pipeline import FeaturePipeline
+from tests.conftest import make_events
+
+
+def _write(tmp_path, df, name="logs.csv"):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_chunked_load_matches_single_read(tmp_path):
+    path = _write(tmp_path, make_events())
+    chunked = load_logs(path, chunksize=37)
+    whole = load_logs(path, chunksize=10_000)
+
+    assert len(chunked) == len(whole) == 360
+    pd.testing.assert_frame_equal(chunked, whole)
+    for column in ("user_id", "ip_address", "action", "status"):
+        assert isinstance(chunked[column].dtype, pd.CategoricalDtype)
+    assert chunked["bytes_transferred"].dtype == np.float32
+    assert chunked["risk_label"].dtype == np.int8
+    assert "timestamp" not in chunked.columns
+
+
+def test_label_column_is_mapped(tmp_path):
+    df = make_events(n_normal=4, n_attack=2).drop(columns=["risk_label"])
+    df["label"] = ["Benign", "normal", "malicious", "exfiltration", "legit", "BENIGN"]
+    df = load_logs(_write(tmp_path, df), chunksize=4)
+
+    assert df["risk_label"].tolist() == [0, 0, 1, 1, 0, 0]
+
+
+def test_iter_logs_yields_bounded_chunks(tmp_path):
+    path = _write(tmp_path, make_events())
+    sizes = [len(chunk) for chunk in iter_logs(path, chunksize=100)]
+
+    assert sizes == [100, 100, 100, 60]
+
+
+def test_load_log_column_matches_full_load(tmp_path):
+    path = _write(tmp_path, make_events())
+    column = load_log_column(path, "action", chunksize=100)
+
+    assert column.dtype == object
+    assert column.tolist() == load_logs(path)["action"].tolist()
+
+
+def test_concat_chunks_unions_categories():
+    a = pd.DataFrame({"action": pd.Categorical(["login", "logout"])})
+    b = pd.DataFrame({"action": pd.Categorical(["port_scan"])})
+    df = concat_chunks([a, b])
+
+    assert isinstance(df["action"].dtype, pd.CategoricalDtype)
+    assert list(df["action"].cat.categories) == ["login", "logout", "port_scan"]
+    assert df["action"].tolist() == ["login", "logout", "port_scan"]
+
+
+def test_feature_matrix_matches_unchunked_read(tmp_path):
+    events = make_events()
+    path = _write(tmp_path, events)
+    chunked = load_logs(path, chunksize=50)
+    plain = pd.read_csv(path)
+    plain["timestamp"] = pd.to_datetime(plain["timestamp"])
+    plain = add_time_features(plain)
+
+    chunked_pipeline = FeaturePipeline().fit(chunked)
+    plain_pipeline = FeaturePipeline().fit(plain)
+    assert chunked_pipeline.columns == plain_pipeline.columns
+    np.testing.assert_allclose(chunked_pipeline.transform(chunked), plain_pipeline.transform(plain))
+
+
+def test_streamed_fit_and_encode_match_whole_frame(tmp_path):
+    path = _write(tmp_path, make_events())
+    encodings = {"user_id": "target", "ip_address": "frequency", "user_agent": "hash"}
+    whole = load_logs(path)
+
+    streamed = FeaturePipeline(encodings=encodings).fit_chunks(iter_logs(path, chunksize=37))
+    expected = FeaturePipeline(encodings=encodings).fit(whole)
+    assert streamed.fingerprint() == expected.fingerprint()
+
+    X = streamed.transform_chunks(iter_logs(path, chunksize=37), n_rows=len(whole))
+    np.testing.assert_array_equal(X, expected.transform(whole))
+    sparse = streamed.transform_chunks(iter_logs(path, chunksize=37), n_rows=len(whole), sparse=True)
+    np.testing.assert_array_equal(sparse.toarray(), X)
@@ -0,0 +1,90 @@
+"""Tests for in-process metrics and the monitoring endpoints."""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from src.metrics import MetricsRegistry, get_metrics
+from src.stream_processor import StreamProcessor
+
+
+def test_counter_sums_per_thread_cells():
+    counter = MetricsRegistry().counter("things_total")
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.value == 40000
+
+
+def test_histogram_quantiles_fall_in_right_bucket():
+    hist = MetricsRegistry().histogram("latency_seconds", buckets=(0.001, 0.01, 0.1, 1.0))
+    for _ in range(90):
+        hist.observe(0.0005)
+    for _ in range(10):
+        hist.observe(0.05)
+
+    assert hist.count == 100
+    assert 0 < hist.quantile(0.5) <= 0.001
+    assert 0.01 < hist.quantile(0.99) <= 0.1
+    assert hist.summary()["count"] == 100
+    assert MetricsRegistry().histogram("empty").quantile(0.5) is None
+
+
+def test_prometheus_exposition():
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("requests_total", "Requests", labels={"route": "/a"}).inc(3)
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    hist.observe(0.05)
+    hist.observe(5.0)
+    registry.gauge("answer", "Answer", lambda: 42)
+    registry.counter_fn("cpu_seconds_total", "CPU", lambda: 1.5)
+
+    text = registry.render_prometheus()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+    assert "test_answer 42" in text
+    assert "# TYPE test_answer gauge" in text
+    assert "# TYPE test_cpu_seconds_total counter" in text
+    assert "test_cpu_seconds_total 1.5" in text
+
+
+def test_stream_processor_is_instrumented():
+    before = get_metrics().total("stream_events_total")
+    StreamProcessor().process_batch([{"action": "login"}, {"action": "logout"}])
+    assert get_metrics().total("stream_events_total") == before + 2
+
+
+@pytest.fixture
+def client(model_registry):
+    return TestClient(app)
+
+
+def test_endpoints_report_real_numbers(client):
+    before = get_metrics().total("events_scored_total")
+    client.post("/predict/batch", json={"events": [{"action": "login"}] * 5})
+    client.post("/predict/event", json={"action": "download"})
+
+    body = client.get("/api/monitor/metrics").json()
+    assert body["total_events_processed"] >= before + 6
+    assert body["prediction_latency"]["p99_ms"] is not None
+
+    perf = client.get("/api/monitor/performance").json()
+    assert perf["prediction_latency_p50_ms"] is not None
+    assert "POST /predict/event 200" in perf["routes"]
+
+    scrape = client.get("/metrics")
+    assert scrape.headers["content-type"].startswith("text/plain")
+    assert "cyberintent_scoring_seconds_bucket" in scrape.text
+    assert 'route="/predict/batch"' in scrape.text
@@ -0,0 +1,61 @@
+"""Tests for the prediction routes."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from tests.conftest import make_events
+
+
+@pytest.fixture
+def client(model_registry):
+    return TestClient(app)
+
+
+def _payloads(n):
+    df = make_events(n_normal=n, n_attack=0, seed=1).drop(columns=["risk_label"])
+    df["timestamp"] = df["timestamp"].astype(str)
+    return df.to_dict(orient="records")
+
+
+def test_predict_event(client):
+    response = client.post("/predict/event", json=_payloads(1)[0])
+    assert response.status_code == 200
+    body = response.json()
+    assert 0.0 <= body["risk_score"] <= 1.0
+    assert body["recommended_action"] in ("block", "monitor")
+
+
+def test_predict_batch_matches_single_event(client):
+    events = _payloads(5)
+    response = client.post("/predict/batch", json={"events": events})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 5
+    assert body["errors"] == 0
+
+    for item, event in zip(body["results"], events):
+        single = client.post("/predict/event", json=event).json()
+        assert item["prediction"]["intent_probability"] == pytest.approx(
+            single["intent_probability"]
+        )
+        assert item["prediction"]["anomaly_score"] == pytest.approx(
+            single["anomaly_score"]
+        )
+        assert item["prediction"]["risk_score"] == pytest.approx(
+            single["risk_score"]
+        )
+
+
+def test_predict_batch_reports_item_errors(client):
+    events = _payloads(3)
+    events[1]["bytes_transferred"] = "not-a-number"
+    response = client.post("/predict/batch", json={"events": events})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == 1
+    assert [r["index"] for r in body["results"]] == [0, 1, 2]
+    assert body["results"][1]["prediction"] is None
+    assert body["results"][1]["error"]
+    assert body["results"][0]["prediction"] is not None
+    assert body["results"][2]["prediction"] is not None
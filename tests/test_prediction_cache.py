@@ -0,0 +1,97 @@
+"""Tests for the prediction cache."""
+
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from src import prediction_cache as cache_module
+from src.prediction_cache import PredictionCache
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2, ttl_seconds=60)
+    cache.bind_generation("v1")
+    keys = [cache.key(np.array([i], dtype=np.float32), "v1") for i in range(3)]
+    cache.put(keys[0], "a")
+    cache.put(keys[1], "b")
+    assert cache.get(keys[0]) == "a"
+    cache.put(keys[2], "c")
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a"
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry():
+    cache = PredictionCache(max_size=10, ttl_seconds=0.01)
+    cache.bind_generation("v1")
+    key = cache.key(np.zeros(3), "v1")
+    cache.put(key, "a")
+    time.sleep(0.02)
+    assert cache.get(key) is None
+    assert cache.expirations == 1
+
+
+def test_new_generation_invalidates():
+    cache = PredictionCache()
+    cache.bind_generation("v1")
+    key = cache.key(np.zeros(3), "v1")
+    cache.put(key, "a")
+
+    cache.bind_generation("v2")
+    assert cache.stats()["size"] == 0
+    assert cache.key(np.zeros(3), "v2") != key
+    assert cache.invalidations == 1
+
+
+def test_request_on_previous_generation_keeps_its_own_keys():
+    cache = PredictionCache()
+    cache.bind_generation("v1")
+    cache.bind_generation("v2")
+    new_key = cache.key(np.zeros(3), "v2")
+    cache.put(new_key, "new")
+
+    # A request still holding the v1 bundle neither clears v2 entries
+    # nor writes its scores where v2 lookups would find them
+    cache.bind_generation("v1")
+    old_key = cache.key(np.zeros(3), "v1")
+    cache.put(old_key, "old")
+
+    assert cache.get(new_key) == "new"
+    assert cache.get(old_key) == "old"
+    assert cache.invalidations == 1
+
+
+@pytest.fixture
+def cached_client(model_registry, monkeypatch):
+    cache = PredictionCache(max_size=100, ttl_seconds=60)
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    monkeypatch.setattr(cache_module, "_cache_loaded", True)
+    return TestClient(app), cache
+
+
+def test_repeated_events_hit_cache(cached_client):
+    client, cache = cached_client
+    event = {"user_id": "user_001", "action": "login", "status": "success", "bytes_transferred": 2048}
+
+    first = client.post("/predict/event", json=event).json()
+    second = client.post("/predict/event", json=event).json()
+
+    assert first == second
+    stats = client.get("/api/monitor/cache").json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_batch_mixes_cached_and_new_rows(cached_client):
+    client, cache = cached_client
+    events = [{"action": "login", "bytes_transferred": b} for b in (1, 2, 1, 3)]
+    uncached = client.post("/predict/batch", json={"events": events}).json()
+    cache.clear()
+
+    client.post("/predict/batch", json={"events": events[:2]})
+    mixed = client.post("/predict/batch", json={"events": events}).json()
+    assert mixed == uncached
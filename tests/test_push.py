@@ -0,0 +1,114 @@
+"""Tests for the event bus and push endpoints."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import push as push_module
+from src import event_bus as bus_module
+from src.alert_system import Alert, AlertSeverity, AlertType
+from src.event_bus import EventBus
+
+
+def _message(severity="LOW", user_id="u1", ip="10.0.0.1"):
+    return {"type": "event", "severity": severity, "user_id": user_id, "ip_address": ip}
+
+
+def test_filters_and_bounded_buffer():
+    async def main():
+        bus = EventBus()
+        high = bus.subscribe(min_severity="HIGH")
+        small = bus.subscribe(max_buffer=2, user_id="u1")
+
+        bus.publish(_message("LOW"))
+        bus.publish(_message("CRITICAL"))
+        bus.publish(_message("MEDIUM", user_id="u2"))
+        bus.publish(_message("HIGH"))
+
+        assert (await high.get())["severity"] == "CRITICAL"
+        assert (await high.get())["severity"] == "HIGH"
+        assert await small.get() == {"type": "dropped", "count": 1}
+        assert (await small.get())["severity"] == "CRITICAL"
+        assert (await small.get())["severity"] == "HIGH"
+
+        bus.unsubscribe(high)
+        assert bus.subscriber_count == 1
+
+    asyncio.run(main())
+
+
+def test_publish_from_worker_thread_wakes_subscriber():
+    async def main():
+        bus = EventBus()
+        subscription = bus.subscribe()
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, bus.publish, _message())
+        return await asyncio.wait_for(subscription.get(), 1)
+
+    assert asyncio.run(main())["user_id"] == "u1"
+
+
+@pytest.fixture
+def client(model_registry, monkeypatch):
+    monkeypatch.setattr(bus_module, "_bus", EventBus())
+    return TestClient(app)
+
+
+def test_websocket_receives_scored_events_and_alerts(client):
+    with client.websocket_connect("/push/ws?user_id=user_042") as ws:
+        client.post("/predict/event", json={"user_id": "user_042", "action": "login"})
+        message = ws.receive_json()
+        assert message["type"] == "event"
+        assert message["user_id"] == "user_042"
+        assert "risk_score" in message["data"]
+
+        bus_module.get_event_bus().publish_alert(Alert(
+            AlertType.HIGH_RISK, AlertSeverity.CRITICAL, "test",
+            details={"context": {"user_id": "user_042"}},
+        ))
+        message = ws.receive_json()
+        assert message["type"] == "alert"
+        assert message["data"]["severity"] == "CRITICAL"
+
+
+class _DisconnectingWebSocket:
+    """Client that sends one message and then goes away, as a server sees it."""
+
+    def __init__(self):
+        self.incoming = [{"type": "websocket.receive", "text": "ping"}, {"type": "websocket.disconnect"}]
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        await asyncio.sleep(0.01)
+        return self.incoming.pop(0)
+
+    async def send_text(self, text):
+        raise AssertionError("no message matches this client's filters")
+
+
+def test_websocket_disconnect_unsubscribes_without_traffic(monkeypatch):
+    async def main():
+        bus = EventBus()
+        monkeypatch.setattr(bus_module, "_bus", bus)
+        await asyncio.wait_for(push_module.stream_websocket(
+            _DisconnectingWebSocket(), min_severity=None, user_id="nobody", ip_address=None,
+            types=None, buffer=10,
+        ), 1)
+        return bus.subscriber_count
+
+    assert asyncio.run(main()) == 0
+
+
+def test_recent_events_endpoint(client):
+    client.post("/predict/batch", json={"events": [{"action": "login"}] * 3})
+    body = client.get("/api/monitor/events?limit=2").json()
+    assert body["count"] == 2
+    assert body["events"][0]["type"] == "event"
+
+
+def test_invalid_severity_rejected(client):
+    assert client.get("/push/sse?min_severity=URGENT").status_code == 400
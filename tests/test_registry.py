@@ -0,0 +1,85 @@
+"""Tests for versioned model storage and the model registry."""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from models import registry as registry_module
+from models.registry import CURRENT_FILE, ModelRegistry, save_model_version
+
+
+@pytest.fixture
+def published(trained_models, tmp_path):
+    anomaly_model, intent_model, pipeline, calibrator = trained_models
+    anomaly_model.compile()
+    intent_model.compile()
+    save_model_version(anomaly_model, intent_model, pipeline, calibrator, models_dir=tmp_path)
+    return tmp_path
+
+
+def test_load_memory_maps_compiled_arrays(published, trained_models, events_df):
+    registry = ModelRegistry(models_dir=published, mmap=True)
+    bundle = registry.load()
+
+    assert bundle.version == (published / CURRENT_FILE).read_text()
+    assert isinstance(bundle.anomaly_model.compiled_.threshold, np.memmap)
+    assert bundle.memory_usage()["mapped_array_bytes"] > 0
+
+    X = bundle.pipeline.transform(events_df.head(10))
+    np.testing.assert_allclose(
+        bundle.intent_model.predict_proba(X), trained_models[1].predict_proba(X)
+    )
+
+
+def test_compiled_engine_skips_sklearn_estimators(published, trained_models, events_df, monkeypatch):
+    monkeypatch.setattr(registry_module, "load_inference_engine", lambda default: "compiled")
+    bundle = ModelRegistry(models_dir=published, mmap=True).load()
+
+    assert bundle.anomaly_model.model is None and bundle.intent_model.model is None
+    assert bundle.memory_usage()["private_array_bytes"] == 0
+    # The trained objects keep their estimators after saving
+    assert trained_models[1].model is not None
+
+    monkeypatch.setattr(registry_module, "load_inference_engine", lambda default: "sklearn")
+    bundle = ModelRegistry(models_dir=published, mmap=True).load()
+    X = bundle.pipeline.transform(events_df.head(10))
+    np.testing.assert_allclose(
+        bundle.intent_model.predict_proba(X), trained_models[1].predict_proba(X)
+    )
+    assert bundle.memory_usage()["private_array_bytes"] > 0
+
+
+def test_new_version_is_swapped_in(published, trained_models):
+    registry = ModelRegistry(models_dir=published, check_interval=0)
+    first = registry.load()
+    swapped = []
+    registry.add_listener(swapped.append)
+
+    save_model_version(*trained_models, models_dir=published)
+    second = registry.load()
+
+    assert second.version != first.version
+    assert registry.current() is second
+    assert swapped == [second]
+
+
+def test_old_versions_are_pruned(trained_models, tmp_path):
+    for _ in range(4):
+        save_model_version(*trained_models, models_dir=tmp_path, keep=2)
+    versions = [p for p in tmp_path.iterdir() if p.is_dir()]
+    assert len(versions) == 2
+    assert (tmp_path / (tmp_path / CURRENT_FILE).read_text()).is_dir()
+
+
+def test_missing_models_raise(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ModelRegistry(models_dir=tmp_path).load()
+
+
+def test_info_endpoint(model_registry):
+    body = TestClient(app).get("/models/info").json()
+    assert body["loaded"] is True
+    assert body["version"] == "unversioned"
+    assert "load_time_ms" in body
+    assert body["n_features"] > 0
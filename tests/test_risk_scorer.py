@@ -0,0 +1,42 @@
+"""Tests for risk score calibration."""
+
+import numpy as np
+import pytest
+
+from models.risk_scorer import ScoreCalibrator, compute_risk_score
+
+
+@pytest.fixture
+def calibrator():
+    rng = np.random.default_rng(0)
+    return ScoreCalibrator().fit(rng.normal(size=1000))
+
+
+def test_calibrated_score_is_batch_independent(calibrator):
+    scores = np.array([-2.0, 0.0, 0.5, 3.0])
+    probs = np.array([0.1, 0.2, 0.3, 0.9])
+
+    batch = compute_risk_score(scores, probs, calibrator=calibrator)
+    single = [
+        compute_risk_score(scores[i:i + 1], probs[i:i + 1], calibrator=calibrator)[0]
+        for i in range(len(scores))
+    ]
+    np.testing.assert_allclose(batch, single)
+
+
+def test_calibrator_is_monotonic_and_bounded(calibrator):
+    scores = np.linspace(-10, 10, 200)
+    calibrated = calibrator.transform(scores)
+    assert calibrated[0] == 0.0
+    assert calibrated[-1] == 1.0
+    assert np.all(np.diff(calibrated) >= 0)
+
+
+def test_single_event_is_not_forced_to_zero(calibrator):
+    risk = compute_risk_score([10.0], [0.0], calibrator=calibrator)
+    assert risk[0] == pytest.approx(0.4)
+
+
+def test_unfitted_calibrator_raises():
+    with pytest.raises(ValueError):
+        ScoreCalibrator().transform([0.1])
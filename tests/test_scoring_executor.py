@@ -0,0 +1,124 @@
+"""Tests for the micro-batching scoring executor."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.scoring_executor import MicroBatchExecutor
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_are_merged():
+    calls = []
+
+    def score(items):
+        calls.append(list(items))
+        return [x * 2 for x in items]
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=16, max_wait_ms=20, workers=1)
+        results = await asyncio.gather(*(executor.submit(i) for i in range(10)))
+        await executor.stop()
+        return results
+
+    assert _run(main()) == [i * 2 for i in range(10)]
+    assert len(calls) < 10
+    assert sorted(x for batch in calls for x in batch) == list(range(10))
+
+
+def test_batches_respect_max_size():
+    sizes = []
+
+    def score(items):
+        sizes.append(len(items))
+        return items
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=4, max_wait_ms=20, workers=1)
+        await asyncio.gather(*(executor.submit(i) for i in range(10)))
+        await executor.stop()
+
+    _run(main())
+    assert max(sizes) <= 4
+    assert sum(sizes) == 10
+
+
+def test_scoring_runs_off_the_event_loop():
+    loop_thread = []
+
+    def score(items):
+        loop_thread.append(threading.get_ident())
+        time.sleep(0.05)
+        return items
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=1, max_wait_ms=0, workers=1)
+        task = asyncio.ensure_future(executor.submit(1))
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        ticked = time.perf_counter() - start
+        await task
+        await executor.stop()
+        return ticked
+
+    assert _run(main()) < 0.04
+    assert loop_thread[0] != threading.get_ident()
+
+
+def test_errors_reach_every_caller():
+    def score(items):
+        raise RuntimeError("boom")
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=8, max_wait_ms=5, workers=1)
+        results = await asyncio.gather(
+            *(executor.submit(i) for i in range(3)), return_exceptions=True
+        )
+        await executor.stop()
+        return results
+
+    results = _run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_short_result_list_fails_every_caller():
+    def score(items):
+        return [x * 2 for x in items][:-1]
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=8, max_wait_ms=20, workers=1)
+        results = await asyncio.wait_for(asyncio.gather(
+            *(executor.submit(i) for i in range(3)), return_exceptions=True
+        ), 5)
+        await executor.stop()
+        return results
+
+    results = _run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stop_waits_for_running_batches():
+    started = threading.Event()
+
+    def score(items):
+        started.set()
+        time.sleep(0.1)
+        return [x * 2 for x in items]
+
+    async def main():
+        executor = MicroBatchExecutor(score, max_batch_size=4, max_wait_ms=0, workers=1)
+        pending = asyncio.ensure_future(executor.submit(21))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        assert len(executor._tasks) == 1  # the running batch is referenced
+        await executor.stop()
+        return await pending, executor._tasks
+
+    result, tasks = _run(main())
+    assert result == 42
+    assert not tasks
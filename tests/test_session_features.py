@@ -0,0 +1,123 @@
+"""Tests for session reconstruction and session features."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from src import session_features as session_module
+from src.session_features import (
+    SESSION_FEATURES,
+    SessionTracker,
+    add_session_features,
+    build_sessions,
+)
+from src.stream_processor import StreamProcessor
+from tests.conftest import make_events
+
+START = datetime(2024, 1, 15, 9, 0, 0)
+
+
+def _event(seconds, user="user_001", ip="192.168.1.10", action="login",
+           status="success", nbytes=100):
+    return {
+        "timestamp": (START + timedelta(seconds=seconds)).isoformat(),
+        "user_id": user,
+        "ip_address": ip,
+        "action": action,
+        "status": status,
+        "bytes_transferred": nbytes,
+    }
+
+
+def test_gap_splits_sessions():
+    tracker = SessionTracker(gap_seconds=60)
+    tracker.update(_event(0, action="login", status="failed"))
+    tracker.update(_event(30, action="file_download", nbytes=500))
+    out = tracker.update(_event(80, action="login"))
+
+    assert out["session_events"] == 3
+    assert out["session_duration"] == 80
+    assert out["session_failure_ratio"] == pytest.approx(1 / 3)
+    assert out["session_bytes"] == 700
+    assert out["session_distinct_actions"] == 2
+
+    # 61 s of silence: a new session, and the old one is summarised
+    out = tracker.update(_event(141))
+    assert out["session_events"] == 1
+    assert out["session_duration"] == 0
+    assert tracker.closed[-1]["events"] == 3
+    assert tracker.closed[-1]["duration_seconds"] == 80
+
+
+def test_sessions_are_per_user_and_ip():
+    tracker = SessionTracker(gap_seconds=60)
+    tracker.update(_event(0, user="alice", ip="10.0.0.1"))
+    tracker.update(_event(1, user="alice", ip="10.0.0.2"))
+    out = tracker.update(_event(2, user="alice", ip="10.0.0.1"))
+
+    assert out["session_events"] == 2
+    assert len(tracker) == 2
+
+
+def test_idle_sessions_close():
+    tracker = SessionTracker(gap_seconds=60)
+    tracker.update(_event(0, user="alice"))
+    tracker.update(_event(500, user="bob"))
+
+    assert len(tracker) == 1
+    assert tracker.recent_sessions()[0]["user_id"] == "alice"
+
+
+def test_batch_matches_tracker():
+    df = make_events().sort_values("timestamp", kind="stable").reset_index(drop=True)
+    enriched = add_session_features(df, gap_seconds=600)
+    expected = SessionTracker(gap_seconds=600).update_many(
+        df.assign(timestamp=df["timestamp"].astype(str)).to_dict("records"))
+
+    for name in SESSION_FEATURES:
+        np.testing.assert_allclose(enriched[name].to_numpy(), expected[name], rtol=1e-6)
+
+
+def test_build_sessions_aggregates():
+    df = make_events(n_normal=100, n_attack=30)
+    enriched = add_session_features(df, gap_seconds=600)
+    sessions = build_sessions(df, gap_seconds=600)
+
+    assert len(sessions) == enriched["session_id"].nunique()
+    assert sessions["events"].sum() == len(df)
+    assert sessions["bytes"].sum() == pytest.approx(df["bytes_transferred"].sum())
+    assert (sessions["end"] >= sessions["start"]).all()
+
+    by_id = sessions.set_index("session_id")
+    for session_id, group in enriched.groupby("session_id"):
+        row = by_id.loc[session_id]
+        assert row["events"] == len(group)
+        assert row["distinct_actions"] == group["action"].nunique()
+        assert row["attack"] == group["risk_label"].max()
+        assert (group["user_id"] == row["user_id"]).all()
+
+
+def test_stream_processor_appends_session_features():
+    processor = StreamProcessor(sessions=SessionTracker(gap_seconds=60))
+    processor.process_event(_event(0))
+    event = processor.process_event(_event(5))
+    assert event["session_events"] == 2
+
+
+def test_prediction_route_tracks_sessions(model_registry, monkeypatch):
+    tracker = SessionTracker(gap_seconds=60)
+    monkeypatch.setattr(session_module, "_tracker", tracker)
+    monkeypatch.setattr(session_module, "_tracker_loaded", True)
+    client = TestClient(app)
+
+    events = [_event(n, user="mallory", ip="203.0.113.9", status="failed") for n in range(4)]
+    assert client.post("/predict/batch", json={"events": events}).status_code == 200
+    client.post("/predict/batch", json={"events": [_event(600, user="mallory", ip="203.0.113.9")]})
+
+    stats = client.get("/api/monitor/sessions").json()
+    assert stats["enabled"] and stats["open_sessions"] == 1
+    assert stats["recent"][0]["events"] == 4
+    assert stats["recent"][0]["failure_ratio"] == 1.0
@@ -0,0 +1,48 @@
+"""Tests for NDJSON streaming ingestion."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import prediction
+
+
+@pytest.fixture
+def client(model_registry):
+    return TestClient(app)
+
+
+def _chunks(lines, chunk_size=7):
+    body = ("\n".join(lines) + "\n").encode()
+    for i in range(0, len(body), chunk_size):
+        yield body[i:i + chunk_size]
+
+
+def test_stream_scores_every_line_in_order(client, monkeypatch):
+    monkeypatch.setattr(prediction, "STREAM_BATCH_SIZE", 4)
+    lines = [json.dumps({"action": "login", "bytes_transferred": i}) for i in range(10)]
+    lines[3] = "{not json"
+    lines[6] = json.dumps({"bytes_transferred": "many"})
+
+    response = client.post("/predict/stream", content=_chunks(lines))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == list(range(1, 11))
+    assert "error" in results[3] and "error" in results[6]
+    assert all("risk_score" in r for i, r in enumerate(results) if i not in (3, 6))
+
+
+def test_stream_matches_batch_endpoint(client):
+    events = [{"action": "file_download", "bytes_transferred": 10 ** i} for i in range(5)]
+    streamed = client.post(
+        "/predict/stream", content="\n".join(json.dumps(e) for e in events)
+    ).text.splitlines()
+    batch = client.post("/predict/batch", json={"events": events}).json()
+
+    for line, item in zip(streamed, batch["results"]):
+        result = json.loads(line)
+        assert result["risk_score"] == pytest.approx(item["prediction"]["risk_score"])
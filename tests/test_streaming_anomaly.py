@@ -0,0 +1,121 @@
+"""Tests for the streaming (half-space trees) anomaly detector."""
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import prediction as prediction_module
+from models.registry import ModelBundle
+from models.streaming_anomaly import HalfSpaceTrees, OnlineUpdater
+from src import prediction_cache as cache_module
+from src.prediction_cache import PredictionCache
+from tests.conftest import make_events
+
+
+def _normal(n, centre=0.0, seed=0):
+    return np.random.default_rng(seed).normal(centre, 1.0, size=(n, 4))
+
+
+def test_outliers_score_higher():
+    detector = HalfSpaceTrees(n_trees=20, max_depth=8, window_size=500).fit(_normal(3000))
+    X = np.vstack([_normal(200, seed=1), _normal(20, centre=6.0, seed=2)])
+    scores = detector.anomaly_score(X)
+
+    assert scores[200:].min() > np.median(scores[:200])
+    assert detector.predict(X)[200:].all()
+
+
+def test_update_follows_drift_one_window_at_a_time():
+    detector = HalfSpaceTrees(n_trees=20, max_depth=8, window_size=500).fit(_normal(3000))
+    shifted = _normal(500, centre=4.0, seed=4)
+    before = detector.anomaly_score(shifted).mean()
+    masses = detector.stats()["mass_bytes"]
+
+    # A partial window leaves the scoring profile untouched
+    detector.update(shifted[:499])
+    assert detector.anomaly_score(shifted).mean() == before
+    assert detector.generation == 0
+
+    detector.update(shifted[499:])
+    assert detector.generation == 1
+    assert detector.anomaly_score(shifted).mean() < before
+    assert detector.stats()["mass_bytes"] == masses
+
+
+def test_memory_mapped_model_can_be_updated(tmp_path):
+    detector = HalfSpaceTrees(n_trees=5, max_depth=4, window_size=10).fit(_normal(100))
+    joblib.dump(detector, tmp_path / "hst.pkl")
+    loaded = joblib.load(tmp_path / "hst.pkl", mmap_mode="r")
+
+    np.testing.assert_array_equal(loaded.anomaly_score(_normal(5)), detector.anomaly_score(_normal(5)))
+    loaded.update(_normal(25, seed=5))
+    assert loaded.generation == 2
+    assert loaded.window_count_ == 5
+
+
+def test_updater_applies_in_background_and_drops_overflow():
+    detector = HalfSpaceTrees(n_trees=5, max_depth=4, window_size=10).fit(_normal(100))
+    updater = OnlineUpdater(max_pending=2)
+
+    assert updater.submit(detector, _normal(10))
+    assert updater.flush(timeout=5)
+    assert detector.generation == 1
+    assert updater.stats()["updated_rows"] == 10
+
+    stalled = OnlineUpdater(max_pending=2)
+    stalled._thread = object()  # no worker: nothing drains the queue
+    assert stalled.submit(detector, _normal(1)) and stalled.submit(detector, _normal(1))
+    assert not stalled.submit(detector, _normal(1))
+    assert stalled.dropped_batches == 1
+
+
+def test_prediction_path_updates_streaming_detector(model_registry, monkeypatch):
+    bundle = model_registry.current()
+    events = make_events(n_normal=40, n_attack=0, seed=1)
+    X = bundle.pipeline.transform(events)
+    detector = HalfSpaceTrees(n_trees=5, max_depth=4, window_size=8).fit(X)
+    model_registry.swap(ModelBundle(detector, bundle.intent_model, bundle.pipeline, bundle.calibrator))
+
+    updater = OnlineUpdater()
+    monkeypatch.setattr(prediction_module, "get_online_updater", lambda: updater)
+
+    payloads = events.drop(columns=["risk_label"]).head(8)
+    payloads["timestamp"] = payloads["timestamp"].astype(str)
+    response = TestClient(app).post("/predict/batch", json={"events": payloads.to_dict(orient="records")})
+
+    assert response.status_code == 200
+    assert updater.flush(timeout=5)
+    assert detector.generation == 1
+    assert updater.stats()["updated_rows"] == 8
+
+
+def test_online_updates_bypass_prediction_cache(model_registry, monkeypatch):
+    bundle = model_registry.current()
+    events = make_events(n_normal=40, n_attack=0, seed=1)
+    detector = HalfSpaceTrees(n_trees=5, max_depth=4, window_size=4).fit(bundle.pipeline.transform(events))
+    model_registry.swap(ModelBundle(detector, bundle.intent_model, bundle.pipeline, bundle.calibrator))
+
+    cache = PredictionCache(max_size=100, ttl_seconds=60)
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    monkeypatch.setattr(cache_module, "_cache_loaded", True)
+    updater = OnlineUpdater()
+    monkeypatch.setattr(prediction_module, "get_online_updater", lambda: updater)
+
+    client = TestClient(app)
+    event = {"user_id": "user_001", "action": "login"}
+    first = client.post("/predict/event", json=event).json()
+    for _ in range(4):
+        client.post("/predict/event", json=event)
+    assert updater.flush(timeout=5)
+    second = client.post("/predict/event", json=event).json()
+
+    assert cache.hits + cache.misses == 0
+    assert detector.generation == 1
+    assert second["anomaly_score"] != first["anomaly_score"]
+
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        HalfSpaceTrees().set_engine("onnx")
@@ -0,0 +1,87 @@
+"""Tests for the risk-threshold optimizer."""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.metrics import f1_score
+
+from api.main import app
+from api.routes import prediction as prediction_module
+from models.threshold_optimizer import optimize_thresholds, threshold_config, threshold_curve
+from src.response_engine import segment_labels, segment_thresholds
+
+
+def _scores(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.random(n) < 0.2
+    scores = np.round(rng.random(n) * 0.6 + y * 0.3, 2)  # ties on purpose
+    return scores, y
+
+
+def test_curve_matches_brute_force_counts():
+    scores, y = _scores()
+    segments = np.where(np.arange(len(y)) % 3 == 0, "login", "download")
+    curve = threshold_curve(scores, y, segments, fp_cost=1, fn_cost=4)
+
+    for row in curve.itertuples():
+        mask = segments == row.segment
+        alert = scores[mask] >= row.threshold
+        assert row.tp == (alert & y[mask]).sum()
+        assert row.fp == (alert & ~y[mask]).sum()
+        assert row.cost == row.fp + 4 * row.fn
+    # Every distinct score plus "alert on nothing", per segment
+    assert len(curve) == sum(len(np.unique(scores[segments == s])) + 1 for s in ("login", "download"))
+
+
+def test_best_f1_is_exact():
+    scores, y = _scores(seed=1)
+    best = optimize_thresholds(scores, y)["global"]
+
+    brute = max(f1_score(y, scores >= t) for t in np.unique(scores))
+    assert best["f1"] == pytest.approx(brute)
+    assert f1_score(y, scores >= best["threshold"]) == pytest.approx(brute)
+
+
+def test_cost_objective_trades_alerts_for_misses():
+    scores, y = _scores(seed=2)
+    cheap_misses = optimize_thresholds(scores, y, objective="cost", fp_cost=5, fn_cost=1)["global"]
+    costly_misses = optimize_thresholds(scores, y, objective="cost", fp_cost=1, fn_cost=5)["global"]
+
+    assert costly_misses["threshold"] < cheap_misses["threshold"]
+    assert costly_misses["recall"] >= cheap_misses["recall"]
+    with pytest.raises(ValueError):
+        optimize_thresholds(scores, y, objective="accuracy")
+
+
+def test_segments_below_support_use_global_threshold():
+    scores, y = _scores(seed=3)
+    segments = np.array(["login"] * 500 + ["delete"] * 100)
+    segments[-5:] = "rare"
+    result = optimize_thresholds(scores, y, segments, min_support=50)
+
+    assert set(result["segments"]) == {"login", "delete"}
+    assert all(type(label) is str for label in result["segments"])  # YAML-safe keys
+    config = threshold_config(result, {"objective": "f1", "segment_by": "action", "subnet_prefix": 24})
+    assert config["risk_threshold"] == result["global"]["threshold"]
+
+    thresholds = segment_thresholds(["login", "rare", None], config["risk_thresholds"], default=0.7)
+    assert thresholds.tolist() == [result["segments"]["login"]["threshold"], 0.7, 0.7]
+
+
+def test_subnet_segments():
+    labels = segment_labels(["10.0.1.5", "10.0.1.9", "10.0.2.1", "::1"], "subnet", 24)
+    assert labels.tolist() == ["10.0.1.0/24", "10.0.1.0/24", "10.0.2.0/24", "::1"]
+    with pytest.raises(ValueError):
+        segment_labels(["x"], "country")
+
+
+def test_prediction_routes_apply_segment_thresholds(model_registry, monkeypatch):
+    monkeypatch.setattr(prediction_module, "load_risk_threshold", lambda default: 2.0)
+    monkeypatch.setattr(prediction_module, "load_segment_thresholds",
+                        lambda: {"segment_by": "action", "segments": {"login": 0.0}})
+    events = [{"action": "login"}, {"action": "download"}]
+
+    body = TestClient(app).post("/predict/batch", json={"events": events}).json()
+
+    actions = [item["prediction"]["recommended_action"] for item in body["results"]]
+    assert actions == ["block", "monitor"]
@@ -0,0 +1,87 @@
+"""Tests for per-stage tracing."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import prediction
+from src import tracing
+from src.tracing import Trace, activate, deactivate, span, traced
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    values = {"enabled": True, "sample_rate": 0.0, "path": str(tmp_path / "traces.jsonl")}
+    monkeypatch.setattr(tracing, "tracing_settings", lambda: dict(values))
+    monkeypatch.setattr(prediction, "tracing_settings", lambda: dict(values))
+    return values
+
+
+def test_span_is_noop_without_active_trace():
+    with span("anything"):
+        pass
+    assert tracing.current_trace() is None
+
+
+def test_spans_recorded_on_active_trace():
+    trace = Trace("test")
+    token = activate(trace)
+    try:
+        with span("encode"):
+            pass
+        with span("score"):
+            pass
+    finally:
+        deactivate(token)
+
+    assert [s[0] for s in trace.spans] == ["encode", "score"]
+    assert "encode;dur=" in trace.server_timing()
+
+
+def test_sampled_trace_written_as_jsonl(settings):
+    settings["sample_rate"] = 1.0
+    with traced("job") as trace:
+        with span("step"):
+            pass
+    assert trace is not None
+    record = json.loads(open(settings["path"]).read().splitlines()[0])
+    assert record["name"] == "job"
+    assert record["spans"][0]["stage"] == "step"
+
+
+def test_disabled_tracing_starts_nothing(settings):
+    settings["enabled"] = False
+    with traced("job", requested=True) as trace:
+        assert trace is None
+
+
+@pytest.fixture
+def client(model_registry):
+    return TestClient(app)
+
+
+def test_server_timing_is_opt_in(client, settings):
+    plain = client.post("/predict/event", json={"action": "login"})
+    assert "server-timing" not in plain.headers
+
+    # Uncached row, so the model stages run
+    traced_response = client.post(
+        "/predict/event", json={"action": "login", "bytes_transferred": 73421},
+        headers={"X-Trace": "1"},
+    )
+    timing = traced_response.headers["server-timing"]
+    for stage in ("parse", "executor", "batch.encode", "batch.anomaly_score",
+                  "batch.predict_proba", "batch.compute_risk_score", "threshold", "total"):
+        assert f"{stage};dur=" in timing
+
+
+def test_batch_route_stages(client, settings):
+    response = client.post(
+        "/predict/batch", json={"events": [{"action": "upload", "bytes_transferred": 91827}]},
+        headers={"X-Trace": "1"},
+    )
+    timing = response.headers["server-timing"]
+    assert "validate;dur=" in timing
+    assert "predict_proba;dur=" in timing
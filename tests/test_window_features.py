@@ -0,0 +1,142 @@
+"""Tests for the sliding-window feature engine."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import prediction
+from src import window_features as window_module
+from src.stream_processor import StreamProcessor
+from src.window_features import WindowFeatureEngine, add_window_features
+from tests.conftest import make_events
+
+START = datetime(2024, 1, 15, 9, 0, 0)
+
+
+def _event(seconds, user="user_001", ip="192.168.1.10", action="login",
+           status="success", nbytes=100):
+    return {
+        "timestamp": (START + timedelta(seconds=seconds)).isoformat(),
+        "user_id": user,
+        "ip_address": ip,
+        "action": action,
+        "status": status,
+        "bytes_transferred": nbytes,
+    }
+
+
+def test_counts_and_sums_within_window():
+    engine = WindowFeatureEngine(windows={"1m": 60})
+    engine.update(_event(0, action="login", nbytes=100))
+    engine.update(_event(10, action="file_access", nbytes=200))
+    out = engine.update(_event(20, action="login", status="failed", nbytes=300))
+
+    assert out["user_events_1m"] == 3
+    assert out["user_bytes_1m"] == 600
+    assert out["user_distinct_actions_1m"] == 2
+    assert out["user_failed_logins_1m"] == 1
+    assert out["user_rate_1m"] == pytest.approx(3 / 60)
+    assert out["ip_events_1m"] == 3
+
+
+def test_old_events_slide_out():
+    engine = WindowFeatureEngine(windows={"1m": 60, "5m": 300})
+    engine.update(_event(0, status="failed"))
+    engine.update(_event(30, action="port_scan", nbytes=1000))
+    out = engine.update(_event(100, action="logout", nbytes=5))
+
+    assert out["user_events_1m"] == 1
+    assert out["user_failed_logins_1m"] == 0
+    assert out["user_bytes_1m"] == 5
+    assert out["user_distinct_actions_1m"] == 1
+    assert out["user_events_5m"] == 3
+    assert out["user_failed_logins_5m"] == 1
+
+
+def test_users_and_ips_are_tracked_separately():
+    engine = WindowFeatureEngine(windows={"1m": 60})
+    engine.update(_event(0, user="alice", ip="10.0.0.1"))
+    engine.update(_event(1, user="bob", ip="10.0.0.1"))
+    out = engine.update(_event(2, user="alice", ip="10.0.0.2"))
+
+    assert out["user_events_1m"] == 2
+    assert out["ip_events_1m"] == 1
+    assert len(engine) == 4
+
+
+def test_idle_keys_are_evicted():
+    engine = WindowFeatureEngine(windows={"1m": 60}, idle_seconds=120)
+    engine.update(_event(0, user="alice", ip="10.0.0.1"))
+    engine.update(_event(200, user="bob", ip="10.0.0.2"))
+
+    assert len(engine) == 2
+    assert engine.evicted == 2
+    # A returning key starts from scratch
+    assert engine.update(_event(210, user="alice", ip="10.0.0.1"))["user_events_1m"] == 1
+
+
+def test_max_keys_bounds_memory():
+    engine = WindowFeatureEngine(windows={"1m": 60}, max_keys=10)
+    for n in range(50):
+        engine.update(_event(n, user=f"user_{n}", ip=f"10.0.0.{n}"))
+    assert len(engine) == 10
+
+
+def test_update_many_matches_update():
+    events = [_event(n * 7, user=f"user_{n % 3}", status="failed" if n % 2 else "success")
+              for n in range(40)]
+    one_by_one = WindowFeatureEngine()
+    expected = [one_by_one.update(e) for e in events]
+    columns = WindowFeatureEngine().update_many(events)
+
+    for n, row in enumerate(expected):
+        for name, value in row.items():
+            assert columns[name][n] == pytest.approx(value)
+
+
+def test_add_window_features_uses_timestamp_order():
+    df = make_events(n_normal=50, n_attack=10)
+    enriched = add_window_features(df, WindowFeatureEngine(windows={"1m": 60}))
+    ordered = df.sort_values("timestamp", kind="stable")
+    expected = WindowFeatureEngine(windows={"1m": 60}).update_many(ordered.to_dict("records"))
+
+    assert len(enriched) == len(df)
+    assert enriched.loc[ordered.index, "user_events_1m"].tolist() == expected["user_events_1m"].tolist()
+
+
+def test_stream_processor_appends_features():
+    processor = StreamProcessor(window_features=WindowFeatureEngine(windows={"1m": 60}))
+    processor.process_event(_event(0))
+    event = processor.process_event(_event(5))
+    assert event["user_events_1m"] == 2
+
+
+@pytest.fixture
+def window_client(model_registry, monkeypatch):
+    engine = WindowFeatureEngine(windows={"1m": 60})
+    monkeypatch.setattr(window_module, "_engine", engine)
+    monkeypatch.setattr(window_module, "_engine_loaded", True)
+    return TestClient(app), engine
+
+
+def test_prediction_route_updates_windows_and_alerts(window_client):
+    client, engine = window_client
+    alerts = prediction.get_alert_system()
+    before = len(alerts.alerts)
+    threshold = int(alerts.thresholds["failed_logins"])
+
+    events = [_event(n, user="mallory", ip="203.0.113.9", status="failed", nbytes=n)
+              for n in range(threshold + 3)]
+    response = client.post("/predict/batch", json={"events": events})
+    assert response.status_code == 200
+
+    assert len(engine) == 2
+    brute_force = [a for a in alerts.alerts[before:] if a.details.get("period") == "1m"]
+    # One alert per entity, raised when the threshold is crossed
+    assert len(brute_force) == 2
+    assert all(a.details["failed_logins"] == threshold + 1 for a in brute_force)
+
+    stats = client.get("/api/monitor/window-features").json()
+    assert stats["enabled"] and stats["keys"] == 2